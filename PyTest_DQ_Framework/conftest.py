@@ -4,13 +4,25 @@ import pandas as pd
 
 from src.connectors.postgres.postgres_connector import PostgresConnectorContextManager
 from src.connectors.file_system.parquet_reader import ParquetReader
+from src.connectors.file_system.arrow_exchange_reader import ArrowExchangeReader, MANIFEST_FILE
+from src.connectors.file_system.dataset_manifest import pin_snapshots
+from src.data_quality.backends import BACKENDS, create_backend
 from src.data_quality.data_quality_validation_library import DataQualityLibrary
+from src.data_quality.dataset_metadata import PARQUET_DATASETS
+from src.data_quality.expected_outputs import build_expected_parquet_outputs
 
 try:
     import yaml
 except ImportError:  # pragma: no cover
     yaml = None
 
+pytest_plugins = [
+    "src.plugins.metrics_plugin",
+    "src.plugins.budget_plugin",
+    "src.plugins.results_cache_plugin",
+    "src.plugins.frame_guard_plugin",
+]
+
 
 def pytest_addoption(parser):
     parser.addoption("--db_host", action="store", default=os.environ.get("DB_HOST", "localhost"),
@@ -32,6 +44,20 @@ def pytest_addoption(parser):
     parser.addoption("--parquet_path_patient_sum_treatment_cost", action="store",
                      default="/parquet_data/patient_sum_treatment_cost_per_facility_type",
                      help="Path to Parquet file: patient_sum_treatment_cost_per_facility_type")
+    parser.addoption("--rollups_path_facility_type_avg_time_spent", action="store",
+                     default="/parquet_data/rollups/facility_type_avg_time_spent_per_visit_date",
+                     help="Path to rollup tables: facility_type_avg_time_spent_per_visit_date")
+    parser.addoption("--arrow_exchange_path", action="store", default=os.environ.get("ARROW_EXCHANGE_PATH", ""),
+                     help="Directory of the Arrow IPC files published by the data_dev pipeline; current entries "
+                          "are used instead of reading the tables and Parquet files")
+    parser.addoption("--partition_workers", action="store", type=int, default=None,
+                     help="Processes used by the partition-parallel Parquet validation (defaults to the CPU count)")
+    parser.addoption("--dq_backend", action="store", default="pandas", choices=BACKENDS,
+                     help="Engine computing the DQ check aggregates: pandas (in memory) or duckdb "
+                          "(multithreaded, out of core)")
+    parser.addoption("--dq_cross_backend", action="store_true", default=False,
+                     help="Also compute every check aggregate with pandas and error on any difference "
+                          "from --dq_backend")
     parser.addoption("--mapping_path", action="store", default="src/data_quality/mapping.yaml",
                      help="Path to mapping YAML file")
 
@@ -41,6 +67,10 @@ def pytest_configure(config):
     for option in required_options:
         if not config.getoption(option) and not os.environ.get(option.upper()):
             pytest.fail(f"Missing required option or environment variable: {option}")
+    DataQualityLibrary.backend = create_backend(config.getoption("--dq_backend"),
+                                                cross_check=config.getoption("--dq_cross_backend"))
+    # every check of the run reads the Parquet dataset versions committed when it first reads them
+    pin_snapshots()
 
 
 @pytest.fixture(scope="session")
@@ -73,64 +103,133 @@ def parquet_reader():
         pytest.fail(f"Failed to initialize ParquetReader: {exc}")
 
 
+@pytest.fixture(scope="session")
+def arrow_exchange(request):
+    """Reader of the pipeline's Arrow IPC exchange, None if no exchange is configured or published."""
+    path = request.config.getoption("--arrow_exchange_path")
+    if not path or not os.path.exists(os.path.join(path, MANIFEST_FILE)):
+        return None
+    return ArrowExchangeReader(path)
+
+
+def read_table(db_connection, arrow_exchange, table):
+    if arrow_exchange is not None and arrow_exchange.has_current_table(table, db_connection):
+        return arrow_exchange.read(table)
+    return db_connection.get_data_sql(f"SELECT * FROM {table}")
+
+
+def read_parquet_dataset(request, parquet_reader, arrow_exchange, option, dataset):
+    """Reads a Parquet dataset coerced to the dtypes of its metadata, once per session."""
+    path = request.config.getoption(option)
+    if not os.path.exists(path):
+        pytest.skip(f"Parquet file not found: {path}")
+    coercions = PARQUET_DATASETS[dataset]["coerce"]
+    if arrow_exchange is not None and arrow_exchange.has_current_parquet_result(dataset, path):
+        return arrow_exchange.read(dataset, coercions)
+    return parquet_reader.read_parquet(path, coercions)
+
+
 # --- Source-layer fixtures -------------------------------------------------
 
 @pytest.fixture(scope="module")
-def src_facilities(db_connection):
-    return db_connection.get_data_sql("SELECT * FROM src_generated_facilities")
+def src_facilities(db_connection, arrow_exchange):
+    return read_table(db_connection, arrow_exchange, "src_generated_facilities")
 
 
 @pytest.fixture(scope="module")
-def src_patients(db_connection):
-    return db_connection.get_data_sql("SELECT * FROM src_generated_patients")
+def src_patients(db_connection, arrow_exchange):
+    return read_table(db_connection, arrow_exchange, "src_generated_patients")
 
 
 @pytest.fixture(scope="module")
-def src_visits(db_connection):
-    return db_connection.get_data_sql("SELECT * FROM src_generated_visits")
+def src_visits(db_connection, arrow_exchange):
+    return read_table(db_connection, arrow_exchange, "src_generated_visits")
 
 
 # --- 3NF-layer fixtures ----------------------------------------------------
 
 @pytest.fixture(scope="module")
-def nf3_facilities(db_connection):
-    return db_connection.get_data_sql("SELECT * FROM facilities")
+def nf3_facilities(db_connection, arrow_exchange):
+    return read_table(db_connection, arrow_exchange, "facilities")
 
 
 @pytest.fixture(scope="module")
-def nf3_patients(db_connection):
-    return db_connection.get_data_sql("SELECT * FROM patients")
+def nf3_patients(db_connection, arrow_exchange):
+    return read_table(db_connection, arrow_exchange, "patients")
 
 
 @pytest.fixture(scope="module")
-def nf3_visits(db_connection):
-    return db_connection.get_data_sql("SELECT * FROM visits")
+def nf3_visits(db_connection, arrow_exchange):
+    return read_table(db_connection, arrow_exchange, "visits")
 
 
 # --- Parquet fixtures ------------------------------------------------------
 
-@pytest.fixture(scope="module")
-def parquet_facility_name_min_time_spent(request, parquet_reader):
-    path = request.config.getoption("--parquet_path_facility_name_min_time_spent")
-    if not os.path.exists(path):
-        pytest.skip(f"Parquet file not found: {path}")
-    return parquet_reader.read_parquet(path)
+@pytest.fixture(scope="session")
+def parquet_facility_name_min_time_spent(request, parquet_reader, arrow_exchange):
+    return read_parquet_dataset(request, parquet_reader, arrow_exchange,
+                                "--parquet_path_facility_name_min_time_spent",
+                                "facility_name_min_time_spent_per_visit_date")
 
 
-@pytest.fixture(scope="module")
-def parquet_facility_type_avg_time_spent(request, parquet_reader):
-    path = request.config.getoption("--parquet_path_facility_type_avg_time_spent")
-    if not os.path.exists(path):
-        pytest.skip(f"Parquet file not found: {path}")
-    return parquet_reader.read_parquet(path)
+@pytest.fixture(scope="session")
+def parquet_facility_type_avg_time_spent(request, parquet_reader, arrow_exchange):
+    return read_parquet_dataset(request, parquet_reader, arrow_exchange,
+                                "--parquet_path_facility_type_avg_time_spent",
+                                "facility_type_avg_time_spent_per_visit_date")
+
+
+@pytest.fixture(scope="session")
+def parquet_patient_sum_treatment_cost(request, parquet_reader, arrow_exchange):
+    return read_parquet_dataset(request, parquet_reader, arrow_exchange,
+                                "--parquet_path_patient_sum_treatment_cost",
+                                "patient_sum_treatment_cost_per_facility_type")
 
 
 @pytest.fixture(scope="module")
-def parquet_patient_sum_treatment_cost(request, parquet_reader):
-    path = request.config.getoption("--parquet_path_patient_sum_treatment_cost")
+def rollups_facility_type_avg_time_spent(request, parquet_reader):
+    """Week/month/year rollup tables materialized next to the Parquet dataset."""
+    path = request.config.getoption("--rollups_path_facility_type_avg_time_spent")
     if not os.path.exists(path):
-        pytest.skip(f"Parquet file not found: {path}")
-    return parquet_reader.read_parquet(path)
+        pytest.skip(f"Rollup tables not found: {path}")
+    return {
+        grain: parquet_reader.read_parquet(os.path.join(path, f"{grain}.parquet"))
+        for grain in ("week", "month", "year")
+    }
+
+
+@pytest.fixture(scope="session")
+def parquet_dataset_paths(request):
+    """Locations of the Parquet datasets, keyed by dataset name, for checks reading them partition by partition."""
+    return {
+        "facility_name_min_time_spent_per_visit_date":
+            request.config.getoption("--parquet_path_facility_name_min_time_spent"),
+        "facility_type_avg_time_spent_per_visit_date":
+            request.config.getoption("--parquet_path_facility_type_avg_time_spent"),
+        "patient_sum_treatment_cost_per_facility_type":
+            request.config.getoption("--parquet_path_patient_sum_treatment_cost"),
+    }
+
+
+PARQUET_FIXTURES = {
+    "facility_name_min_time_spent_per_visit_date": "parquet_facility_name_min_time_spent",
+    "facility_type_avg_time_spent_per_visit_date": "parquet_facility_type_avg_time_spent",
+    "patient_sum_treatment_cost_per_facility_type": "parquet_patient_sum_treatment_cost",
+}
+
+
+@pytest.fixture(scope="session")
+def parquet_check_source(request, parquet_dataset_paths):
+    """
+    Source of the backend-computed checks of a dataset: its path when the DQ backend scans Parquet in place,
+    so the dataset is never loaded into pandas for them, else the session's loaded frame.
+    """
+    def source(dataset):
+        path = parquet_dataset_paths[dataset]
+        if DataQualityLibrary.backend.scans_paths and os.path.exists(path):
+            return path
+        return request.getfixturevalue(PARQUET_FIXTURES[dataset])
+    return source
 
 
 # --- Supporting fixtures ---------------------------------------------------
@@ -154,65 +253,4 @@ def dq_mapping(request):
 @pytest.fixture(scope="module")
 def expected_parquet_outputs(nf3_visits, nf3_facilities, nf3_patients):
     """Generate expected Parquet results + metadata from the 3NF layer."""
-    visits = nf3_visits.copy()
-    visits["visit_timestamp"] = pd.to_datetime(visits["visit_timestamp"])
-    visits["visit_date"] = visits["visit_timestamp"].dt.floor("D")
-
-    facilities = (
-        nf3_facilities[["id", "facility_name", "facility_type"]]
-        .rename(columns={"id": "facility_id"})
-    )
-    patients = (
-        nf3_patients[["id", "first_name", "last_name"]]
-        .rename(columns={"id": "patient_id"})
-    )
-
-    visits_facilities = visits.merge(facilities, on="facility_id", how="left")
-
-    facility_name_min = (
-        visits_facilities.groupby(["facility_name", "visit_date"])["duration_minutes"]
-        .min()
-        .reset_index()
-        .rename(columns={"duration_minutes": "min_time_spent"})
-    )
-
-    facility_type_avg = (
-        visits_facilities.groupby(["facility_type", "visit_date"])["duration_minutes"]
-        .mean()
-        .round(2)
-        .reset_index()
-        .rename(columns={"duration_minutes": "avg_time_spent"})
-    )
-
-    visits_facilities_patients = visits_facilities.merge(patients, on="patient_id", how="left")
-    visits_facilities_patients["full_name"] = (
-        visits_facilities_patients["first_name"].fillna("") + " " +
-        visits_facilities_patients["last_name"].fillna("")
-    ).str.strip()
-
-    patient_sum_cost = (
-        visits_facilities_patients.groupby(["facility_type", "full_name"])["treatment_cost"]
-        .sum()
-        .reset_index()
-        .rename(columns={"treatment_cost": "sum_treatment_cost"})
-    )
-
-    return {
-        "facility_name_min_time_spent_per_visit_date": {
-            "expected": facility_name_min,
-            "partition": {"column": "partition_date", "type": "month", "source": "visit_date"},
-            "coerce": {"visit_date": "datetime", "min_time_spent": "int"},
-        },
-        "facility_type_avg_time_spent_per_visit_date": {
-            "expected": facility_type_avg,
-            "partition": {"column": "partition_date", "type": "month", "source": "visit_date"},
-            "coerce": {"visit_date": "datetime", "avg_time_spent": "float"},
-            "allowed_values": {"facility_type": ["Hospital", "Clinic", "Specialty Center"]},
-        },
-        "patient_sum_treatment_cost_per_facility_type": {
-            "expected": patient_sum_cost,
-            "partition": {"column": "facility_type_partition", "type": "underscore", "source": "facility_type"},
-            "coerce": {"sum_treatment_cost": "float"},
-            "range_checks": [{"column": "sum_treatment_cost", "min": 0}],
-        },
-    }
\ No newline at end of file
+    return build_expected_parquet_outputs(nf3_visits, nf3_facilities, nf3_patients)
@@ -0,0 +1,80 @@
+import json
+import os
+
+import pandas as pd
+import pyarrow as pa
+
+from src.connectors.file_system.dataset_manifest import manifest_version
+from src.data_quality.coercion import coerce_table, to_pandas
+from src.instrumentation.metrics import recorder
+
+MANIFEST_FILE = "manifest.json"
+
+# Same statistics the pipeline records when it publishes a table snapshot.
+TABLE_STATS_SQL = """
+SELECT
+    '{table}' AS table_name,
+    (SELECT COUNT(*) FROM {table}) AS row_count,
+    COALESCE((SELECT n_tup_ins + n_tup_upd + n_tup_del FROM pg_stat_user_tables WHERE relname = '{table}'), 0)
+        AS write_count
+"""
+
+
+class ArrowExchangeReader:
+    """
+    Reads the SRC/3NF snapshots and Parquet results published by the data_dev pipeline as Arrow IPC files.
+
+    Files are memory-mapped, so reading them involves no decoding and no copy of the Arrow data; only the
+    conversion to the NumPy-backed frames the checks work on materializes the columns. An entry is only used
+    when it is current: table snapshots must match the row count and write counters of the table,
+    Parquet results the dataset version they were committed as, or for datasets without a manifest the latest
+    modification time of the Parquet files they were written with.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, MANIFEST_FILE), "r", encoding="utf-8") as handle:
+            self.entries = json.load(handle).get("entries", {})
+        self._current_tables = None
+
+    def current_tables(self, db_connection) -> set:
+        """Names of the published tables whose snapshot matches the database, checked once per session."""
+        if self._current_tables is None:
+            tables = [name for name, entry in self.entries.items() if entry["kind"] == "table"]
+            self._current_tables = set()
+            if tables:
+                stats = db_connection.get_data_sql(
+                    " UNION ALL ".join(TABLE_STATS_SQL.format(table=table) for table in tables)
+                )
+                for row in stats.itertuples(index=False):
+                    entry = self.entries[row.table_name]
+                    if entry["row_count"] == row.row_count and entry["write_count"] == row.write_count:
+                        self._current_tables.add(row.table_name)
+        return self._current_tables
+
+    def has_current_table(self, table: str, db_connection) -> bool:
+        return table in self.entries and table in self.current_tables(db_connection)
+
+    def has_current_parquet_result(self, dataset: str, parquet_path: str) -> bool:
+        entry = self.entries.get(dataset)
+        if entry is None or entry["kind"] != "parquet_result" or not os.path.exists(parquet_path):
+            return False
+        version = manifest_version(parquet_path)
+        if version is not None:
+            return entry.get("parquet_version") == version
+        latest_mtime_ns = max(
+            (os.stat(os.path.join(root, name)).st_mtime_ns
+             for root, _, files in os.walk(parquet_path) for name in files),
+            default=0
+        )
+        return entry["parquet_mtime_ns"] == latest_mtime_ns
+
+    def read(self, name: str, coercions: dict = None) -> pd.DataFrame:
+        entry = self.entries[name]
+        file_path = os.path.join(self.path, entry["file"])
+        with recorder.measure("read_arrow_ipc", "connector", entry=name) as measurement:
+            with pa.memory_map(file_path, "r") as source:
+                df = to_pandas(coerce_table(pa.ipc.open_file(source).read_all(), coercions), coercions)
+            measurement.rows_out = len(df)
+            measurement.bytes_read = os.path.getsize(file_path)
+        return df
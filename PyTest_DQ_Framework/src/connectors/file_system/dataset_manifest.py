@@ -0,0 +1,136 @@
+"""
+Resolution of the versioned Parquet datasets committed by the data_dev pipeline.
+
+Every write of a dataset commits a version by atomically replacing ``_manifest.json``, which lists the data
+files of the version with their row counts and footer statistics. Reading the files a manifest lists, instead
+of listing the directories, never observes a partially written version and costs no directory listing.
+
+Once pin_snapshots() is called, the first manifest resolved for a dataset is pinned for the rest of the
+process, so all checks of a DQ run read the same snapshot even if the pipeline commits a new version
+meanwhile. Files superseded by a newer version are moved below ``_versions`` and stay readable while their
+version is retained.
+"""
+
+import json
+import os
+from typing import List, Optional
+
+import pyarrow.dataset as ds
+
+MANIFEST_FILE = "_manifest.json"
+MANIFESTS_DIR = "_manifests"
+VERSIONS_DIR = "_versions"
+
+# dataset directory -> manifest pinned for the process, None while snapshots are not pinned
+_pinned = None
+
+
+def read_manifest(dataset_path: str, version: Optional[int] = None) -> Optional[dict]:
+    """The current manifest of a dataset, or that of a retained version; None if there is none."""
+    path = (os.path.join(dataset_path, MANIFEST_FILE) if version is None
+            else os.path.join(dataset_path, MANIFESTS_DIR, f"v{version:06d}.json"))
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return None
+
+
+def snapshot(dataset_path: str, version: Optional[int] = None) -> Optional[dict]:
+    """The manifest readers of this process use: the requested version, else the pinned or current one."""
+    if version is not None or _pinned is None:
+        return read_manifest(dataset_path, version)
+    key = os.path.abspath(dataset_path)
+    if key not in _pinned:
+        manifest = read_manifest(dataset_path)
+        if manifest is None:
+            return None
+        _pinned[key] = manifest
+    return _pinned[key]
+
+
+def pin_snapshots() -> None:
+    """Pins the manifest of every dataset at its first resolution, for the rest of the process."""
+    global _pinned
+    if _pinned is None:
+        _pinned = {}
+
+
+def release_snapshots() -> None:
+    """Stops pinning and forgets the pinned manifests, so reads resolve the current versions again."""
+    global _pinned
+    _pinned = None
+
+
+def dataset_root(path: str) -> Optional[str]:
+    """The versioned dataset a path belongs to: the path itself or the dataset of a partition directory."""
+    path = os.path.abspath(path)
+    while True:
+        if os.path.isfile(os.path.join(path, MANIFEST_FILE)):
+            return path
+        if "=" not in os.path.basename(path):
+            return None
+        path = os.path.dirname(path)
+
+
+def locate(dataset_path: str, relative_path: str) -> str:
+    """Location of a listed file: in its partition, or below _versions once superseded."""
+    file_path = os.path.join(dataset_path, *relative_path.split("/"))
+    if os.path.exists(file_path):
+        return file_path
+    return os.path.join(dataset_path, VERSIONS_DIR, *relative_path.split("/"))
+
+
+def manifest_entries(path: str, version: Optional[int] = None) -> Optional[List[dict]]:
+    """Manifest entries of the files below a dataset or partition directory, None if it is not versioned."""
+    root = dataset_root(path)
+    if root is None:
+        return None
+    manifest = snapshot(root, version)
+    if manifest is None:
+        raise FileNotFoundError(f"Version {version} of {root} is not retained")
+    prefix = os.path.relpath(os.path.abspath(path), root).replace(os.sep, "/")
+    if prefix == ".":
+        return manifest["files"]
+    return [entry for entry in manifest["files"] if entry["path"].startswith(prefix + "/")]
+
+
+def manifest_files(path: str, version: Optional[int] = None) -> Optional[List[str]]:
+    """Paths of the files below a dataset or partition directory, None if it is not versioned."""
+    entries = manifest_entries(path, version)
+    if entries is None:
+        return None
+    root = dataset_root(path)
+    return [locate(root, entry["path"]) for entry in entries]
+
+
+def manifest_version(path: str) -> Optional[int]:
+    """Version of the snapshot of a dataset, None if it is not versioned."""
+    root = dataset_root(path)
+    return None if root is None else snapshot(root)["version"]
+
+
+def parquet_dataset(path: str, version: Optional[int] = None) -> Optional[ds.Dataset]:
+    """
+    Arrow dataset of the files a manifest lists below path, with the partition columns of the directories
+    below path; None if path is not versioned.
+    """
+    files = manifest_files(path, version)
+    if files is None:
+        return None
+    root = dataset_root(path)
+    live_dir = os.path.abspath(path)
+    # files moved below _versions keep their partition directories relative to the dataset
+    moved_dir = os.path.join(root, VERSIONS_DIR, os.path.relpath(live_dir, root))
+    groups = {}
+    for file_path in files:
+        base_dir = moved_dir if file_path.startswith(os.path.join(root, VERSIONS_DIR) + os.sep) else live_dir
+        groups.setdefault(os.path.normpath(base_dir), []).append(file_path)
+    datasets = [
+        ds.dataset(group, format="parquet", partitioning=ds.HivePartitioning.discover(infer_dictionary=True),
+                   partition_base_dir=base_dir)
+        for base_dir, group in groups.items()
+    ]
+    if len(datasets) == 1:
+        return datasets[0]
+    return ds.dataset(datasets)
@@ -1,6 +1,39 @@
+import os
+
 import pandas as pd
+import pyarrow.parquet as pq
+
+from src.connectors.file_system.dataset_manifest import manifest_entries, parquet_dataset
+from src.data_quality.coercion import coerce_table, to_pandas
+from src.instrumentation.metrics import recorder
+
 
 class ParquetReader:
     @staticmethod
-    def read_parquet(path: str) -> pd.DataFrame:
-        return pd.read_parquet(path)
\ No newline at end of file
+    def read_parquet(path: str, coercions: dict = None, columns: list = None, version: int = None) -> pd.DataFrame:
+        """
+        Reads a Parquet file or dataset, casting the columns in coercions on the Arrow table.
+
+        Versioned datasets and their partitions are read from the files of the pinned manifest, or of the
+        given retained version.
+        """
+        with recorder.measure("read_parquet", "connector", path=path) as measurement:
+            dataset = None if os.path.isfile(path) else parquet_dataset(path, version)
+            table = pq.read_table(path, columns=columns) if dataset is None else dataset.to_table(columns=columns)
+            df = to_pandas(coerce_table(table, coercions), coercions)
+            measurement.rows_out = len(df)
+            measurement.bytes_read = ParquetReader.size_on_disk(path)
+        return df
+
+    @staticmethod
+    def size_on_disk(path: str) -> int:
+        if os.path.isfile(path):
+            return os.path.getsize(path)
+        entries = manifest_entries(path)
+        if entries is not None:
+            return sum(entry["bytes"] for entry in entries)
+        return sum(
+            os.path.getsize(os.path.join(root, file_name))
+            for root, _, files in os.walk(path)
+            for file_name in files
+        )
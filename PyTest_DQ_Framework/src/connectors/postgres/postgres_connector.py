@@ -1,4 +1,6 @@
-from typing import Optional
+import uuid
+from typing import Iterator, Optional
+
 import psycopg2
 from psycopg2.extensions import connection
 
@@ -6,6 +8,7 @@ import pandas as pd
 from pandas import DataFrame
 
 from config import postgres_config
+from src.instrumentation.metrics import recorder
 
 
 class PostgresConnectorContextManager:
@@ -84,6 +87,8 @@ class PostgresConnectorContextManager:
         """
         Execute a SQL query and return the results as a pandas DataFrame.
 
+        The call is measured; bytes_read is the in-memory size of the fetched data.
+
         Args:
             query (str): The SQL query to execute.
 
@@ -94,8 +99,37 @@ class PostgresConnectorContextManager:
             Exception: If the query execution fails, an exception is raised with the error message.
         """
         try:
-            data_df = pd.read_sql(query, self.connection)
+            with recorder.measure('get_data_sql', 'connector') as measurement:
+                data_df = pd.read_sql(query, self.connection)
+                measurement.rows_out = len(data_df)
+                # shallow size: deep=True would walk every Python object of the string columns on each query
+                measurement.bytes_read = int(data_df.memory_usage(deep=False).sum())
             return data_df
         except Exception as e:
             print(f'Failed to receive data from DB\nError: {e}\n')
             raise
+
+    def iter_data_sql(self, query: str, chunk_size: int = 50000) -> Iterator[DataFrame]:
+        """
+        Execute a SQL query on a server-side cursor and yield the results in chunks.
+
+        Only one chunk is held in memory at a time, so results larger than memory can be processed.
+        The cursor lives in the current transaction, which is left open.
+
+        Args:
+            query (str): The SQL query to execute.
+            chunk_size (int): Number of rows fetched per round trip and per yielded DataFrame.
+
+        Yields:
+            DataFrame: The next chunk of the query results.
+        """
+        with self.connection.cursor(name=f"dq_stream_{uuid.uuid4().hex}") as cursor:
+            cursor.itersize = chunk_size
+            cursor.execute(query)
+            while True:
+                with recorder.measure('iter_data_sql', 'connector') as measurement:
+                    rows = cursor.fetchmany(chunk_size)
+                    measurement.rows_out = len(rows)
+                if not rows:
+                    break
+                yield pd.DataFrame.from_records(rows, columns=[column.name for column in cursor.description])
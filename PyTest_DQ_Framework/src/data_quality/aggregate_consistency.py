@@ -0,0 +1,61 @@
+"""
+Consistency of the pipeline's aggregate tables with the 3NF visits they are refreshed from.
+
+The Parquet transformations and the expected outputs of the DQ suite both read the aggregate tables, so the
+tables themselves are compared with a full recomputation from the visits. Rows are compared as multisets in
+both directions, which catches rows the incremental refresh missed, left stale or counted twice.
+"""
+
+from dataclasses import dataclass
+
+from src.instrumentation.metrics import recorder
+
+# Aggregate table -> its columns and their recomputation from the visits.
+AGGREGATE_QUERIES = {
+    "agg_facility_daily_visits": (
+        "facility_id, visit_date, visit_count, sum_duration_minutes, min_duration_minutes",
+        """
+        SELECT facility_id, visit_timestamp::date AS visit_date, COUNT(*) AS visit_count,
+               SUM(duration_minutes) AS sum_duration_minutes, MIN(duration_minutes) AS min_duration_minutes
+        FROM visits
+        GROUP BY facility_id, visit_timestamp::date
+        """,
+    ),
+    "agg_patient_facility_visits": (
+        "facility_id, patient_id, visit_count, sum_treatment_cost",
+        """
+        SELECT facility_id, patient_id, COUNT(*) AS visit_count, SUM(treatment_cost) AS sum_treatment_cost
+        FROM visits
+        GROUP BY facility_id, patient_id
+        """,
+    ),
+}
+
+DIFFERENCE_QUERY = """
+SELECT
+    (SELECT COUNT(*) FROM (({recompute}) EXCEPT ALL (SELECT {columns} FROM {table})) missing) AS missing,
+    (SELECT COUNT(*) FROM ((SELECT {columns} FROM {table}) EXCEPT ALL ({recompute})) extra) AS extra
+"""
+
+
+@dataclass
+class AggregateDifferences:
+    """Rows of the recomputation missing in an aggregate table, and rows of the table not in the recomputation."""
+    table: str
+    missing: int
+    extra: int
+
+    @property
+    def passed(self) -> bool:
+        return not (self.missing or self.extra)
+
+    def summary(self) -> str:
+        return f"{self.table}: {self.missing} rows missing or stale, {self.extra} rows extra or stale"
+
+
+@recorder.measured("check")
+def aggregate_differences(db_connection, table: str) -> AggregateDifferences:
+    """Compares an aggregate table with its recomputation from the visits, in the database."""
+    columns, recompute = AGGREGATE_QUERIES[table]
+    counts = db_connection.get_data_sql(DIFFERENCE_QUERY.format(recompute=recompute, columns=columns, table=table))
+    return AggregateDifferences(table, int(counts["missing"].iloc[0]), int(counts["extra"].iloc[0]))
@@ -0,0 +1,206 @@
+"""
+Execution backends of the DQ checks.
+
+A backend computes the aggregates the checks of DataQualityLibrary decide on (row counts, duplicate rows,
+null counts, range violations and invalid values) for a data source: a pandas DataFrame, a pyarrow Table or
+the path of a Parquet file or Hive-partitioned Parquet folder. The pandas backend loads Parquet paths into
+memory; the DuckDB backend queries them in place, multithreaded and spilling to disk when needed. Versioned
+Parquet folders are read from the files of their manifest.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+import pyarrow as pa
+
+try:
+    import duckdb
+except ImportError:  # pragma: no cover
+    duckdb = None
+
+from src.connectors.file_system.dataset_manifest import manifest_files
+from src.connectors.file_system.parquet_reader import ParquetReader
+
+BACKENDS = ("pandas", "duckdb")
+
+
+class BackendMismatchError(Exception):
+    """Raised in cross-backend mode when two backends compute different results for the same check."""
+
+
+def quote(column: str) -> str:
+    return '"' + column.replace('"', '""') + '"'
+
+
+def missing_to_none(values) -> set:
+    """Distinct values with NaN, NaT and None collapsed into None, so every backend reports missing values alike."""
+    return {None if pd.isna(value) else value for value in values}
+
+
+class PandasBackend:
+    """Computes the check aggregates with pandas, in memory."""
+
+    name = "pandas"
+    scans_paths = False
+
+    @staticmethod
+    def frame(source) -> pd.DataFrame:
+        if isinstance(source, pd.DataFrame):
+            return source
+        if isinstance(source, pa.Table):
+            return source.to_pandas()
+        return ParquetReader.read_parquet(source)
+
+    def row_count(self, source) -> int:
+        return len(self.frame(source))
+
+    def duplicate_rows(self, source, columns=None) -> pd.DataFrame:
+        """Rows repeating the columns of an earlier row (all rows of the source if columns is None)."""
+        df = self.frame(source)
+        return df[df.duplicated(subset=columns)]
+
+    def null_counts(self, source, columns=None) -> dict:
+        df = self.frame(source)
+        return {column: int(count) for column, count in df[columns or list(df.columns)].isnull().sum().items()}
+
+    def range_violations(self, source, column, min_value=None, max_value=None) -> tuple:
+        """Number of values below min_value and above max_value."""
+        values = self.frame(source)[column]
+        below = int((values < min_value).sum()) if min_value is not None else 0
+        above = int((values > max_value).sum()) if max_value is not None else 0
+        return below, above
+
+    def invalid_values(self, source, column, allowed_values) -> set:
+        return missing_to_none(self.frame(source)[column].unique()) - missing_to_none(allowed_values)
+
+
+class DuckDBBackend:
+    """
+    Computes the check aggregates with an embedded DuckDB database.
+
+    DataFrames and Arrow tables are scanned without copying, Parquet paths are read in place with Hive
+    partitioning, so only the aggregates are materialized in Python.
+    """
+
+    name = "duckdb"
+    scans_paths = True
+
+    def __init__(self, threads=None, memory_limit=None):
+        if duckdb is None:
+            raise ImportError("The duckdb DQ backend requires the duckdb package")
+        self.connection = duckdb.connect()
+        if threads:
+            self.connection.execute(f"SET threads = {int(threads)}")
+        if memory_limit:
+            self.connection.execute(f"SET memory_limit = '{memory_limit}'")
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def cursor(self, source):
+        """A cursor of its own with the source bound as the relation 'source', closed on exit."""
+        with self.lock:
+            cursor = self.connection.cursor()
+        try:
+            if isinstance(source, (pd.DataFrame, pa.Table)):
+                cursor.register("source", source)
+            else:
+                files = manifest_files(source) if os.path.isdir(source) else None
+                path = files or (os.path.join(source, "**", "*.parquet") if os.path.isdir(source) else source)
+                cursor.read_parquet(path, hive_partitioning=True).create_view("source")
+            yield cursor
+        finally:
+            cursor.close()
+
+    def query(self, source, sql: str, params=None, fetch: str = "fetchall"):
+        """Runs sql against the source and returns the result of its fetch method (fetchall, fetchone or df)."""
+        with self.cursor(source) as cursor:
+            return getattr(cursor.execute(sql, params or []), fetch)()
+
+    def columns(self, source) -> list:
+        if isinstance(source, pd.DataFrame):
+            return list(source.columns)
+        if isinstance(source, pa.Table):
+            return source.column_names
+        with self.cursor(source) as cursor:
+            return [column[0] for column in cursor.execute("SELECT * FROM source LIMIT 0").description]
+
+    def row_count(self, source) -> int:
+        return self.query(source, "SELECT COUNT(*) FROM source", fetch="fetchone")[0]
+
+    def duplicate_rows(self, source, columns=None) -> pd.DataFrame:
+        partition = ", ".join(quote(column) for column in (columns or self.columns(source)))
+        return self.query(
+            source, f"SELECT * FROM source QUALIFY row_number() OVER (PARTITION BY {partition}) > 1", fetch="df"
+        )
+
+    def null_counts(self, source, columns=None) -> dict:
+        columns = columns or self.columns(source)
+        counts = ", ".join(f"COUNT(*) - COUNT({quote(column)})" for column in columns)
+        return dict(zip(columns, self.query(source, f"SELECT {counts} FROM source", fetch="fetchone")))
+
+    def range_violations(self, source, column, min_value=None, max_value=None) -> tuple:
+        below = f"COUNT(*) FILTER (WHERE {quote(column)} < ?)" if min_value is not None else "0"
+        above = f"COUNT(*) FILTER (WHERE {quote(column)} > ?)" if max_value is not None else "0"
+        params = [value for value in (min_value, max_value) if value is not None]
+        return tuple(self.query(source, f"SELECT {below}, {above} FROM source", params, fetch="fetchone"))
+
+    def invalid_values(self, source, column, allowed_values) -> set:
+        rows = self.query(source, f"SELECT DISTINCT {quote(column)} FROM source")
+        return missing_to_none(row[0] for row in rows) - missing_to_none(allowed_values)
+
+
+class CrossCheckBackend:
+    """Runs every aggregate on a reference and a candidate backend and raises if their results differ."""
+
+    def __init__(self, reference, candidate):
+        self.reference = reference
+        self.candidate = candidate
+        self.name = f"{candidate.name} (cross-checked against {reference.name})"
+        self.scans_paths = candidate.scans_paths
+
+    def compare(self, method: str, *args):
+        expected = getattr(self.reference, method)(*args)
+        actual = getattr(self.candidate, method)(*args)
+        if isinstance(expected, pd.DataFrame):
+            same = len(expected) == len(actual)
+        elif isinstance(expected, dict):
+            same = expected.keys() == actual.keys() and all(expected[key] == actual[key] for key in expected)
+        else:
+            same = expected == actual
+        if not same:
+            raise BackendMismatchError(
+                f"{method}: {self.reference.name} returned {expected!r}, {self.candidate.name} returned {actual!r}"
+            )
+        return expected
+
+    def row_count(self, source):
+        return self.compare("row_count", source)
+
+    def duplicate_rows(self, source, columns=None):
+        return self.compare("duplicate_rows", source, columns)
+
+    def null_counts(self, source, columns=None):
+        return self.compare("null_counts", source, columns)
+
+    def range_violations(self, source, column, min_value=None, max_value=None):
+        return self.compare("range_violations", source, column, min_value, max_value)
+
+    def invalid_values(self, source, column, allowed_values):
+        return self.compare("invalid_values", source, column, allowed_values)
+
+
+def create_backend(name: str, cross_check=False):
+    """
+    Creates the backend the checks run on.
+
+    Args:
+        name: One of BACKENDS.
+        cross_check: Also run every aggregate on the pandas backend and raise BackendMismatchError on any
+            difference.
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unsupported DQ backend: {name}")
+    backend = DuckDBBackend() if name == "duckdb" else PandasBackend()
+    return CrossCheckBackend(PandasBackend(), backend) if cross_check else backend
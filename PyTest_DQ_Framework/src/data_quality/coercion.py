@@ -0,0 +1,64 @@
+"""
+Coercion of loaded datasets to the dtypes declared in the ``coerce`` entry of the dataset metadata.
+
+Columns are cast on the Arrow table the data is loaded as, before it is converted to pandas, so coercion
+adds no pandas copy: the conversion to pandas materializes the already-typed columns once.
+
+Casts are safe: a column whose values would be truncated, overflow or fail to parse is kept as loaded, with a
+CoercionWarning, so the checks comparing it report the differing values instead of coercion hiding them.
+"""
+
+import warnings
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+ARROW_TYPES = {
+    "datetime": pa.timestamp("ns"),
+    "float": pa.float64(),
+    "int": pa.int64(),
+}
+
+
+class CoercionWarning(UserWarning):
+    """Warns that a column could not be cast to its declared type without changing values."""
+
+
+def coerce_table(table: pa.Table, coercions: dict) -> pa.Table:
+    """
+    Casts the columns named in coercions to their Arrow type; columns missing in the table are skipped.
+    Columns the safe cast rejects are kept as loaded.
+    """
+    for column, dtype in (coercions or {}).items():
+        index = table.schema.get_field_index(column)
+        if index < 0:
+            continue
+        arrow_type = ARROW_TYPES[dtype]
+        loaded_type = table.schema.field(index).type
+        if loaded_type.equals(arrow_type):
+            continue
+        try:
+            table = table.set_column(index, column, pc.cast(table.column(index), arrow_type))
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as exc:
+            warnings.warn(f"Column {column} kept as {loaded_type}, not coerced to {dtype}: {exc}", CoercionWarning)
+    return table
+
+
+def to_pandas(table: pa.Table, coercions: dict) -> pd.DataFrame:
+    """Converts a coerced table to pandas; 'int' columns become nullable Int64 so nulls keep them integer."""
+    int_columns = {
+        column for column, dtype in (coercions or {}).items()
+        if dtype == "int" and column in table.column_names and pa.types.is_integer(table.schema.field(column).type)
+    }
+    df = table.to_pandas()
+    for column in int_columns & set(df.columns):
+        if df[column].dtype != "int64":
+            df[column] = df[column].astype("Int64")
+    return df
+
+
+def coerce_frame(df: pd.DataFrame, coercions: dict) -> pd.DataFrame:
+    """Coerces a DataFrame, e.g. a chunk of query results, through the same Arrow casts."""
+    table = coerce_table(pa.Table.from_pandas(df, preserve_index=False), coercions)
+    return to_pandas(table, coercions)
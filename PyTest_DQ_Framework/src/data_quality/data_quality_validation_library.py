@@ -1,18 +1,50 @@
+from dataclasses import dataclass
+
+import numpy as np
 import pandas as pd
 
+from src.data_quality.backends import PandasBackend
+from src.data_quality.tolerance import compare_columns
+from src.instrumentation.metrics import recorder
+
+# Decimal places numeric key values are rounded to before hashing, above the precision of NUMERIC key columns.
+KEY_DECIMALS = 9
+
+
+@dataclass
+class KeyReconciliation:
+    """Outcome of a key reconciliation: rows whose key is missing in the target or extra in the target."""
+    missing_count: int
+    extra_count: int
+    missing_sample: pd.DataFrame
+    extra_sample: pd.DataFrame
+
+    def summary(self) -> str:
+        return (f"{self.missing_count} missing key(s), e.g.\n{self.missing_sample.to_string(index=False)}\n"
+                f"{self.extra_count} extra key(s), e.g.\n{self.extra_sample.to_string(index=False)}")
+
 
 class DataQualityLibrary:
-    """Reusable DQ checks."""
+    """
+    Reusable DQ checks.
+
+    The duplicate, emptiness, null, range and allowed-value checks compute their aggregates on the selected
+    backend (see src.data_quality.backends) and also accept pyarrow Tables and Parquet paths.
+    """
+
+    backend = PandasBackend()
 
     @staticmethod
+    @recorder.measured("check")
     def check_duplicates(df: pd.DataFrame, column_names=None) -> bool:
-        duplicates = df.duplicated(subset=column_names) if column_names else df.duplicated()
-        if duplicates.any():
-            print(f"Duplicate rows found:\n{df[duplicates]}")
+        duplicates = DataQualityLibrary.backend.duplicate_rows(df, column_names)
+        if not duplicates.empty:
+            print(f"Duplicate rows found:\n{duplicates}")
             return False
         return True
 
     @staticmethod
+    @recorder.measured("check")
     def check_count(df1: pd.DataFrame, df2: pd.DataFrame) -> bool:
         if len(df1) != len(df2):
             print(f"Row count mismatch: df1 has {len(df1)} rows, df2 has {len(df2)} rows")
@@ -20,6 +52,7 @@ class DataQualityLibrary:
         return True
 
     @staticmethod
+    @recorder.measured("check")
     def check_data_full_data_set(df1: pd.DataFrame, df2: pd.DataFrame) -> bool:
         if not df1.sort_index(axis=1).equals(df2.sort_index(axis=1)):
             print("Data mismatch between the two DataFrames")
@@ -27,22 +60,42 @@ class DataQualityLibrary:
         return True
 
     @staticmethod
+    @recorder.measured("check")
+    def check_values_within_tolerance(expected_df: pd.DataFrame, actual_df: pd.DataFrame, columns=None,
+                                      tolerances=None) -> bool:
+        """
+        Compares positionally aligned DataFrames column by column, numeric columns within the per-column
+        tolerances (see src.data_quality.tolerance), and reports the largest deviation of every column.
+        """
+        if len(expected_df) != len(actual_df):
+            print(f"Row count mismatch: expected {len(expected_df)} rows, actual {len(actual_df)} rows")
+            return False
+        comparisons = compare_columns(expected_df, actual_df, columns or list(expected_df.columns), tolerances)
+        mismatched = [comparison for comparison in comparisons.values() if comparison.mismatch_count]
+        for comparison in mismatched:
+            print(f"Mismatch in column: {comparison.column} ({comparison.mismatch_count} rows, "
+                  f"max deviation {comparison.max_deviation})")
+        return not mismatched
+
+    @staticmethod
+    @recorder.measured("check")
     def check_dataset_is_not_empty(df: pd.DataFrame) -> bool:
-        if df.empty:
+        if DataQualityLibrary.backend.row_count(df) == 0:
             print("DataFrame is empty")
             return False
         return True
 
     @staticmethod
+    @recorder.measured("check")
     def check_not_null_values(df: pd.DataFrame, column_names=None) -> bool:
-        columns = column_names if column_names else df.columns
-        for col in columns:
-            if df[col].isnull().any():
-                print(f"Null values found in column: {col} ({df[col].isnull().sum()} nulls)")
+        for col, nulls in DataQualityLibrary.backend.null_counts(df, column_names).items():
+            if nulls:
+                print(f"Null values found in column: {col} ({nulls} nulls)")
                 return False
         return True
 
     @staticmethod
+    @recorder.measured("check")
     def check_column_mapping(source_df: pd.DataFrame, target_df: pd.DataFrame, mapping_rules: list) -> bool:
         for rule in mapping_rules:
             if rule["source_column"] not in source_df.columns or rule["target_column"] not in target_df.columns:
@@ -51,6 +104,7 @@ class DataQualityLibrary:
         return True
 
     @staticmethod
+    @recorder.measured("check")
     def check_transformed_values(source_df: pd.DataFrame, target_df: pd.DataFrame, mapping_rules: list) -> bool:
         for rule in mapping_rules:
             if rule.get("transformation", "none") == "none":
@@ -60,19 +114,111 @@ class DataQualityLibrary:
         return True
 
     @staticmethod
+    @recorder.measured("check")
     def check_value_range(df: pd.DataFrame, column: str, min_value=None, max_value=None) -> bool:
-        if min_value is not None and (df[column] < min_value).any():
+        below, above = DataQualityLibrary.backend.range_violations(df, column, min_value, max_value)
+        if below:
             print(f"Values in column {column} below minimum {min_value}")
             return False
-        if max_value is not None and (df[column] > max_value).any():
+        if above:
             print(f"Values in column {column} above maximum {max_value}")
             return False
         return True
 
     @staticmethod
+    @recorder.measured("check")
     def check_allowed_values(df: pd.DataFrame, column: str, allowed_values: list) -> bool:
-        invalid = set(df[column]) - set(allowed_values)
+        invalid = DataQualityLibrary.backend.invalid_values(df, column, allowed_values)
         if invalid:
             print(f"Invalid values in column {column}: {invalid}")
             return False
-        return True
\ No newline at end of file
+        return True
+
+    @staticmethod
+    @recorder.measured("check")
+    def check_partition_consistency(df: pd.DataFrame, partition_cfg: dict) -> bool:
+        """
+        Checks that every partition only holds rows whose source value derives its directory key.
+
+        Works on one min/max pair per partition instead of per row: 'month' partitions compare integer
+        month codes (year * 12 + month - 1) of the source dates with the code of the 'YYYY-MM' key,
+        'underscore' partitions compare the single source value with the key with spaces replaced.
+        """
+        column, source, partition_type = partition_cfg["column"], partition_cfg["source"], partition_cfg["type"]
+        if column not in df.columns:
+            print(f"Missing partition column '{column}'")
+            return False
+
+        if partition_type == "month":
+            dates = pd.to_datetime(df[source])
+            values = pd.Series(dates.dt.year.to_numpy() * 12 + dates.dt.month.to_numpy() - 1, index=df.index)
+        elif partition_type == "underscore":
+            values = df[source].astype(str)
+        else:
+            raise ValueError(f"Unsupported partition type: {partition_type}")
+
+        bounds = values.groupby(df[column].astype(str), observed=True).agg(["min", "max"])
+        keys = bounds.index.to_series()
+        if partition_type == "month":
+            expected = keys.str[:4].astype(int) * 12 + keys.str[5:7].astype(int) - 1
+            mismatched = bounds[(bounds["min"] != expected) | (bounds["max"] != expected)]
+        else:
+            mismatched = bounds[(bounds["min"] != bounds["max"]) | (bounds["min"].str.replace(" ", "_") != keys)]
+        if not mismatched.empty:
+            print(f"Partitions of {column} not matching {source}: {sorted(mismatched.index)}")
+            return False
+        return True
+
+    @staticmethod
+    def translate_surrogate_ids(ids: pd.Series, mapping_df: pd.DataFrame,
+                                surrogate_column="id", external_column="external_id") -> pd.Series:
+        """Maps surrogate IDs to external IDs through a lookup table; unknown IDs become NA."""
+        positions = pd.Index(mapping_df[surrogate_column]).get_indexer(ids)
+        external_ids = pd.array(mapping_df[external_column], dtype="Int64").take(positions, allow_fill=True)
+        return pd.Series(external_ids, index=ids.index, name=ids.name)
+
+    @staticmethod
+    def hash_keys(df: pd.DataFrame, key_columns: list) -> np.ndarray:
+        """
+        Packs composite keys into one 64-bit hash per row.
+
+        Columns are normalized first so that equal keys hash equally regardless of the dtype each side was
+        loaded with: numbers (integer, float, nullable or Decimal) to float64 rounded to KEY_DECIMALS places,
+        datetimes and dates (datetime64 or datetime.date / datetime objects) to datetime64[ns], anything else
+        to str. Integers are exact up to 2**53.
+        """
+        normalized = {}
+        for column in key_columns:
+            values = df[column]
+            inferred = pd.api.types.infer_dtype(values, skipna=True)
+            if pd.api.types.is_bool_dtype(values) or inferred == "boolean":
+                normalized[column] = values.astype(str)
+            elif pd.api.types.is_numeric_dtype(values) or inferred in ("integer", "floating", "decimal",
+                                                                       "mixed-integer-float"):
+                normalized[column] = pd.to_numeric(values).astype("float64").round(KEY_DECIMALS)
+            elif pd.api.types.is_datetime64_any_dtype(values) or inferred in ("datetime", "datetime64", "date"):
+                normalized[column] = pd.to_datetime(values).astype("datetime64[ns]")
+            else:
+                normalized[column] = values.astype(str)
+        return pd.util.hash_pandas_object(pd.DataFrame(normalized), index=False).to_numpy()
+
+    @staticmethod
+    @recorder.measured("check")
+    def reconcile_keys(source_df: pd.DataFrame, target_df: pd.DataFrame, key_columns: list,
+                       sample_size=5) -> KeyReconciliation:
+        """
+        Compares the composite keys of two DataFrames with hashed keys and sorted NumPy lookups.
+
+        Returns the number of source rows whose key is missing in the target and of target rows whose key
+        is not in the source, each with a sample of at most sample_size keys.
+        """
+        source_hashes = DataQualityLibrary.hash_keys(source_df, key_columns)
+        target_hashes = DataQualityLibrary.hash_keys(target_df, key_columns)
+        missing = ~np.isin(source_hashes, target_hashes)
+        extra = ~np.isin(target_hashes, source_hashes)
+        return KeyReconciliation(
+            missing_count=int(missing.sum()),
+            extra_count=int(extra.sum()),
+            missing_sample=source_df.loc[missing, key_columns].head(sample_size),
+            extra_sample=target_df.loc[extra, key_columns].head(sample_size),
+        )
@@ -0,0 +1,26 @@
+"""Static DQ metadata of the Parquet datasets: keys, required columns, partitioning, value rules and tolerances."""
+
+PARQUET_DATASETS = {
+    "facility_name_min_time_spent_per_visit_date": {
+        "key": ["facility_name", "visit_date"],
+        "not_null": ["facility_name", "visit_date", "min_time_spent"],
+        "partition": {"column": "partition_date", "type": "month", "source": "visit_date"},
+        "coerce": {"visit_date": "datetime", "min_time_spent": "int"},
+    },
+    "facility_type_avg_time_spent_per_visit_date": {
+        "key": ["facility_type", "visit_date"],
+        "not_null": ["facility_type", "visit_date", "avg_time_spent"],
+        "partition": {"column": "partition_date", "type": "month", "source": "visit_date"},
+        "coerce": {"visit_date": "datetime", "avg_time_spent": "float"},
+        "tolerances": {"avg_time_spent": {"decimals": 2}},
+        "allowed_values": {"facility_type": ["Hospital", "Clinic", "Specialty Center"]},
+    },
+    "patient_sum_treatment_cost_per_facility_type": {
+        "key": ["facility_type", "full_name"],
+        "not_null": ["facility_type", "full_name", "sum_treatment_cost"],
+        "partition": {"column": "facility_type_partition", "type": "underscore", "source": "facility_type"},
+        "coerce": {"sum_treatment_cost": "float"},
+        "tolerances": {"sum_treatment_cost": {"decimals": 2}},
+        "range_checks": [{"column": "sum_treatment_cost", "min": 0}],
+    },
+}
@@ -0,0 +1,58 @@
+import pandas as pd
+
+from src.data_quality.dataset_metadata import PARQUET_DATASETS
+
+
+def build_expected_parquet_outputs(nf3_visits, nf3_facilities, nf3_patients):
+    """Generate expected Parquet results + metadata from the 3NF layer."""
+    visits = nf3_visits.assign(visit_timestamp=pd.to_datetime(nf3_visits["visit_timestamp"]))
+    visits["visit_date"] = visits["visit_timestamp"].dt.floor("D")
+
+    facilities = (
+        nf3_facilities[["id", "facility_name", "facility_type"]]
+        .rename(columns={"id": "facility_id"})
+    )
+    patients = (
+        nf3_patients[["id", "first_name", "last_name"]]
+        .rename(columns={"id": "patient_id"})
+    )
+
+    visits_facilities = visits.merge(facilities, on="facility_id", how="left")
+
+    facility_name_min = (
+        visits_facilities.groupby(["facility_name", "visit_date"])["duration_minutes"]
+        .min()
+        .reset_index()
+        .rename(columns={"duration_minutes": "min_time_spent"})
+    )
+
+    facility_type_avg = (
+        visits_facilities.groupby(["facility_type", "visit_date"])["duration_minutes"]
+        .mean()
+        .round(2)
+        .reset_index()
+        .rename(columns={"duration_minutes": "avg_time_spent"})
+    )
+
+    visits_facilities_patients = visits_facilities.merge(patients, on="patient_id", how="left")
+    visits_facilities_patients["full_name"] = (
+        visits_facilities_patients["first_name"].fillna("") + " " +
+        visits_facilities_patients["last_name"].fillna("")
+    ).str.strip()
+
+    patient_sum_cost = (
+        visits_facilities_patients.groupby(["facility_type", "full_name"])["treatment_cost"]
+        .sum()
+        .reset_index()
+        .rename(columns={"treatment_cost": "sum_treatment_cost"})
+    )
+
+    expected = {
+        "facility_name_min_time_spent_per_visit_date": facility_name_min,
+        "facility_type_avg_time_spent_per_visit_date": facility_type_avg,
+        "patient_sum_treatment_cost_per_facility_type": patient_sum_cost,
+    }
+    return {
+        dataset: {"expected": expected_df, **PARQUET_DATASETS[dataset]}
+        for dataset, expected_df in expected.items()
+    }
@@ -0,0 +1,126 @@
+"""
+Partition-parallel validation of Hive-partitioned Parquet datasets.
+
+Every ``column=value`` partition directory is read and checked on its own in a process pool, so memory is
+bounded by the largest partition and checks use all cores. Key duplicates inside a partition are found by
+the partition's own check; duplicates across partitions are found by merging 64-bit hashes of the keys.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List
+from urllib.parse import unquote
+
+import numpy as np
+import pandas as pd
+
+from src.connectors.file_system.dataset_manifest import manifest_entries, manifest_version
+from src.connectors.file_system.parquet_reader import ParquetReader
+from src.data_quality.data_quality_validation_library import DataQualityLibrary
+
+
+@dataclass
+class PartitionResult:
+    """Outcome of the checks of one partition."""
+    partition: str
+    rows: int = 0
+    failures: List[str] = field(default_factory=list)
+    key_hashes: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.uint64))
+
+
+@dataclass
+class PartitionedValidationResult:
+    """Outcome of the checks of all partitions of a dataset."""
+    partitions: List[PartitionResult]
+    cross_partition_duplicates: Dict[str, int] = field(default_factory=dict)
+
+    def failures(self) -> Dict[str, List[str]]:
+        """Failure messages keyed by partition, including duplicates shared with other partitions."""
+        failures = {result.partition: list(result.failures) for result in self.partitions if result.failures}
+        for partition, count in self.cross_partition_duplicates.items():
+            failures.setdefault(partition, []).append(f"{count} key(s) also present in another partition")
+        return failures
+
+    def report(self) -> str:
+        return "\n".join(
+            f"{partition}: {'; '.join(messages)}" for partition, messages in sorted(self.failures().items())
+        )
+
+
+def list_partitions(path: str) -> List[str]:
+    """Names of the ``column=value`` partition directories of a dataset, sorted; from the manifest if versioned."""
+    entries = manifest_entries(path)
+    if entries is not None:
+        return sorted({entry["path"].split("/", 1)[0] for entry in entries if "/" in entry["path"]})
+    return sorted(entry.name for entry in os.scandir(path) if entry.is_dir() and "=" in entry.name)
+
+
+def hash_keys(df: pd.DataFrame, key: List[str]) -> np.ndarray:
+    """Distinct 64-bit hashes of the key columns of a DataFrame."""
+    return np.unique(DataQualityLibrary.hash_keys(df, key))
+
+
+def validate_partition(path: str, partition: str, metadata: dict, version: int = None) -> PartitionResult:
+    """Reads one partition directory, of the given version if the dataset is versioned, and checks it."""
+    column, value = partition.split("=", 1)
+    df = ParquetReader.read_parquet(os.path.join(path, partition), metadata.get("coerce"), version=version)
+    df[column] = unquote(value)
+    result = PartitionResult(partition=partition, rows=len(df))
+
+    checks = [("check_dataset_is_not_empty", (df,))]
+    if metadata.get("not_null"):
+        checks.append(("check_not_null_values", (df, metadata["not_null"])))
+    if metadata.get("key"):
+        checks.append(("check_duplicates", (df, metadata["key"])))
+    if metadata.get("partition"):
+        checks.append(("check_partition_consistency", (df, metadata["partition"])))
+    for allowed_column, allowed_values in metadata.get("allowed_values", {}).items():
+        checks.append(("check_allowed_values", (df, allowed_column, allowed_values)))
+    for range_check in metadata.get("range_checks", []):
+        checks.append(("check_value_range", (df, range_check["column"], range_check.get("min"),
+                                             range_check.get("max"))))
+
+    for check_name, args in checks:
+        if not getattr(DataQualityLibrary, check_name)(*args):
+            arguments = ", ".join(str(arg) for arg in args[1:])
+            result.failures.append(f"{check_name}({arguments}) failed")
+    if metadata.get("key"):
+        result.key_hashes = hash_keys(df, metadata["key"])
+    return result
+
+
+def cross_partition_duplicates(results: List[PartitionResult]) -> Dict[str, int]:
+    """Number of keys of every partition which also occur in another partition."""
+    if not results:
+        return {}
+    hashes = np.concatenate([result.key_hashes for result in results])
+    owners = np.repeat(np.arange(len(results)), [len(result.key_hashes) for result in results])
+    _, inverse, counts = np.unique(hashes, return_inverse=True, return_counts=True)
+    shared = counts[inverse] > 1
+    duplicates = np.bincount(owners[shared], minlength=len(results))
+    return {results[index].partition: int(count) for index, count in enumerate(duplicates) if count}
+
+
+def validate_partitions(path: str, metadata: dict, max_workers: int = None) -> PartitionedValidationResult:
+    """
+    Runs the dataset's checks partition by partition in a process pool and merges the results.
+
+    Args:
+        path: Location of the Hive-partitioned dataset.
+        metadata: The dataset's entry of PARQUET_DATASETS.
+        max_workers: Size of the process pool, defaults to the number of CPUs.
+
+    Returns:
+        PartitionedValidationResult: The per-partition results and the cross-partition duplicates.
+    """
+    partitions = list_partitions(path)
+    # workers read the version pinned here, not whatever is current when they start
+    version = manifest_version(path)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(validate_partition, [path] * len(partitions), partitions,
+                                    [metadata] * len(partitions), [version] * len(partitions)))
+    return PartitionedValidationResult(
+        partitions=results,
+        cross_partition_duplicates=cross_partition_duplicates(results)
+    )
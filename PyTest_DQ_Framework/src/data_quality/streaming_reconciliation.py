@@ -0,0 +1,184 @@
+"""
+Streaming reconciliation of the Parquet datasets with aggregates computed in Postgres.
+
+The expected aggregate of a dataset is computed by Postgres from the pipeline's aggregate tables (checked
+against the visits by test_nf3_aggregates_consistency) and fetched through a server-side cursor, ordered
+by the dataset's partition value and key. The Parquet dataset is read one partition at a time, in the same
+order, and sorted within the partition. Both streams are merge-joined on (partition value, key), so memory is
+bounded by the fetch size and the largest partition, and the comparison is a single linear pass. Values of
+matched rows are compared in blocks of chunk_size rows with the tolerance kernels of the dataset.
+"""
+
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List
+from urllib.parse import unquote
+
+import numpy as np
+import pandas as pd
+
+from src.connectors.file_system.parquet_reader import ParquetReader
+from src.data_quality.coercion import coerce_frame
+from src.data_quality.partition_validation import list_partitions
+from src.data_quality.tolerance import compare_columns
+from src.instrumentation.metrics import recorder
+
+PARTITION_KEY = "partition_key"
+
+# Expected aggregate of every dataset, as the DQ suite defines it, ordered like the partitioned Parquet
+# dataset: by the partition value and then by the key, with text compared bytewise like Python strings.
+EXPECTED_QUERIES = {
+    "facility_name_min_time_spent_per_visit_date": """
+        SELECT to_char(visit_date, 'YYYY-MM') AS partition_key, facility_name, visit_date, min_time_spent
+        FROM (
+            SELECT f.facility_name, a.visit_date, MIN(a.min_duration_minutes) AS min_time_spent
+            FROM agg_facility_daily_visits a
+            JOIN facilities f ON f.id = a.facility_id
+            GROUP BY f.facility_name, a.visit_date
+        ) expected
+        ORDER BY partition_key COLLATE "C", facility_name COLLATE "C", visit_date
+    """,
+    "facility_type_avg_time_spent_per_visit_date": """
+        SELECT to_char(visit_date, 'YYYY-MM') AS partition_key, facility_type, visit_date, avg_time_spent
+        FROM (
+            SELECT f.facility_type, a.visit_date,
+                   ROUND(SUM(a.sum_duration_minutes)::numeric / SUM(a.visit_count), 2) AS avg_time_spent
+            FROM agg_facility_daily_visits a
+            JOIN facilities f ON f.id = a.facility_id
+            GROUP BY f.facility_type, a.visit_date
+        ) expected
+        ORDER BY partition_key COLLATE "C", facility_type COLLATE "C", visit_date
+    """,
+    "patient_sum_treatment_cost_per_facility_type": """
+        SELECT REPLACE(facility_type, ' ', '_') AS partition_key, facility_type, full_name, sum_treatment_cost
+        FROM (
+            SELECT f.facility_type, TRIM(p.first_name || ' ' || p.last_name) AS full_name,
+                   SUM(a.sum_treatment_cost) AS sum_treatment_cost
+            FROM agg_patient_facility_visits a
+            JOIN facilities f ON f.id = a.facility_id
+            JOIN patients p ON p.id = a.patient_id
+            GROUP BY f.facility_type, TRIM(p.first_name || ' ' || p.last_name)
+        ) expected
+        ORDER BY partition_key COLLATE "C", facility_type COLLATE "C", full_name COLLATE "C"
+    """,
+}
+
+
+@dataclass
+class StreamingReconciliation:
+    """Outcome of a streaming reconciliation, with at most sample_size example rows per kind of difference."""
+    matched: int = 0
+    missing: int = 0
+    extra: int = 0
+    mismatched: int = 0
+    missing_sample: List[tuple] = field(default_factory=list)
+    extra_sample: List[tuple] = field(default_factory=list)
+    mismatched_sample: List[tuple] = field(default_factory=list)
+    max_deviation: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def passed(self) -> bool:
+        return not (self.missing or self.extra or self.mismatched)
+
+    def summary(self) -> str:
+        return (f"{self.matched} matched, {self.missing} missing: {self.missing_sample}, "
+                f"{self.extra} extra: {self.extra_sample}, "
+                f"{self.mismatched} mismatched (expected, actual): {self.mismatched_sample}, "
+                f"max deviation per column: {self.max_deviation}")
+
+
+def sort_key(values: tuple) -> tuple:
+    """Orders nulls last, like ORDER BY ... ASC in Postgres and sort_values in pandas."""
+    return tuple((True, None) if pd.isna(value) else (False, value) for value in values)
+
+
+def expected_rows(db_connection, query: str, columns: list, coercions: dict, chunk_size: int) -> Iterator[tuple]:
+    for chunk in db_connection.iter_data_sql(query, chunk_size):
+        chunk = coerce_frame(chunk, coercions)
+        yield from chunk[[PARTITION_KEY] + columns].itertuples(index=False, name=None)
+
+
+def actual_rows(parquet_path: str, columns: list, key: list, coercions: dict) -> Iterator[tuple]:
+    """Rows of the Parquet dataset, partition by partition in partition value order, sorted by key inside."""
+    partitions = sorted((unquote(name.split("=", 1)[1]), name) for name in list_partitions(parquet_path))
+    for value, partition in partitions:
+        df = ParquetReader.read_parquet(os.path.join(parquet_path, partition), coercions, columns)
+        df = df.sort_values(key, na_position="last", kind="stable")
+        df.insert(0, PARTITION_KEY, value)
+        yield from df.itertuples(index=False, name=None)
+
+
+@recorder.measured("check")
+def reconcile_dataset(db_connection, dataset: str, parquet_path: str, metadata: dict, chunk_size: int = 50000,
+                      sample_size: int = 5) -> StreamingReconciliation:
+    """
+    Merge-joins the expected aggregate streamed from Postgres with the Parquet dataset.
+
+    Args:
+        db_connection: PostgresConnectorContextManager of the 3NF layer.
+        dataset: Name of the dataset, a key of EXPECTED_QUERIES.
+        parquet_path: Location of the Hive-partitioned dataset.
+        metadata: The dataset's entry of PARQUET_DATASETS; its tolerances apply to the value columns.
+        chunk_size: Rows fetched from the server-side cursor and compared at a time.
+        sample_size: Number of example rows kept per kind of difference.
+
+    Returns:
+        StreamingReconciliation: Counts and samples of matched, missing, extra and mismatched rows.
+    """
+    query = EXPECTED_QUERIES[dataset]
+    key = metadata["key"]
+    columns = key + [column for column in metadata["coerce"] if column not in key]
+    key_width = len(key) + 1
+    value_columns = columns[len(key):]
+    expected = expected_rows(db_connection, query, columns, metadata["coerce"], chunk_size)
+    actual = actual_rows(parquet_path, columns, key, metadata["coerce"])
+    result = StreamingReconciliation()
+    matched_expected, matched_actual = [], []
+
+    def record(kind, row):
+        setattr(result, kind, getattr(result, kind) + 1)
+        sample = getattr(result, f"{kind}_sample")
+        if len(sample) < sample_size:
+            sample.append(row)
+
+    def compare_matched():
+        frame_columns = [PARTITION_KEY] + columns
+        comparisons = compare_columns(pd.DataFrame.from_records(matched_expected, columns=frame_columns),
+                                      pd.DataFrame.from_records(matched_actual, columns=frame_columns),
+                                      value_columns, metadata.get("tolerances"))
+        mismatched = np.zeros(len(matched_expected), dtype=bool)
+        for comparison in comparisons.values():
+            mismatched |= comparison.mismatched
+            if comparison.max_deviation is not None:
+                result.max_deviation[comparison.column] = max(result.max_deviation.get(comparison.column, 0.0),
+                                                              comparison.max_deviation)
+        for index in mismatched.nonzero()[0]:
+            record("mismatched", (matched_expected[index][1:], matched_actual[index][1:]))
+        result.matched += int((~mismatched).sum())
+        matched_expected.clear()
+        matched_actual.clear()
+
+    expected_row, actual_row = next(expected, None), next(actual, None)
+    while expected_row is not None or actual_row is not None:
+        if actual_row is None:
+            order = -1
+        elif expected_row is None:
+            order = 1
+        else:
+            expected_key, actual_key = sort_key(expected_row[:key_width]), sort_key(actual_row[:key_width])
+            order = -1 if expected_key < actual_key else 1 if actual_key < expected_key else 0
+        if order < 0:
+            record("missing", expected_row[1:])
+            expected_row = next(expected, None)
+        elif order > 0:
+            record("extra", actual_row[1:])
+            actual_row = next(actual, None)
+        else:
+            matched_expected.append(expected_row)
+            matched_actual.append(actual_row)
+            if len(matched_expected) >= chunk_size:
+                compare_matched()
+            expected_row, actual_row = next(expected, None), next(actual, None)
+    if matched_expected:
+        compare_matched()
+    return result
@@ -0,0 +1,90 @@
+"""
+Vectorized, tolerance-aware comparison of expected and actual column values.
+
+A tolerance is configured per column in the ``tolerances`` entry of the dataset metadata and may combine:
+
+- ``abs``: largest absolute difference,
+- ``rel``: largest difference relative to the larger magnitude of the two values,
+- ``ulps``: largest difference in units in the last place of float64,
+- ``decimals``: the values are decimals rounded to that many places, so they may differ by one unit in the
+  last place (SQL ROUND rounds half away from zero, pandas half to even).
+
+A difference within any of the configured bounds is accepted. Columns without a tolerance are compared
+exactly. Numeric columns are compared on views of their float64 values where possible; NUMERIC values
+fetched as Decimal objects are converted once.
+"""
+
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class ColumnComparison:
+    """Outcome of the comparison of one column: mismatching rows and the largest numeric deviation."""
+    column: str
+    mismatched: np.ndarray
+    max_deviation: Optional[float] = None
+
+    @property
+    def mismatch_count(self) -> int:
+        return int(self.mismatched.sum())
+
+
+def numeric_values(values: pd.Series) -> Optional[np.ndarray]:
+    """float64 values of a numeric or Decimal column, None for any other column."""
+    if pd.api.types.is_bool_dtype(values):
+        return None
+    if values.dtype == np.float64:
+        return values.to_numpy()
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=np.float64, na_value=np.nan)
+    if values.dtype == object:
+        first = values.dropna().head(1)
+        if not first.empty and isinstance(first.iloc[0], (Decimal, int, float)):
+            return pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    return None
+
+
+def allowed_deviation(expected: np.ndarray, actual: np.ndarray, tolerance: dict):
+    """Largest accepted absolute difference of every pair of values."""
+    allowed = np.zeros(len(expected))
+    magnitude = np.fmax(np.abs(expected), np.abs(actual))
+    if tolerance.get("abs"):
+        allowed = np.fmax(allowed, tolerance["abs"])
+    if tolerance.get("rel"):
+        allowed = np.fmax(allowed, tolerance["rel"] * magnitude)
+    if tolerance.get("ulps"):
+        allowed = np.fmax(allowed, tolerance["ulps"] * np.spacing(magnitude))
+    if tolerance.get("decimals") is not None:
+        # one unit in the last decimal place, plus the float64 representation error of both values
+        allowed = np.fmax(allowed, 10.0 ** -tolerance["decimals"] + 2 * np.spacing(magnitude))
+    return allowed
+
+
+def compare_column(column: str, expected: pd.Series, actual: pd.Series, tolerance: dict = None) -> ColumnComparison:
+    """Compares two positionally aligned columns; nulls only match nulls."""
+    expected_values, actual_values = numeric_values(expected), numeric_values(actual)
+    if expected_values is None or actual_values is None:
+        equal = expected.to_numpy() == actual.to_numpy()
+        both_null = expected.isna().to_numpy() & actual.isna().to_numpy()
+        return ColumnComparison(column, ~(equal | both_null))
+
+    deviation = np.abs(expected_values - actual_values)
+    both_null = np.isnan(expected_values) & np.isnan(actual_values)
+    within = deviation <= allowed_deviation(expected_values, actual_values, tolerance or {})
+    compared = deviation[~np.isnan(deviation)]
+    return ColumnComparison(column, ~(within | both_null), float(compared.max()) if len(compared) else 0.0)
+
+
+def compare_columns(expected_df: pd.DataFrame, actual_df: pd.DataFrame, columns: list,
+                    tolerances: dict = None) -> Dict[str, ColumnComparison]:
+    """Compares the columns of two DataFrames whose rows are aligned by position."""
+    tolerances = tolerances or {}
+    return {
+        column: compare_column(column, expected_df[column], actual_df[column], tolerances.get(column))
+        for column in columns
+    }
@@ -0,0 +1,100 @@
+"""
+Pytest plugin enforcing per-test resource budgets.
+
+Tests declare a budget with ``@pytest.mark.budget(seconds=2, mb=500)``. After the test body has run,
+its wall time and peak traced memory, as recorded by the metrics plugin, are compared with the budget.
+Depending on ``--budget_mode`` an overrun fails the test or only emits a warning. Overruns are listed
+in the terminal summary and in the pytest-html report.
+"""
+
+import html
+import warnings
+
+import pytest
+
+from src.instrumentation.metrics import recorder
+
+BUDGET_MODES = ("fail", "warn")
+
+
+class BudgetExceededWarning(UserWarning):
+    """Emitted for a test exceeding its budget when --budget_mode is 'warn'."""
+
+
+def pytest_addoption(parser):
+    parser.addoption("--budget_mode", action="store", default="fail", choices=BUDGET_MODES,
+                     help="What to do when a test exceeds its @pytest.mark.budget: fail the test or only warn")
+
+
+def pytest_configure(config):
+    config.budget_overruns = []
+
+
+def pytest_collection_modifyitems(items):
+    # memory budgets are checked against traced memory, so tracing is started as soon as one is declared
+    if any(marker.kwargs.get("mb") is not None for item in items for marker in item.iter_markers("budget")):
+        recorder.start_memory_tracing()
+
+
+def find_test_measurement(nodeid):
+    """The latest measurement of a test call, recorded by the metrics plugin."""
+    for measurement in reversed(recorder.measurements):
+        if measurement.kind == "test" and measurement.name == nodeid:
+            return measurement
+    return None
+
+
+def budget_overruns(item, measurement):
+    """Messages describing how the measured test call exceeds the budget declared on the test."""
+    marker = item.get_closest_marker("budget")
+    seconds = marker.kwargs.get("seconds")
+    mb = marker.kwargs.get("mb")
+    overruns = []
+    if seconds is not None and measurement.wall_seconds > seconds:
+        overruns.append(f"took {measurement.wall_seconds:.2f}s, budget {seconds}s")
+    if mb is not None and measurement.peak_traced_mb is not None and measurement.peak_traced_mb > mb:
+        overruns.append(f"peaked at {measurement.peak_traced_mb:.1f} MB, budget {mb} MB")
+    return overruns
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    report = outcome.get_result()
+    if call.when != "call" or item.get_closest_marker("budget") is None:
+        return
+    measurement = find_test_measurement(item.nodeid)
+    if measurement is None:
+        return
+    overruns = budget_overruns(item, measurement)
+    if not overruns:
+        return
+
+    message = f"{item.nodeid} exceeded its budget: {'; '.join(overruns)}"
+    item.config.budget_overruns.append((item.nodeid, "; ".join(overruns)))
+    report.sections.append(("budget", message))
+    if item.config.getoption("--budget_mode") == "warn":
+        warnings.warn(BudgetExceededWarning(message))
+    elif report.passed:
+        report.outcome = "failed"
+        report.longrepr = message
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    if not config.budget_overruns:
+        return
+    terminalreporter.write_sep("-", "DQ budget overruns")
+    for nodeid, overrun in config.budget_overruns:
+        terminalreporter.write_line(f"{nodeid}: {overrun}")
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_html_results_summary(prefix, summary, postfix, session):
+    overruns = session.config.budget_overruns
+    if not overruns:
+        return
+    body = "".join(
+        f"<tr><td>{html.escape(nodeid)}</td><td>{html.escape(overrun)}</td></tr>"
+        for nodeid, overrun in overruns
+    )
+    postfix.append(f"<h2>DQ budget overruns</h2><table><tr><th>Test</th><th>Overrun</th></tr>{body}</table>")
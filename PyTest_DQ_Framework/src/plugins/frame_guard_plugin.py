@@ -0,0 +1,164 @@
+"""
+Pytest plugin keeping the DataFrames of shared fixtures read-only.
+
+Module- and session-scoped fixtures hand the same frames to many tests, so no test may change them. The
+plugin enables pandas Copy-on-Write, so frames derived from a shared frame never write through to it, and
+marks the arrays of every shared frame read-only, so in-place value writes raise. Any other change is detected
+after every test and fails it: structural changes (added, dropped or retyped columns, changed row counts) and
+replaced data, i.e. a column assigned anew or rows reordered in place, which replace the arrays or the index
+holding the frame's data.
+
+With ``--frame_mutation_report`` the frames are left writable instead: the content of every shared frame a
+test uses is hashed before and after the test, and mutating tests are reported in the terminal summary and
+the pytest-html report without failing. This shows which defensive copies are still needed.
+"""
+
+import html
+
+import numpy as np
+import pandas as pd
+import pytest
+
+SHARED_SCOPES = ("module", "package", "session")
+
+
+def pytest_addoption(parser):
+    parser.addoption("--frame_mutation_report", action="store_true", default=False,
+                     help="Leave shared fixture frames writable and report the tests mutating them "
+                          "instead of failing them")
+
+
+def pytest_configure(config):
+    pd.set_option("mode.copy_on_write", True)
+    config.frame_mutations = []
+
+
+def shared_frames(value, name):
+    """(label, DataFrame) pairs of a fixture value: a DataFrame or a dict of DataFrames, nested once."""
+    if isinstance(value, pd.DataFrame):
+        return [(name, value)]
+    if isinstance(value, dict):
+        frames = []
+        for key, item in value.items():
+            if isinstance(item, pd.DataFrame):
+                frames.append((f"{name}[{key!r}]", item))
+            elif isinstance(item, dict):
+                frames.extend((f"{name}[{key!r}][{inner!r}]", frame)
+                              for inner, frame in item.items() if isinstance(frame, pd.DataFrame))
+        return frames
+    return []
+
+
+def backing_arrays(df):
+    """NumPy arrays holding the values of a DataFrame's columns."""
+    for array in df._mgr.arrays:
+        if isinstance(array, np.ndarray):
+            yield array
+        elif hasattr(array, "_ndarray"):  # datetime, timedelta and categorical arrays
+            yield array._ndarray
+        elif hasattr(array, "_mask"):  # nullable integer, float and boolean arrays
+            yield array._data
+            yield array._mask
+
+
+def freeze(df):
+    # consolidated up front, so a later consolidation cannot replace the arrays of an unchanged frame
+    df._consolidate_inplace()
+    for array in backing_arrays(df):
+        array.flags.writeable = False
+
+
+def structure(df):
+    return tuple(df.columns), tuple(str(dtype) for dtype in df.dtypes), df.shape
+
+
+def data_objects(df):
+    """The objects holding a frame's data; assigning a column or reordering rows replaces some of them."""
+    return (df._mgr, df.index, df.columns, *df._mgr.arrays)
+
+
+def content_hash(df):
+    try:
+        return int(pd.util.hash_pandas_object(df, index=True).to_numpy().sum(dtype=np.uint64))
+    except TypeError:  # unhashable cell values, fall back to the structure
+        return None
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_fixture_setup(fixturedef, request):
+    outcome = yield
+    if fixturedef.scope not in SHARED_SCOPES or request.config.getoption("--frame_mutation_report"):
+        return
+    try:
+        value = outcome.get_result()
+    except BaseException:
+        return
+    for _, df in shared_frames(value, fixturedef.argname):
+        freeze(df)
+
+
+def used_shared_frames(item):
+    frames = []
+    for name, value in item.funcargs.items():
+        fixturedefs = item._fixtureinfo.name2fixturedefs.get(name)
+        if fixturedefs and fixturedefs[-1].scope in SHARED_SCOPES:
+            frames.extend(shared_frames(value, name))
+    return frames
+
+
+def snapshot(df, report_mode):
+    """State of a shared frame compared after a test: its content hash in report mode, else its data objects."""
+    return structure(df), content_hash(df) if report_mode else data_objects(df)
+
+
+def mutated(df, before, report_mode):
+    after = snapshot(df, report_mode)
+    if report_mode or after[0] != before[0]:
+        return after != before
+    return len(after[1]) != len(before[1]) or any(new is not old for new, old in zip(after[1], before[1]))
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    report_mode = item.config.getoption("--frame_mutation_report")
+    frames = used_shared_frames(item)
+    before = [snapshot(df, report_mode) for _, df in frames]
+    yield
+    item.frame_mutations = [label for (label, df), expected in zip(frames, before)
+                            if mutated(df, expected, report_mode)]
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    report = outcome.get_result()
+    mutations = getattr(item, "frame_mutations", None)
+    if call.when != "call" or not mutations:
+        return
+    message = f"{item.nodeid} mutated shared fixture frames: {', '.join(mutations)}"
+    item.config.frame_mutations.append((item.nodeid, ", ".join(mutations)))
+    report.sections.append(("frame guard", message))
+    if not item.config.getoption("--frame_mutation_report") and report.passed:
+        report.outcome = "failed"
+        report.longrepr = message
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    if not config.frame_mutations:
+        return
+    terminalreporter.write_sep("-", "Shared fixture frames mutated")
+    for nodeid, frames in config.frame_mutations:
+        terminalreporter.write_line(f"{nodeid}: {frames}")
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_html_results_summary(prefix, summary, postfix, session):
+    mutations = session.config.frame_mutations
+    if not mutations:
+        return
+    body = "".join(
+        f"<tr><td>{html.escape(nodeid)}</td><td>{html.escape(frames)}</td></tr>"
+        for nodeid, frames in mutations
+    )
+    postfix.append(f"<h2>Shared fixture frames mutated</h2><table><tr><th>Test</th><th>Frames</th></tr>"
+                   f"{body}</table>")
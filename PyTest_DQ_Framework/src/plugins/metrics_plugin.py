@@ -0,0 +1,106 @@
+"""
+Pytest plugin recording the cost of fixtures, tests and DQ checks.
+
+Fixture materializations and test calls are measured here; connector calls and DataQualityLibrary
+checks are measured where they are defined. All measurements go to the shared recorder, are written
+to a JSON and an OpenMetrics file at the end of the session and summarized in the terminal. The
+pytest-html report gets a section listing the slowest DQ checks and fixtures.
+"""
+
+import html
+import os
+
+import pytest
+
+from src.instrumentation.metrics import recorder, count_rows
+
+SUMMARY_ROWS = 15
+
+
+def pytest_addoption(parser):
+    parser.addoption("--metrics_path", action="store", default="html_report/metrics.json",
+                     help="JSON file for fixture/test/check measurements "
+                          "(an OpenMetrics .prom file is written next to it)")
+    parser.addoption("--metrics_trace_memory", action="store_true", default=False,
+                     help="Trace Python allocations to record peak memory per measurement (slower)")
+
+
+def pytest_configure(config):
+    if config.getoption("--metrics_trace_memory"):
+        recorder.start_memory_tracing()
+
+
+def is_project_fixture(fixturedef, config):
+    """Only fixtures defined in this project are measured, not those of pytest and installed plugins."""
+    return os.path.abspath(fixturedef.func.__code__.co_filename).startswith(str(config.rootpath))
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_fixture_setup(fixturedef, request):
+    if not is_project_fixture(fixturedef, request.config):
+        yield
+        return
+    with recorder.measure(fixturedef.argname, "fixture", scope=fixturedef.scope) as measurement:
+        outcome = yield
+        if outcome.excinfo is None:
+            measurement.rows_out = count_rows(outcome.get_result())
+        else:
+            measurement.status = "error"
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    with recorder.measure(item.nodeid, "test") as measurement:
+        outcome = yield
+        if outcome.excinfo is not None:
+            measurement.status = "error"
+
+
+def pytest_sessionfinish(session):
+    if not recorder.measurements:
+        return
+    metrics_path = session.config.getoption("--metrics_path")
+    recorder.write_json(metrics_path)
+    recorder.write_openmetrics(os.path.splitext(metrics_path)[0] + ".prom")
+
+
+def summary_rows(kinds=None):
+    """Slowest measured operations, optionally of the given kinds only, as (kind, name, calls, seconds,
+    peak MB, rows out) tuples."""
+    entries = [entry for entry in recorder.summary() if kinds is None or entry["kind"] in kinds]
+    rows = []
+    for entry in entries[:SUMMARY_ROWS]:
+        peak = entry["peak_traced_mb_max"] if entry["peak_traced_mb_max"] is not None else entry["peak_rss_mb_max"]
+        rows.append((
+            entry["kind"],
+            entry["name"],
+            entry["calls"],
+            f"{entry['wall_seconds_total']:.3f}",
+            "" if peak is None else f"{peak:.1f}",
+            "" if entry["rows_out_total"] is None else entry["rows_out_total"],
+        ))
+    return rows
+
+
+def pytest_terminal_summary(terminalreporter):
+    rows = summary_rows()
+    if not rows:
+        return
+    terminalreporter.write_sep("-", "DQ metrics: slowest operations")
+    terminalreporter.write_line(f"{'kind':<10} {'seconds':>9} {'peak MB':>9} {'rows out':>10} {'calls':>6}  name")
+    for kind, name, calls, seconds, peak, rows_out in rows:
+        terminalreporter.write_line(f"{kind:<10} {seconds:>9} {peak:>9} {rows_out:>10} {calls:>6}  {name}")
+    terminalreporter.write_line(f"Metrics written to {terminalreporter.config.getoption('--metrics_path')}")
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_html_results_summary(prefix, summary, postfix):
+    rows = summary_rows(kinds=("check", "fixture"))
+    if not rows:
+        return
+    header = "".join(f"<th>{title}</th>" for title in ("Kind", "Name", "Calls", "Seconds", "Peak MB", "Rows out"))
+    body = "".join(
+        "<tr>" + "".join(f"<td>{html.escape(str(value))}</td>" for value in row) + "</tr>"
+        for row in rows
+    )
+    postfix.append(f"<h2>Slowest DQ checks and fixtures</h2><table><tr>{header}</tr>{body}</table>")
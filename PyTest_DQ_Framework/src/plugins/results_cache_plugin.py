@@ -0,0 +1,277 @@
+"""
+Pytest plugin reusing the results of DQ tests whose input datasets are unchanged.
+
+With ``--results_cache`` every test reading a dataset gets a key built from the fingerprints of the
+datasets it reads (Postgres table row counts, sizes and write statistics; Parquet manifest versions, or
+file names, sizes, modification times and footers) and the hash of its source code. Passing tests are
+stored in the pytest cache under that key. On the next run a test with the same key is not executed but
+reported as a cached pass; tests reading a changed dataset, failed tests and tests reading no known
+dataset run.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+from contextlib import ExitStack
+
+import pyarrow.parquet as pq
+import pytest
+from _pytest.reports import TestReport
+
+from src.connectors.file_system.dataset_manifest import manifest_version
+from src.connectors.postgres.postgres_connector import PostgresConnectorContextManager
+
+CACHE_KEY = "dq/results_cache"
+
+# Fixture name -> Postgres table read by the fixture.
+TABLE_FIXTURES = {
+    "src_facilities": "src_generated_facilities",
+    "src_patients": "src_generated_patients",
+    "src_visits": "src_generated_visits",
+    "nf3_facilities": "facilities",
+    "nf3_patients": "patients",
+    "nf3_visits": "visits",
+}
+
+# Fixture name -> option holding the file or directory read by the fixture.
+PATH_FIXTURES = {
+    "parquet_facility_name_min_time_spent": "--parquet_path_facility_name_min_time_spent",
+    "parquet_facility_type_avg_time_spent": "--parquet_path_facility_type_avg_time_spent",
+    "parquet_patient_sum_treatment_cost": "--parquet_path_patient_sum_treatment_cost",
+    "rollups_facility_type_avg_time_spent": "--rollups_path_facility_type_avg_time_spent",
+    "dq_mapping": "--mapping_path",
+}
+
+# Fixture name -> option holding the dataset directory per DATASET_KEY of the test module, for fixtures
+# resolving the dataset of the module when the test calls them.
+DATASET_FIXTURES = {
+    "parquet_check_source": {
+        "facility_name_min_time_spent_per_visit_date": "--parquet_path_facility_name_min_time_spent",
+        "facility_type_avg_time_spent_per_visit_date": "--parquet_path_facility_type_avg_time_spent",
+        "patient_sum_treatment_cost_per_facility_type": "--parquet_path_patient_sum_treatment_cost",
+    },
+}
+
+# Source files every test depends on, relative to the rootdir.
+SHARED_SOURCES = ["conftest.py", "src/data_quality", "src/connectors"]
+
+
+def pytest_addoption(parser):
+    parser.addoption("--results_cache", action="store_true", default=False,
+                     help="Report tests whose datasets and source are unchanged since their last pass "
+                          "as cached passes instead of running them")
+
+
+def fingerprint_values(*values):
+    """SHA-256 hex digest of JSON-serializable values."""
+    payload = json.dumps(values, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def fingerprint_file(path):
+    """Fingerprint of one file: Parquet files by their footer, other files by their content."""
+    stat = os.stat(path)
+    if path.endswith(".parquet"):
+        metadata = pq.ParquetFile(path).metadata
+        footer = (metadata.num_rows, metadata.num_row_groups, metadata.serialized_size, metadata.created_by)
+        return stat.st_size, stat.st_mtime_ns, footer
+    with open(path, "rb") as handle:
+        return stat.st_size, hashlib.sha256(handle.read()).hexdigest()
+
+
+def fingerprint_path(path):
+    """
+    Fingerprint of a file or of all files below a directory, None if the path does not exist. Versioned
+    Parquet datasets are fingerprinted by their manifest version, without listing them.
+    """
+    if not os.path.exists(path):
+        return None
+    if os.path.isfile(path):
+        return fingerprint_values(fingerprint_file(path))
+    version = manifest_version(path)
+    if version is not None:
+        return fingerprint_values(os.path.abspath(path), version)
+    entries = []
+    for root, _, files in os.walk(path):
+        for file_name in files:
+            file_path = os.path.join(root, file_name)
+            entries.append((os.path.relpath(file_path, path), fingerprint_file(file_path)))
+    return fingerprint_values(sorted(entries))
+
+
+def fingerprint_table(connector, table):
+    """Fingerprint of a Postgres table from its row count, size and write statistics, None if it is missing."""
+    query = (
+        f"SELECT (SELECT COUNT(*) FROM {table}) AS row_count, "
+        f"pg_total_relation_size('{table}') AS table_size, n_tup_ins, n_tup_upd, n_tup_del "
+        f"FROM pg_stat_user_tables WHERE relname = '{table}'"
+    )
+    try:
+        stats = connector.get_data_sql(query)
+    except Exception:
+        connector.get_connection().rollback()
+        return None
+    if stats.empty:
+        return None
+    return fingerprint_values(stats.to_dict(orient="records"))
+
+
+class DatasetFingerprints:
+    """Computes each dataset fingerprint at most once per session, on first use."""
+
+    def __init__(self, config):
+        self.config = config
+        self.fingerprints = {}
+        self.exit_stack = ExitStack()
+        self.connector = None
+        self.connect_attempted = False
+
+    def table(self, table):
+        key = ("table", table)
+        if key not in self.fingerprints:
+            connector = self.db_connector()
+            self.fingerprints[key] = fingerprint_table(connector, table) if connector else None
+        return self.fingerprints[key]
+
+    def path(self, path):
+        key = ("path", path)
+        if key not in self.fingerprints:
+            self.fingerprints[key] = fingerprint_path(path)
+        return self.fingerprints[key]
+
+    def db_connector(self):
+        """Connection used for table fingerprints, None if the database is unreachable."""
+        if not self.connect_attempted:
+            self.connect_attempted = True
+            option = self.config.getoption
+            try:
+                self.connector = self.exit_stack.enter_context(PostgresConnectorContextManager(
+                    db_host=option("--db_host"),
+                    db_port=int(option("--db_port")),
+                    db_name=option("--db_name"),
+                    db_user=option("--db_user"),
+                    db_password=option("--db_password"),
+                ))
+            except Exception:
+                self.connector = None
+        return self.connector
+
+    def close(self):
+        self.exit_stack.close()
+
+
+def source_hash(path, cache):
+    """SHA-256 of a source file, or of all Python files below a directory."""
+    if path not in cache:
+        digest = hashlib.sha256()
+        files = [path] if os.path.isfile(path) else sorted(
+            os.path.join(root, file_name)
+            for root, _, file_names in os.walk(path)
+            for file_name in file_names if file_name.endswith(".py")
+        )
+        for file_path in files:
+            with open(file_path, "rb") as handle:
+                digest.update(handle.read())
+        cache[path] = digest.hexdigest()
+    return cache[path]
+
+
+def dataset_inputs(item):
+    """Datasets read by a test as (kind, name) pairs, or None if the test reads the database directly."""
+    if "db_connection" in inspect.signature(item.obj).parameters:
+        return None
+    inputs = [("table", TABLE_FIXTURES[name]) for name in item.fixturenames if name in TABLE_FIXTURES]
+    inputs += [("path", item.config.getoption(PATH_FIXTURES[name]))
+               for name in item.fixturenames if name in PATH_FIXTURES]
+    for name in item.fixturenames:
+        if name in DATASET_FIXTURES:
+            dataset = getattr(item.module, "DATASET_KEY", None)
+            if dataset not in DATASET_FIXTURES[name]:
+                return None
+            inputs.append(("path", item.config.getoption(DATASET_FIXTURES[name][dataset])))
+    return sorted(set(inputs))
+
+
+def results_key(item, fingerprints, sources):
+    """Cache key of a test, None if it cannot be cached (unknown inputs or a missing dataset)."""
+    inputs = dataset_inputs(item)
+    if not inputs:
+        return None
+    dataset_fingerprints = []
+    for kind, name in inputs:
+        fingerprint = fingerprints.table(name) if kind == "table" else fingerprints.path(name)
+        if fingerprint is None:
+            return None
+        dataset_fingerprints.append((kind, name, fingerprint))
+    if any(kind == "table" for kind, _ in inputs):
+        dataset_fingerprints.append((item.config.getoption("--db_host"), item.config.getoption("--db_name")))
+    rootpath = str(item.config.rootpath)
+    code = [source_hash(str(item.path), sources)]
+    code += [source_hash(os.path.join(rootpath, path), sources)
+             for path in SHARED_SOURCES if os.path.exists(os.path.join(rootpath, path))]
+    return fingerprint_values(item.nodeid, dataset_fingerprints, code)
+
+
+def pytest_configure(config):
+    config.results_cache_keys = {}
+    config.results_cache_hits = set()
+    config.results_cache_outcomes = {}
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_collection_modifyitems(config, items):
+    if not config.getoption("--results_cache") or config.cache is None:
+        return
+    stored = config.cache.get(CACHE_KEY, {})
+    fingerprints = DatasetFingerprints(config)
+    sources = {}
+    try:
+        for item in items:
+            key = results_key(item, fingerprints, sources)
+            config.results_cache_keys[item.nodeid] = key
+            if key is not None and stored.get(item.nodeid) == key:
+                config.results_cache_hits.add(item.nodeid)
+    finally:
+        fingerprints.close()
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_protocol(item, nextitem):
+    if item.nodeid not in item.config.results_cache_hits:
+        return None
+    item.ihook.pytest_runtest_logstart(nodeid=item.nodeid, location=item.location)
+    for when in ("setup", "call", "teardown"):
+        sections = [("cached pass", "Inputs and source unchanged since the last pass")] if when == "call" else []
+        report = TestReport(item.nodeid, item.location, {name: 1 for name in item.keywords}, "passed", None, when,
+                            sections=sections, user_properties=[("cached_pass", True)])
+        item.ihook.pytest_runtest_logreport(report=report)
+    item.ihook.pytest_runtest_logfinish(nodeid=item.nodeid, location=item.location)
+    return True
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    report = outcome.get_result()
+    outcomes = item.config.results_cache_outcomes
+    outcomes[item.nodeid] = outcomes.get(item.nodeid, True) and report.passed
+
+
+def pytest_sessionfinish(session):
+    config = session.config
+    if not config.getoption("--results_cache") or config.cache is None:
+        return
+    stored = config.cache.get(CACHE_KEY, {})
+    for nodeid, passed in config.results_cache_outcomes.items():
+        key = config.results_cache_keys.get(nodeid)
+        if passed and key is not None:
+            stored[nodeid] = key
+        else:
+            stored.pop(nodeid, None)
+    config.cache.set(CACHE_KEY, stored)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    if config.results_cache_hits:
+        terminalreporter.write_sep("-", f"DQ results cache: {len(config.results_cache_hits)} cached passes")
@@ -4,48 +4,30 @@ Requirement(s): TICKET-1234
 Author(s): Your Name
 """
 
-import pandas as pd
-import pytest
-
-
-DATASET_KEY = "facility_type_avg_time_spent_per_visit_date"
-
+import os
 
-def _apply_coercions(df, coercions):
-    df = df.copy()
-    for column, dtype in coercions.items():
-        if column not in df.columns:
-            continue
-        if dtype == "datetime":
-            df[column] = pd.to_datetime(df[column])
-        elif dtype == "float":
-            df[column] = pd.to_numeric(df[column], errors="coerce").astype(float)
-    return df
+import pytest
 
+from src.data_quality.dataset_metadata import PARQUET_DATASETS
+from src.data_quality.streaming_reconciliation import reconcile_dataset
 
-def _validate_partition(df, partition_cfg):
-    column = partition_cfg["column"]
-    assert column in df.columns, f"Missing partition column '{column}'"
 
-    source = partition_cfg["source"]
-    if partition_cfg["type"] == "month":
-        derived = pd.to_datetime(df[source]).dt.to_period("M").astype(str)
-        assert derived.equals(df[column].astype(str)), "Partition months do not match source visit_date"
+DATASET_KEY = "facility_type_avg_time_spent_per_visit_date"
 
 
 @pytest.mark.parquet_data
 @pytest.mark.facility_type_avg_time_spent_per_visit_date
 @pytest.mark.smoke
-def test_dataset_not_empty(parquet_facility_type_avg_time_spent, dq_library):
-    assert dq_library.check_dataset_is_not_empty(parquet_facility_type_avg_time_spent)
+def test_dataset_not_empty(parquet_check_source, dq_library):
+    assert dq_library.check_dataset_is_not_empty(parquet_check_source(DATASET_KEY))
 
 
 @pytest.mark.parquet_data
 @pytest.mark.facility_type_avg_time_spent_per_visit_date
 @pytest.mark.data_quality
-def test_dataset_no_nulls(parquet_facility_type_avg_time_spent, dq_library):
+def test_dataset_no_nulls(parquet_check_source, dq_library):
     assert dq_library.check_not_null_values(
-        parquet_facility_type_avg_time_spent,
+        parquet_check_source(DATASET_KEY),
         ["facility_type", "visit_date", "avg_time_spent"],
     )
 
@@ -53,9 +35,9 @@ def test_dataset_no_nulls(parquet_facility_type_avg_time_spent, dq_library):
 @pytest.mark.parquet_data
 @pytest.mark.facility_type_avg_time_spent_per_visit_date
 @pytest.mark.data_quality
-def test_dataset_no_duplicates(parquet_facility_type_avg_time_spent, dq_library):
+def test_dataset_no_duplicates(parquet_check_source, dq_library):
     assert dq_library.check_duplicates(
-        parquet_facility_type_avg_time_spent,
+        parquet_check_source(DATASET_KEY),
         ["facility_type", "visit_date"],
     )
 
@@ -63,10 +45,10 @@ def test_dataset_no_duplicates(parquet_facility_type_avg_time_spent, dq_library)
 @pytest.mark.parquet_data
 @pytest.mark.facility_type_avg_time_spent_per_visit_date
 @pytest.mark.data_quality
-def test_allowed_facility_types(parquet_facility_type_avg_time_spent, expected_parquet_outputs, dq_library):
+def test_allowed_facility_types(parquet_check_source, expected_parquet_outputs, dq_library):
     allowed = expected_parquet_outputs[DATASET_KEY]["allowed_values"]["facility_type"]
     assert dq_library.check_allowed_values(
-        parquet_facility_type_avg_time_spent,
+        parquet_check_source(DATASET_KEY),
         "facility_type",
         allowed,
     )
@@ -75,9 +57,9 @@ def test_allowed_facility_types(parquet_facility_type_avg_time_spent, expected_p
 @pytest.mark.parquet_data
 @pytest.mark.facility_type_avg_time_spent_per_visit_date
 @pytest.mark.data_quality
-def test_partition_column(parquet_facility_type_avg_time_spent, expected_parquet_outputs):
-    cfg = expected_parquet_outputs[DATASET_KEY]
-    _validate_partition(parquet_facility_type_avg_time_spent, cfg["partition"])
+def test_partition_column(parquet_facility_type_avg_time_spent, dq_library):
+    partition_cfg = PARQUET_DATASETS[DATASET_KEY]["partition"]
+    assert dq_library.check_partition_consistency(parquet_facility_type_avg_time_spent, partition_cfg)
 
 
 @pytest.mark.parquet_data
@@ -91,16 +73,12 @@ def test_record_count(parquet_facility_type_avg_time_spent, expected_parquet_out
 @pytest.mark.parquet_data
 @pytest.mark.facility_type_avg_time_spent_per_visit_date
 @pytest.mark.data_completeness
-def test_transformation_accuracy(parquet_facility_type_avg_time_spent, expected_parquet_outputs, dq_library):
-    cfg = expected_parquet_outputs[DATASET_KEY]
-    expected_df = _apply_coercions(cfg["expected"], cfg["coerce"])
-    actual_df = _apply_coercions(parquet_facility_type_avg_time_spent, cfg["coerce"])
-
-    expected_df = expected_df.sort_values(["facility_type", "visit_date"]).reset_index(drop=True)
-    actual_df = actual_df.sort_values(["facility_type", "visit_date"]).reset_index(drop=True)
-
-    comparable_actual = actual_df[expected_df.columns]
-    assert dq_library.check_data_full_data_set(expected_df, comparable_actual)
+def test_transformation_accuracy(db_connection, parquet_dataset_paths):
+    path = parquet_dataset_paths[DATASET_KEY]
+    if not os.path.exists(path):
+        pytest.skip(f"Parquet file not found: {path}")
+    result = reconcile_dataset(db_connection, DATASET_KEY, path, PARQUET_DATASETS[DATASET_KEY])
+    assert result.passed, f"Parquet output differs from the 3NF aggregate: {result.summary()}"
 
 
 @pytest.mark.parquet_data
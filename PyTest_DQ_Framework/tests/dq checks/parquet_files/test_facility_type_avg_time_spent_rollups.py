@@ -0,0 +1,69 @@
+"""
+Description: Coarse Data Quality checks for facility_type_avg_time_spent_per_visit_date based on its rollup tables.
+Requirement(s): TICKET-1234
+Author(s): Your Name
+"""
+
+import pandas as pd
+import pytest
+
+
+YEARLY_DAYS_SQL = """
+SELECT
+    f.facility_type,
+    DATE_TRUNC('year', v.visit_timestamp)::date AS period_start,
+    COUNT(DISTINCT v.visit_timestamp::date) AS count
+FROM visits v
+JOIN facilities f
+    ON f.id = v.facility_id
+GROUP BY
+    f.facility_type,
+    period_start
+"""
+
+
+@pytest.mark.parquet_data
+@pytest.mark.facility_type_avg_time_spent_per_visit_date
+@pytest.mark.smoke
+def test_rollups_not_empty(rollups_facility_type_avg_time_spent, dq_library):
+    for grain, rollup in rollups_facility_type_avg_time_spent.items():
+        assert dq_library.check_dataset_is_not_empty(rollup), f"{grain} rollup is empty"
+
+
+@pytest.mark.parquet_data
+@pytest.mark.facility_type_avg_time_spent_per_visit_date
+@pytest.mark.data_quality
+def test_rollup_statistics_ordered(rollups_facility_type_avg_time_spent):
+    for grain, rollup in rollups_facility_type_avg_time_spent.items():
+        unordered = rollup[
+            (rollup["min_avg_time_spent"] > rollup["mean_avg_time_spent"])
+            | (rollup["mean_avg_time_spent"] > rollup["max_avg_time_spent"])
+        ]
+        assert unordered.empty, f"min <= mean <= max violated in {grain} rollup:\n{unordered}"
+
+
+@pytest.mark.parquet_data
+@pytest.mark.facility_type_avg_time_spent_per_visit_date
+@pytest.mark.data_quality
+def test_rollup_grains_consistent(rollups_facility_type_avg_time_spent):
+    totals = {
+        grain: rollup.groupby("facility_type")["count"].sum().sort_index()
+        for grain, rollup in rollups_facility_type_avg_time_spent.items()
+    }
+    assert totals["week"].equals(totals["month"]), "Week and month rollups cover different day counts"
+    assert totals["month"].equals(totals["year"]), "Month and year rollups cover different day counts"
+
+
+@pytest.mark.parquet_data
+@pytest.mark.facility_type_avg_time_spent_per_visit_date
+@pytest.mark.data_completeness
+def test_rollup_yearly_completeness(rollups_facility_type_avg_time_spent, db_connection):
+    expected = db_connection.get_data_sql(YEARLY_DAYS_SQL)
+    expected["period_start"] = pd.to_datetime(expected["period_start"])
+    actual = rollups_facility_type_avg_time_spent["year"][["facility_type", "period_start", "count"]]
+
+    compared = expected.merge(
+        actual, on=["facility_type", "period_start"], how="outer", suffixes=("_expected", "_actual")
+    ).fillna({"count_expected": 0, "count_actual": 0})
+    mismatches = compared[compared["count_expected"] != compared["count_actual"]]
+    assert mismatches.empty, f"Days per facility type and year differ from the 3NF layer:\n{mismatches}"
@@ -0,0 +1,26 @@
+"""
+Description: Partition-parallel Data Quality checks of the Parquet datasets, reported per partition.
+Requirement(s): TICKET-1234
+Author(s): Your Name
+"""
+
+import os
+
+import pytest
+
+from src.data_quality.dataset_metadata import PARQUET_DATASETS
+from src.data_quality.partition_validation import validate_partitions
+
+
+@pytest.mark.parquet_data
+@pytest.mark.data_quality
+@pytest.mark.parametrize("dataset_key", [
+    pytest.param(dataset_key, marks=getattr(pytest.mark, dataset_key)) for dataset_key in PARQUET_DATASETS
+])
+def test_partitions_valid(dataset_key, parquet_dataset_paths, request):
+    path = parquet_dataset_paths[dataset_key]
+    if not os.path.exists(path):
+        pytest.skip(f"Parquet file not found: {path}")
+    result = validate_partitions(path, PARQUET_DATASETS[dataset_key], request.config.getoption("--partition_workers"))
+    assert result.partitions, f"No partitions found in {path}"
+    assert not result.failures(), f"Failed partitions of {dataset_key}:\n{result.report()}"
@@ -4,46 +4,30 @@ Requirement(s): TICKET-1234
 Author(s): Your Name
 """
 
-import pandas as pd
-import pytest
-
-
-DATASET_KEY = "patient_sum_treatment_cost_per_facility_type"
-
+import os
 
-def _apply_coercions(df, coercions):
-    df = df.copy()
-    for column, dtype in coercions.items():
-        if column not in df.columns:
-            continue
-        if dtype == "float":
-            df[column] = pd.to_numeric(df[column], errors="coerce").astype(float)
-    return df
+import pytest
 
+from src.data_quality.dataset_metadata import PARQUET_DATASETS
+from src.data_quality.streaming_reconciliation import reconcile_dataset
 
-def _validate_partition(df, partition_cfg):
-    column = partition_cfg["column"]
-    assert column in df.columns, f"Missing partition column '{column}'"
 
-    source = partition_cfg["source"]
-    if partition_cfg["type"] == "underscore":
-        derived = df[source].astype(str).str.replace(" ", "_")
-        assert derived.equals(df[column].astype(str)), "Partition values do not match facility_type"
+DATASET_KEY = "patient_sum_treatment_cost_per_facility_type"
 
 
 @pytest.mark.parquet_data
 @pytest.mark.patient_sum_treatment_cost_per_facility_type
 @pytest.mark.smoke
-def test_dataset_not_empty(parquet_patient_sum_treatment_cost, dq_library):
-    assert dq_library.check_dataset_is_not_empty(parquet_patient_sum_treatment_cost)
+def test_dataset_not_empty(parquet_check_source, dq_library):
+    assert dq_library.check_dataset_is_not_empty(parquet_check_source(DATASET_KEY))
 
 
 @pytest.mark.parquet_data
 @pytest.mark.patient_sum_treatment_cost_per_facility_type
 @pytest.mark.data_quality
-def test_dataset_no_nulls(parquet_patient_sum_treatment_cost, dq_library):
+def test_dataset_no_nulls(parquet_check_source, dq_library):
     assert dq_library.check_not_null_values(
-        parquet_patient_sum_treatment_cost,
+        parquet_check_source(DATASET_KEY),
         ["facility_type", "full_name", "sum_treatment_cost"],
     )
 
@@ -51,9 +35,9 @@ def test_dataset_no_nulls(parquet_patient_sum_treatment_cost, dq_library):
 @pytest.mark.parquet_data
 @pytest.mark.patient_sum_treatment_cost_per_facility_type
 @pytest.mark.data_quality
-def test_dataset_no_duplicates(parquet_patient_sum_treatment_cost, dq_library):
+def test_dataset_no_duplicates(parquet_check_source, dq_library):
     assert dq_library.check_duplicates(
-        parquet_patient_sum_treatment_cost,
+        parquet_check_source(DATASET_KEY),
         ["facility_type", "full_name"],
     )
 
@@ -61,10 +45,10 @@ def test_dataset_no_duplicates(parquet_patient_sum_treatment_cost, dq_library):
 @pytest.mark.parquet_data
 @pytest.mark.patient_sum_treatment_cost_per_facility_type
 @pytest.mark.data_quality
-def test_value_ranges(parquet_patient_sum_treatment_cost, expected_parquet_outputs, dq_library):
+def test_value_ranges(parquet_check_source, expected_parquet_outputs, dq_library):
     for check in expected_parquet_outputs[DATASET_KEY].get("range_checks", []):
         assert dq_library.check_value_range(
-            parquet_patient_sum_treatment_cost,
+            parquet_check_source(DATASET_KEY),
             check["column"],
             check.get("min"),
             check.get("max"),
@@ -74,9 +58,9 @@ def test_value_ranges(parquet_patient_sum_treatment_cost, expected_parquet_outpu
 @pytest.mark.parquet_data
 @pytest.mark.patient_sum_treatment_cost_per_facility_type
 @pytest.mark.data_quality
-def test_partition_column(parquet_patient_sum_treatment_cost, expected_parquet_outputs):
-    cfg = expected_parquet_outputs[DATASET_KEY]
-    _validate_partition(parquet_patient_sum_treatment_cost, cfg["partition"])
+def test_partition_column(parquet_patient_sum_treatment_cost, dq_library):
+    partition_cfg = PARQUET_DATASETS[DATASET_KEY]["partition"]
+    assert dq_library.check_partition_consistency(parquet_patient_sum_treatment_cost, partition_cfg)
 
 
 @pytest.mark.parquet_data
@@ -90,16 +74,12 @@ def test_record_count(parquet_patient_sum_treatment_cost, expected_parquet_outpu
 @pytest.mark.parquet_data
 @pytest.mark.patient_sum_treatment_cost_per_facility_type
 @pytest.mark.data_completeness
-def test_transformation_accuracy(parquet_patient_sum_treatment_cost, expected_parquet_outputs, dq_library):
-    cfg = expected_parquet_outputs[DATASET_KEY]
-    expected_df = _apply_coercions(cfg["expected"], cfg["coerce"])
-    actual_df = _apply_coercions(parquet_patient_sum_treatment_cost, cfg["coerce"])
-
-    expected_df = expected_df.sort_values(["facility_type", "full_name"]).reset_index(drop=True)
-    actual_df = actual_df.sort_values(["facility_type", "full_name"]).reset_index(drop=True)
-
-    comparable_actual = actual_df[expected_df.columns]
-    assert dq_library.check_data_full_data_set(expected_df, comparable_actual)
+def test_transformation_accuracy(db_connection, parquet_dataset_paths):
+    path = parquet_dataset_paths[DATASET_KEY]
+    if not os.path.exists(path):
+        pytest.skip(f"Parquet file not found: {path}")
+    result = reconcile_dataset(db_connection, DATASET_KEY, path, PARQUET_DATASETS[DATASET_KEY])
+    assert result.passed, f"Parquet output differs from the 3NF aggregate: {result.summary()}"
 
 
 @pytest.mark.parquet_data
@@ -7,6 +7,8 @@ Author(s): Your Name
 import pandas as pd
 import pytest
 
+from src.data_quality.aggregate_consistency import AGGREGATE_QUERIES, aggregate_differences
+
 
 @pytest.mark.dq
 @pytest.mark.smoke
@@ -53,23 +55,19 @@ def test_src_nf3_patients_alignment(src_patients, nf3_patients):
 
 @pytest.mark.dq
 @pytest.mark.data_completeness
-def test_src_nf3_visits_alignment(src_visits, nf3_visits):
-    src_keys = set(
-        zip(
-            src_visits["patient_id"],
-            src_visits["facility_id"],
-            pd.to_datetime(src_visits["visit_timestamp"]),
-        )
-    )
-    nf3_keys = set(
-        zip(
-            nf3_visits["patient_id"],
-            nf3_visits["facility_id"],
-            pd.to_datetime(nf3_visits["visit_timestamp"]),
-        )
+def test_src_nf3_visits_alignment(src_visits, nf3_visits, nf3_facilities, nf3_patients, dq_library):
+    # 3NF visits reference surrogate IDs, SRC visits external IDs
+    nf3_keys = pd.DataFrame({
+        "patient_id": dq_library.translate_surrogate_ids(nf3_visits["patient_id"], nf3_patients),
+        "facility_id": dq_library.translate_surrogate_ids(nf3_visits["facility_id"], nf3_facilities),
+        "visit_timestamp": pd.to_datetime(nf3_visits["visit_timestamp"]),
+    })
+    result = dq_library.reconcile_keys(
+        src_visits.assign(visit_timestamp=pd.to_datetime(src_visits["visit_timestamp"])),
+        nf3_keys,
+        ["patient_id", "facility_id", "visit_timestamp"],
     )
-    missing = src_keys - nf3_keys
-    assert not missing, f"Visits missing in 3NF: {sorted(missing)[:5]}"
+    assert result.missing_count == 0 and result.extra_count == 0, f"Visits not aligned:\n{result.summary()}"
 
 
 @pytest.mark.dq
@@ -77,4 +75,13 @@ def test_src_nf3_visits_alignment(src_visits, nf3_visits):
 def test_nf3_visits_uniqueness(nf3_visits, dq_library):
     assert dq_library.check_duplicates(
         nf3_visits, ["patient_id", "facility_id", "visit_timestamp"]
-    ), "Duplicate visits detected in 3NF layer"
\ No newline at end of file
+    ), "Duplicate visits detected in 3NF layer"
+
+
+@pytest.mark.dq
+@pytest.mark.data_completeness
+@pytest.mark.parametrize("table", sorted(AGGREGATE_QUERIES))
+def test_nf3_aggregates_consistency(db_connection, table):
+    # the Parquet outputs and their expectations are both computed from the aggregate tables
+    result = aggregate_differences(db_connection, table)
+    assert result.passed, f"Aggregate table out of date with visits:\n{result.summary()}"
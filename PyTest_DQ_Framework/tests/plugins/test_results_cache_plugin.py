@@ -0,0 +1,65 @@
+"""
+Description: Checks of the DQ results cache keys.
+Requirement(s): TICKET-1234
+Author(s): Your Name
+"""
+
+import importlib.util
+import os
+from types import SimpleNamespace
+
+import pandas as pd
+
+from src.plugins.results_cache_plugin import DatasetFingerprints, dataset_inputs, results_key
+
+
+TESTS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "dq checks", "parquet_files")
+DATASET_KEY = "facility_type_avg_time_spent_per_visit_date"
+
+
+def load_test_module(file_name):
+    spec = importlib.util.spec_from_file_location(file_name[:-3], os.path.join(TESTS_DIR, file_name))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def collected_item(module, test_name, options, rootpath):
+    """Stand-in for the collected pytest item of a test function, with the option values of the run."""
+    test = getattr(module, test_name)
+    return SimpleNamespace(
+        obj=test,
+        module=module,
+        fixturenames=list(test.__code__.co_varnames[:test.__code__.co_argcount]),
+        nodeid=f"{module.__name__}::{test_name}",
+        path=module.__file__,
+        config=SimpleNamespace(getoption=options.get, rootpath=rootpath),
+    )
+
+
+def test_parquet_check_source_keyed_on_its_dataset(tmp_path):
+    module = load_test_module(f"test_{DATASET_KEY}.py")
+    dataset_path = str(tmp_path / DATASET_KEY)
+    options = {"--parquet_path_facility_type_avg_time_spent": dataset_path}
+    item = collected_item(module, "test_dataset_not_empty", options, tmp_path)
+
+    assert dataset_inputs(item) == [("path", dataset_path)]
+
+
+def test_parquet_only_change_invalidates_cached_result(tmp_path):
+    module = load_test_module(f"test_{DATASET_KEY}.py")
+    dataset_path = tmp_path / DATASET_KEY / "partition_date=2025-11"
+    dataset_path.mkdir(parents=True)
+    options = {"--parquet_path_facility_type_avg_time_spent": str(tmp_path / DATASET_KEY)}
+    item = collected_item(module, "test_dataset_not_empty", options, tmp_path)
+
+    data = pd.DataFrame({"facility_type": ["Clinic"], "visit_date": ["2025-11-30"], "avg_time_spent": [30.0]})
+    data.to_parquet(dataset_path / "part-0.parquet", index=False)
+    first_key = results_key(item, DatasetFingerprints(item.config), {})
+
+    pd.concat([data, data.assign(facility_type="Hospital")]).to_parquet(dataset_path / "part-0.parquet", index=False)
+    second_key = results_key(item, DatasetFingerprints(item.config), {})
+
+    assert first_key is not None
+    assert second_key is not None
+    assert first_key != second_key
@@ -0,0 +1,231 @@
+"""
+Synthetic SRC, 3NF and Parquet datasets for the benchmarks.
+
+The SRC layer is produced by the project's ShardedDataGenerator, scaled to the requested number of visits and
+seeded, so every run of a scale benchmarks the same data, on any machine and with any number of workers.
+Generated layers are cached as Parquet files, because generating the larger scales takes much longer than
+benchmarking them.
+"""
+
+import io
+import math
+import os
+from datetime import datetime, timedelta
+
+import duckdb
+import pandas as pd
+
+from data_dev.config import data_generator_config
+from data_dev.queries import (
+    CREATE_SRC_GENERATED_FACILITIES_TABLE_QUERY,
+    CREATE_SRC_GENERATED_PATIENTS_TABLE_QUERY,
+    CREATE_SRC_GENERATED_VISITS_TABLE_QUERY
+)
+from data_dev.src.data.sharded_generator import ShardedDataGenerator
+from data_dev.src.data.aggregate_loader import AggregateLoader
+from data_dev.src.data.nf3_loader import NF3Loader
+
+# Scale name -> number of generated visits.
+SCALES = {'10k': 10_000, '1m': 1_000_000, '10m': 10_000_000}
+
+# The generated history ends here and spans at most GENERATED_DAYS days.
+END_DATE = '2024-12-31'
+GENERATED_DAYS = 3650
+SEED = 20240101
+
+SRC_TABLES = {
+    'src_generated_facilities': CREATE_SRC_GENERATED_FACILITIES_TABLE_QUERY,
+    'src_generated_patients': CREATE_SRC_GENERATED_PATIENTS_TABLE_QUERY,
+    'src_generated_visits': CREATE_SRC_GENERATED_VISITS_TABLE_QUERY,
+}
+
+
+def generate_src_layer(rows):
+    """
+    Generates the SRC layer with about the given number of visits.
+
+    Args:
+        rows (int): The number of visits to generate.
+
+    Returns:
+        Dict[str, pd.DataFrame]: The SRC tables, keyed by table name.
+    """
+    visits_per_day = max(1, math.ceil(rows / GENERATED_DAYS))
+    days = max(1, rows // visits_per_day)
+    end_date = datetime.strptime(END_DATE, data_generator_config.date_format)
+
+    generator = ShardedDataGenerator(seed=SEED)
+    generator.max_workers = os.cpu_count() or 1
+    generator.start_date = (end_date - timedelta(days=days - 1)).strftime(generator.date_format)
+    generator.end_date = END_DATE
+    generator.visits_per_day = (visits_per_day, visits_per_day)
+    generator.num_patients = max(data_generator_config.num_patients, rows // 1000)
+
+    # shards are converted as they arrive, so the visits are never all held as dictionaries
+    visits = pd.concat([pd.DataFrame(shard) for shard in generator.iter_visit_shards()], ignore_index=True)
+    visits['visit_timestamp'] = pd.to_datetime(visits['visit_timestamp'])
+    patients = pd.DataFrame(generator.generate_patients())
+    patients['date_of_birth'] = pd.to_datetime(patients['date_of_birth'])
+    return {
+        'src_generated_facilities': pd.DataFrame(generator.generate_facilities()),
+        'src_generated_patients': patients,
+        'src_generated_visits': visits,
+    }
+
+
+def build_nf3_layer(src_layer):
+    """
+    Builds the 3NF layer from the SRC layer the way the NF3Loader MERGE statements do.
+
+    Args:
+        src_layer (Dict[str, pd.DataFrame]): The SRC tables.
+
+    Returns:
+        Dict[str, pd.DataFrame]: The 3NF tables (facilities, patients, visits), keyed by table name.
+    """
+    facilities = src_layer['src_generated_facilities'].rename(columns={'facility_id': 'external_id'})
+    facilities.insert(0, 'id', range(1, len(facilities) + 1))
+    patients = src_layer['src_generated_patients'].rename(columns={'patient_id': 'external_id'})
+    patients.insert(0, 'id', range(1, len(patients) + 1))
+
+    visits = (
+        src_layer['src_generated_visits']
+        .merge(facilities[['id', 'external_id']].rename(columns={'id': 'facility_key'}),
+               left_on='facility_id', right_on='external_id')
+        .drop(columns=['external_id'])
+        .merge(patients[['id', 'external_id']].rename(columns={'id': 'patient_key'}),
+               left_on='patient_id', right_on='external_id')
+        .drop_duplicates(subset=['facility_key', 'patient_key', 'visit_timestamp'])
+    )
+    visits = pd.DataFrame({
+        'id': range(1, len(visits) + 1),
+        'patient_id': visits['patient_key'].to_numpy(),
+        'facility_id': visits['facility_key'].to_numpy(),
+        'visit_timestamp': visits['visit_timestamp'].to_numpy(),
+        'treatment_cost': visits['treatment_cost'].to_numpy(),
+        'duration_minutes': visits['duration_minutes'].to_numpy(),
+    })
+    return {'facilities': facilities, 'patients': patients, 'visits': visits}
+
+
+def build_aggregate_layer(nf3_layer):
+    """
+    Builds the aggregate tables from the 3NF visits the way the AggregateLoader refresh statements do.
+
+    Args:
+        nf3_layer (Dict[str, pd.DataFrame]): The 3NF tables.
+
+    Returns:
+        Dict[str, pd.DataFrame]: The aggregate tables, keyed by table name.
+    """
+    visits = nf3_layer['visits']
+    facility_daily = (
+        visits.assign(visit_date=pd.to_datetime(visits['visit_timestamp']).dt.date)
+        .groupby(['facility_id', 'visit_date'], as_index=False)
+        .agg(visit_count=('duration_minutes', 'size'),
+             sum_duration_minutes=('duration_minutes', 'sum'),
+             min_duration_minutes=('duration_minutes', 'min'))
+    )
+    patient_facility = (
+        visits.groupby(['facility_id', 'patient_id'], as_index=False)
+        .agg(visit_count=('treatment_cost', 'size'), sum_treatment_cost=('treatment_cost', 'sum'))
+    )
+    return {'agg_facility_daily_visits': facility_daily, 'agg_patient_facility_visits': patient_facility}
+
+
+def load_layers(scale, data_dir):
+    """
+    Returns the SRC and 3NF layers of a scale, generating and caching them on first use.
+
+    Args:
+        scale (str): A key of SCALES.
+        data_dir (str): The directory caching the generated layers.
+
+    Returns:
+        Tuple[Dict[str, pd.DataFrame], Dict[str, pd.DataFrame]]: The SRC and the 3NF tables.
+    """
+    # the seed is part of the cache key, so layers cached by another generator or seed are not reused
+    scale_dir = os.path.join(data_dir, f"{scale}-{SEED}")
+    table_names = list(SRC_TABLES) + ['facilities', 'patients', 'visits']
+    if not all(os.path.exists(os.path.join(scale_dir, f"{name}.parquet")) for name in table_names):
+        src_layer = generate_src_layer(SCALES[scale])
+        nf3_layer = build_nf3_layer(src_layer)
+        os.makedirs(scale_dir, exist_ok=True)
+        for name, df in {**src_layer, **nf3_layer}.items():
+            df.to_parquet(os.path.join(scale_dir, f"{name}.parquet"), index=False)
+    tables = {name: pd.read_parquet(os.path.join(scale_dir, f"{name}.parquet")) for name in table_names}
+    return ({name: tables[name] for name in SRC_TABLES},
+            {name: tables[name] for name in ('facilities', 'patients', 'visits')})
+
+
+def load_postgres(connector, src_layer):
+    """
+    Loads the SRC layer into a disposable Postgres database with COPY and builds the 3NF layer and the
+    aggregate tables with the project's NF3Loader and AggregateLoader. Existing SRC, 3NF and aggregate
+    tables are dropped first.
+
+    Args:
+        connector: A connected PostgresConnectorContextManager.
+        src_layer (Dict[str, pd.DataFrame]): The SRC tables.
+    """
+    conn = connector.get_connection()
+    with conn.cursor() as cursor:
+        cursor.execute("DROP TABLE IF EXISTS visits, patients, facilities, "
+                       "src_generated_visits, src_generated_patients, src_generated_facilities, "
+                       "agg_facility_daily_visits, agg_patient_facility_visits, agg_refresh_state CASCADE")
+        for name, create_query in SRC_TABLES.items():
+            cursor.execute(create_query)
+            buffer = io.StringIO()
+            src_layer[name].to_csv(buffer, index=False, header=False)
+            buffer.seek(0)
+            cursor.copy_expert(f"COPY {name} ({', '.join(src_layer[name].columns)}) FROM STDIN WITH CSV", buffer)
+    conn.commit()
+    NF3Loader(conn).load_data()
+    AggregateLoader(conn).load_data()
+
+
+class DuckDBConnector:
+    """
+    In-process stand-in for the Postgres connector, used when no disposable database is configured.
+
+    The 3NF and SRC tables are registered as DuckDB views over the DataFrames, so the pipeline's
+    transformation SQL runs unchanged.
+
+    Attributes:
+        connection (duckdb.DuckDBPyConnection): The in-memory DuckDB connection.
+    """
+
+    def __init__(self, tables):
+        """
+        Initializes the connector and registers the given tables.
+
+        Args:
+            tables (Dict[str, pd.DataFrame]): The tables to expose, keyed by table name.
+        """
+        self.connection = duckdb.connect()
+        for name, df in tables.items():
+            self.connection.register(name, df)
+
+    def get_connection(self):
+        """
+        Returns the DuckDB connection.
+        """
+        return self.connection
+
+    def get_data_sql(self, query):
+        """
+        Executes a SQL query and returns the results as a pandas DataFrame.
+
+        Args:
+            query (str): The SQL query to execute.
+
+        Returns:
+            pd.DataFrame: The query results.
+        """
+        return self.connection.execute(query).df()
+
+    def close(self):
+        """
+        Closes the DuckDB connection.
+        """
+        self.connection.close()
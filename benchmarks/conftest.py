@@ -0,0 +1,103 @@
+import os
+import sys
+
+import pytest
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCHMARKS_DIR)
+# data_dev is imported as a package from the repository root, the DQ framework from its own directory
+for path in (ROOT_DIR, os.path.join(ROOT_DIR, "PyTest_DQ_Framework")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from bench_datasets import (  # noqa: E402
+    SCALES, DuckDBConnector, build_aggregate_layer, load_layers, load_postgres
+)
+from data_dev.src.data.parquet_loader import LoadParquet  # noqa: E402
+from data_dev.src.instrumentation.metrics import recorder as pipeline_recorder  # noqa: E402
+from src.instrumentation.metrics import recorder as dq_recorder  # noqa: E402
+from src.connectors.postgres.postgres_connector import PostgresConnectorContextManager  # noqa: E402
+
+PARQUET_DATASETS = [
+    'facility_type_avg_time_spent_per_visit_date',
+    'patient_sum_treatment_cost_per_facility_type',
+    'facility_name_min_time_spent_per_visit_date',
+]
+
+
+def pytest_addoption(parser):
+    parser.addoption("--bench_scale", action="store", default="10k", choices=sorted(SCALES),
+                     help="Number of generated visits to benchmark with")
+    parser.addoption("--bench_data_dir", action="store",
+                     default=os.path.join(BENCHMARKS_DIR, ".benchmarks", "data"),
+                     help="Directory caching the generated datasets")
+    parser.addoption("--bench_postgres_dsn", action="store", default=os.environ.get("BENCH_POSTGRES_DSN", ""),
+                     help="DSN of a disposable Postgres database (its SRC and 3NF tables are replaced); "
+                          "the in-process DuckDB stand-in is used when empty")
+
+
+def pytest_benchmark_update_machine_info(config, machine_info):
+    machine_info["bench_scale"] = config.getoption("--bench_scale")
+    machine_info["bench_backend"] = "postgres" if config.getoption("--bench_postgres_dsn") else "duckdb"
+
+
+@pytest.fixture(autouse=True)
+def clear_recorders():
+    # instrumented code records every benchmark round, keep the recorders from growing across benchmarks
+    yield
+    pipeline_recorder.clear()
+    dq_recorder.clear()
+
+
+@pytest.fixture(scope="session")
+def bench_layers(request):
+    return load_layers(request.config.getoption("--bench_scale"), request.config.getoption("--bench_data_dir"))
+
+
+@pytest.fixture(scope="session")
+def src_layer(bench_layers):
+    return bench_layers[0]
+
+
+@pytest.fixture(scope="session")
+def nf3_layer(bench_layers):
+    return bench_layers[1]
+
+
+@pytest.fixture(scope="session")
+def db_connector(request, src_layer, nf3_layer):
+    dsn = request.config.getoption("--bench_postgres_dsn")
+    if not dsn:
+        connector = DuckDBConnector({**src_layer, **nf3_layer, **build_aggregate_layer(nf3_layer)})
+        yield connector
+        connector.close()
+        return
+
+    from psycopg2.extensions import parse_dsn
+
+    params = parse_dsn(dsn)
+    with PostgresConnectorContextManager(
+        db_host=params.get("host", "localhost"),
+        db_port=int(params.get("port", 5432)),
+        db_name=params["dbname"],
+        db_user=params.get("user"),
+        db_password=params.get("password"),
+    ) as connector:
+        load_postgres(connector, src_layer)
+        yield connector
+
+
+@pytest.fixture(scope="session")
+def parquet_loader(db_connector, tmp_path_factory):
+    storage_dir = tmp_path_factory.mktemp("parquet_data")
+    loader = LoadParquet(db_connector)
+    for dataset in PARQUET_DATASETS:
+        setattr(loader, f"storage_path_{dataset}", str(storage_dir / dataset))
+    loader.storage_path_rollups = str(storage_dir / "rollups")
+    return loader
+
+
+@pytest.fixture(scope="session")
+def parquet_paths(parquet_loader):
+    parquet_loader.load_parquet()
+    return {dataset: getattr(parquet_loader, f"storage_path_{dataset}") for dataset in PARQUET_DATASETS}
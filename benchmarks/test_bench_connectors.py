@@ -0,0 +1,35 @@
+"""
+Benchmarks of the data access paths: SQL reads through the connector and both Parquet read paths
+(the DQ framework's ParquetReader and the ReportGenerator's partition-pruned read).
+"""
+
+import pytest
+
+from data_dev.config import report_generator_config
+from data_dev.src.reporting.report_generator import ReportGenerator
+from src.connectors.file_system.parquet_reader import ParquetReader
+
+pytestmark = pytest.mark.benchmark(group="connectors")
+
+
+@pytest.mark.parametrize("table", ["facilities", "patients", "visits"])
+def test_get_data_sql(benchmark, db_connector, table):
+    df = benchmark(db_connector.get_data_sql, query=f"SELECT * FROM {table}")
+    assert not df.empty
+
+
+@pytest.mark.parametrize("dataset", [
+    "facility_type_avg_time_spent_per_visit_date",
+    "patient_sum_treatment_cost_per_facility_type",
+    "facility_name_min_time_spent_per_visit_date",
+])
+def test_parquet_reader(benchmark, parquet_paths, dataset):
+    df = benchmark(ParquetReader.read_parquet, parquet_paths[dataset])
+    assert not df.empty
+
+
+def test_report_generator_read_source_data(benchmark, parquet_paths, monkeypatch):
+    monkeypatch.setattr(report_generator_config, "parquet_files_path",
+                        parquet_paths["facility_type_avg_time_spent_per_visit_date"])
+    df = benchmark(ReportGenerator.read_source_data)
+    assert not df.empty
@@ -0,0 +1,67 @@
+"""
+Benchmarks of every DataQualityLibrary check on the 3NF visits table of the benchmark scale.
+"""
+
+import pytest
+
+from src.data_quality.data_quality_validation_library import DataQualityLibrary
+
+pytestmark = pytest.mark.benchmark(group="dq_checks")
+
+VISIT_KEY = ["facility_id", "patient_id", "visit_timestamp"]
+VISIT_MAPPING = [
+    {"source_column": column, "target_column": column, "transformation": "none"}
+    for column in ["visit_timestamp", "treatment_cost", "duration_minutes"]
+]
+
+
+@pytest.fixture(scope="module")
+def visits(nf3_layer):
+    return nf3_layer["visits"]
+
+
+@pytest.fixture(scope="module")
+def visits_copy(visits):
+    return visits.copy()
+
+
+def test_check_duplicates(benchmark, visits):
+    assert benchmark(DataQualityLibrary.check_duplicates, visits, VISIT_KEY)
+
+
+def test_check_count(benchmark, visits, visits_copy):
+    assert benchmark(DataQualityLibrary.check_count, visits, visits_copy)
+
+
+def test_check_data_full_data_set(benchmark, visits, visits_copy):
+    assert benchmark(DataQualityLibrary.check_data_full_data_set, visits, visits_copy)
+
+
+def test_check_values_within_tolerance(benchmark, visits, visits_copy):
+    assert benchmark(DataQualityLibrary.check_values_within_tolerance, visits, visits_copy,
+                     ["treatment_cost", "duration_minutes"], {"treatment_cost": {"decimals": 2}})
+
+
+def test_check_dataset_is_not_empty(benchmark, visits):
+    assert benchmark(DataQualityLibrary.check_dataset_is_not_empty, visits)
+
+
+def test_check_not_null_values(benchmark, visits):
+    assert benchmark(DataQualityLibrary.check_not_null_values, visits)
+
+
+def test_check_column_mapping(benchmark, visits, visits_copy):
+    assert benchmark(DataQualityLibrary.check_column_mapping, visits, visits_copy, VISIT_MAPPING)
+
+
+def test_check_transformed_values(benchmark, visits, visits_copy):
+    assert benchmark(DataQualityLibrary.check_transformed_values, visits, visits_copy, VISIT_MAPPING)
+
+
+def test_check_value_range(benchmark, visits):
+    assert benchmark(DataQualityLibrary.check_value_range, visits, "duration_minutes", 15, 60)
+
+
+def test_check_allowed_values(benchmark, visits, nf3_layer):
+    assert benchmark(DataQualityLibrary.check_allowed_values, visits, "facility_id",
+                     nf3_layer["facilities"]["id"].tolist())
@@ -0,0 +1,30 @@
+"""
+Benchmarks of the LoadParquet transformations and of the DQ framework's expected Parquet outputs.
+"""
+
+import pytest
+
+from src.data_quality.expected_outputs import build_expected_parquet_outputs
+
+pytestmark = pytest.mark.benchmark(group="transforms")
+
+
+@pytest.mark.parametrize("transform_name", [
+    "transform_facility_type_avg_time_spent_per_visit_date",
+    "transform_patient_sum_treatment_cost_per_facility_type",
+    "transform_facility_name_min_time_spent_per_visit_date",
+])
+def test_load_parquet_transform(benchmark, parquet_loader, transform_name):
+    rows = benchmark(getattr(parquet_loader, transform_name))
+    assert rows > 0
+
+
+def test_materialize_rollups(benchmark, parquet_loader, parquet_paths):
+    rows = benchmark(parquet_loader.materialize_rollups, full_refresh=True)
+    assert rows > 0
+
+
+def test_expected_parquet_outputs(benchmark, nf3_layer):
+    outputs = benchmark(build_expected_parquet_outputs,
+                        nf3_layer["visits"], nf3_layer["facilities"], nf3_layer["patients"])
+    assert all(not output["expected"].empty for output in outputs.values())
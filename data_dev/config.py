@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
 
@@ -34,6 +34,9 @@ class DataGeneratorConfig:
         date_format (str): The format of the date strings (e.g., '%Y-%m-%d').
         facility_types (List[str]): A list of facility types (e.g., "Hospital", "Clinic").
         visits_per_day (Tuple[int, int]): A tuple specifying the range (min, max) of visits per day.
+        seed (int): The seed every shard derives its own seed from; the same seed generates the same data.
+        shard_days (int): The number of days of visits generated per shard.
+        max_workers (int): The number of processes generating shards concurrently.
     """
     num_patients: int
     start_date: str
@@ -41,6 +44,9 @@ class DataGeneratorConfig:
     date_format: str
     facility_types: List[str]
     visits_per_day: Tuple[int, int]
+    seed: int
+    shard_days: int
+    max_workers: int
 
 
 @dataclass
@@ -55,10 +61,13 @@ class ParquetStorageConfig:
         The file system path where Parquet files for patient_sum_treatment_cost_per_facility_type will be stored.
         storage_path_facility_name_min_time_spent_per_visit_date (str):
         The file system path where Parquet files for facility_name_min_time_spent_per_visit_date will be stored.
+        storage_path_rollups (str):
+        The file system path where the week/month/year rollup tables of the datasets will be stored.
     """
     storage_path_facility_type_avg_time_spent_per_visit_date: str
     storage_path_patient_sum_treatment_cost_per_facility_type: str
     storage_path_facility_name_min_time_spent_per_visit_date: str
+    storage_path_rollups: str
 
 
 @dataclass
@@ -88,6 +97,148 @@ class ReportGeneratorConfig:
     parquet_files_path: str
 
 
+@dataclass
+class BatchReportConfig:
+    """
+    BatchReportConfig is a configuration class used to define settings for batch report rendering.
+
+    Attributes:
+        enabled (bool): Whether the batch reports are rendered as part of the pipeline run.
+        storage_path (str): The directory where the batch reports and their shared static assets are written.
+        parquet_files_paths (Dict[str, str]): Location of source files for every dataset, keyed by dataset name.
+        weeks (int): The number of most recent weeks rendered for every dataset.
+        max_workers (int): The number of worker processes used to render the reports.
+    """
+    enabled: bool
+    storage_path: str
+    parquet_files_paths: Dict[str, str]
+    weeks: int
+    max_workers: int
+
+
+@dataclass
+class PipelineConfig:
+    """
+    PipelineConfig is a configuration class used to define settings for the pipeline stage runner.
+
+    Attributes:
+        max_workers (int): The maximum number of stages executed concurrently.
+        state_path (str): The file where input fingerprints of successfully completed stages are stored.
+                          Stages whose inputs are unchanged since their last successful run are skipped.
+    """
+    max_workers: int
+    state_path: str
+
+
+@dataclass
+class MetricsConfig:
+    """
+    MetricsConfig is a configuration class used to define settings for pipeline instrumentation.
+
+    Attributes:
+        output_path (str): The JSON file where the measurements of a pipeline run are written.
+                           An OpenMetrics text file with the same name and a .prom extension is written next to it.
+        trace_memory (bool): Whether to trace Python allocations with tracemalloc to record peak memory per operation.
+                             Tracing slows the pipeline down, so it is disabled by default.
+    """
+    output_path: str
+    trace_memory: bool
+
+
+@dataclass
+class ArrowExchangeConfig:
+    """
+    ArrowExchangeConfig is a configuration class used to define settings for the Arrow IPC exchange with the DQ suite.
+
+    Attributes:
+        enabled (bool): Whether the pipeline publishes the SRC/3NF snapshots and the LoadParquet results
+                        as Arrow IPC files for the DQ suite.
+        storage_path (str): The directory where the Arrow IPC files and their manifest are written.
+        tables (List[str]): The SRC and 3NF tables published after the 3NF load.
+    """
+    enabled: bool
+    storage_path: str
+    tables: List[str]
+
+
+@dataclass
+class ParquetWriterConfig:
+    """
+    ParquetWriterConfig is a configuration class used to define how LoadParquet writes the partitioned datasets.
+
+    Attributes:
+        row_group_size (int): The maximum number of rows per row group.
+        compression (str): The compression codec, e.g. 'zstd', 'snappy', 'gzip' or 'none'.
+        compression_level (Optional[int]): The codec-specific compression level, None for the codec default.
+        use_dictionary (bool): Whether columns are dictionary encoded.
+        max_workers (int): The number of partitions written concurrently.
+        sort_keys (Dict[str, List[str]]): The columns the rows of every file are sorted by, keyed by dataset name,
+                                          so that row group and page statistics can prune filtered reads.
+        write_page_index (bool): Whether the column and offset indexes of every page are written.
+        bloom_filter_columns (Dict[str, List[str]]): The columns a bloom filter is written for, keyed by dataset
+                                                     name. Only worthwhile for high-cardinality lookup columns.
+        retain_versions (int): The number of committed dataset versions whose files are kept readable, the
+                               current one included. Files of older versions are deleted.
+    """
+    row_group_size: int
+    compression: str
+    compression_level: Optional[int]
+    use_dictionary: bool
+    max_workers: int
+    sort_keys: Dict[str, List[str]]
+    write_page_index: bool
+    bloom_filter_columns: Dict[str, List[str]]
+    retain_versions: int
+
+
+@dataclass
+class SchemaConfig:
+    """
+    SchemaConfig is a configuration class used to define how the database schema is migrated and verified.
+
+    Attributes:
+        verify_plans (bool): Whether the plans of the pipeline's queries are checked with EXPLAIN after the
+                             aggregate refresh, to verify that they use the indexes the migrations create.
+        fail_on_plan_regression (bool): Whether a query that does not use its indexes fails the
+                                        verify_query_plans stage instead of being logged as a warning.
+        analyze_after_load (bool): Whether the loaded tables are analyzed after every load, so the planner
+                                   works with current statistics.
+    """
+    verify_plans: bool
+    fail_on_plan_regression: bool
+    analyze_after_load: bool
+
+
+@dataclass
+class BackfillConfig:
+    """
+    BackfillConfig is a configuration class used to define how NF3Loader merges large backfills of visits.
+
+    Attributes:
+        enabled (bool): Whether the visits are merged in date-range chunks instead of one transaction.
+        chunk_days (int): The number of visit dates merged, and committed, per chunk.
+        max_workers (int): The number of chunks merged concurrently, each over its own pooled connection.
+    """
+    enabled: bool
+    chunk_days: int
+    max_workers: int
+
+
+@dataclass
+class StreamingLoadConfig:
+    """
+    StreamingLoadConfig is a configuration class used to define how generated data is streamed into the SRC layer.
+
+    Attributes:
+        enabled (bool): Whether visits are generated and copied into the database shard by shard, instead of
+                        being generated as a whole before they are inserted.
+        queue_size (int): The number of generated visit shards that may wait for the copy; together with
+                          generator_config.shard_days it bounds the memory used by the load.
+    """
+    enabled: bool
+    queue_size: int
+
+
 # Instance of LoadConfig
 load_config = LoadConfig(
     date_scope=datetime.now().date().strftime('%Y-%m-%d')  # Example: '2025-01-01'
@@ -109,7 +260,10 @@ data_generator_config = DataGeneratorConfig(
     end_date='2030-01-01',
     date_format='%Y-%m-%d',
     facility_types=['Hospital', 'Clinic', 'Urgent Care', 'Specialty Center'],
-    visits_per_day=(7, 10)
+    visits_per_day=(7, 10),
+    seed=20000101,
+    shard_days=365,
+    max_workers=4
 )
 
 # Instance of ParquetStorageConfig
@@ -119,7 +273,28 @@ parquet_storage_config = ParquetStorageConfig(
     storage_path_patient_sum_treatment_cost_per_facility_type='/parquet_data/'
                                                               'patient_sum_treatment_cost_per_facility_type',
     storage_path_facility_name_min_time_spent_per_visit_date='/parquet_data/'
-                                                             'facility_name_min_time_spent_per_visit_date'
+                                                             'facility_name_min_time_spent_per_visit_date',
+    storage_path_rollups='/parquet_data/rollups'
+)
+
+# Instance of ParquetWriterConfig
+parquet_writer_config = ParquetWriterConfig(
+    row_group_size=128 * 1024,
+    compression='zstd',
+    compression_level=3,
+    use_dictionary=True,
+    max_workers=4,
+    sort_keys={
+        'facility_type_avg_time_spent_per_visit_date': ['facility_type', 'visit_date'],
+        'patient_sum_treatment_cost_per_facility_type': ['facility_type', 'full_name'],
+        'facility_name_min_time_spent_per_visit_date': ['facility_name', 'visit_date'],
+    },
+    write_page_index=True,
+    bloom_filter_columns={
+        'patient_sum_treatment_cost_per_facility_type': ['full_name'],
+        'facility_name_min_time_spent_per_visit_date': ['facility_name'],
+    },
+    retain_versions=2
 )
 
 # Instance of ReportGeneratorConfig
@@ -127,3 +302,59 @@ report_generator_config = ReportGeneratorConfig(
     storage_path='/generated_report',
     parquet_files_path='/parquet_data/facility_type_avg_time_spent_per_visit_date'
 )
+
+# Instance of BatchReportConfig
+batch_report_config = BatchReportConfig(
+    enabled=False,
+    storage_path='/generated_report/batch',
+    parquet_files_paths={
+        'facility_type_avg_time_spent_per_visit_date':
+            parquet_storage_config.storage_path_facility_type_avg_time_spent_per_visit_date,
+        'patient_sum_treatment_cost_per_facility_type':
+            parquet_storage_config.storage_path_patient_sum_treatment_cost_per_facility_type,
+        'facility_name_min_time_spent_per_visit_date':
+            parquet_storage_config.storage_path_facility_name_min_time_spent_per_visit_date,
+    },
+    weeks=4,
+    max_workers=4
+)
+
+# Instance of PipelineConfig
+pipeline_config = PipelineConfig(
+    max_workers=4,
+    state_path='/parquet_data/.pipeline_state.json'
+)
+
+# Instance of MetricsConfig
+metrics_config = MetricsConfig(
+    output_path='/generated_report/metrics/pipeline_metrics.json',
+    trace_memory=False
+)
+
+# Instance of ArrowExchangeConfig
+arrow_exchange_config = ArrowExchangeConfig(
+    enabled=False,
+    storage_path='/parquet_data/exchange',
+    tables=['src_generated_facilities', 'src_generated_patients', 'src_generated_visits',
+            'facilities', 'patients', 'visits']
+)
+
+# Instance of SchemaConfig
+schema_config = SchemaConfig(
+    verify_plans=True,
+    fail_on_plan_regression=False,
+    analyze_after_load=True
+)
+
+# Instance of BackfillConfig
+backfill_config = BackfillConfig(
+    enabled=False,
+    chunk_days=30,
+    max_workers=4
+)
+
+# Instance of StreamingLoadConfig
+streaming_load_config = StreamingLoadConfig(
+    enabled=False,
+    queue_size=4
+)
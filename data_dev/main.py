@@ -1,49 +1,205 @@
-from src.connectors.postgre_connector import PostgresConnectorContextManager
+from src.connectors.postgre_connector import PostgresConnectorContextManager, PostgresConnectionPool
 from src.data.inject_generated_data_to_src import GeneratedDataLoader
 from src.data.nf3_loader import NF3Loader
+from src.data.aggregate_loader import AggregateLoader, AGGREGATE_TABLES
 from src.data.parquet_loader import LoadParquet
+from src.schema.migrations import SchemaMigrator
 from src.reporting.report_generator import ReportGenerator
+from src.reporting.batch_report_generator import BatchReportGenerator
+from src.pipeline.dag_runner import (DagRunner, Stage, FAILED,
+                                     fingerprint_values, fingerprint_path, fingerprint_tables)
+from data_dev.src.exchange.arrow_exchange import ArrowExchange
+from data_dev.src.instrumentation.metrics import recorder
+from data_dev.config import (arrow_exchange_config, backfill_config, batch_report_config, load_config, metrics_config,
+                             parquet_storage_config, report_generator_config, schema_config)
 
 import logging
+import os
+import sys
 import warnings
 
 warnings.filterwarnings("ignore")
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+SRC_TABLES = ['src_generated_facilities', 'src_generated_patients', 'src_generated_visits']
+NF3_TABLES = ['facilities', 'patients', 'visits']
 
-def main():
+
+def analyze_tables(connection, tables, loaded_rows):
+    # refresh the planner statistics of the tables a load changed
+    if schema_config.analyze_after_load and loaded_rows:
+        SchemaMigrator(connection).analyze(tables)
+
+
+def migrate_schema():
+    # create and maintain the 3NF tables and their indexes
+    with PostgresConnectorContextManager() as connection_object:
+        return SchemaMigrator(connection_object.get_connection()).migrate()
+
+
+def verify_query_plans():
+    # check that the pipeline queries use their indexes on the loaded and analyzed tables
+    with PostgresConnectorContextManager() as connection_object:
+        failed = [result for result in SchemaMigrator(connection_object.get_connection()).verify_plans()
+                  if not result.passed]
+        if failed and schema_config.fail_on_plan_regression:
+            raise RuntimeError("Query plans do not use the expected indexes: "
+                               + "; ".join(f"{result.name} misses {', '.join(result.missing_indexes)}"
+                                           for result in failed))
+
+
+def generate_data():
+    # generate and load generated data into src layer
     with PostgresConnectorContextManager() as connection_object:
-        # generate and load generated data into src layer
-        try:
-            logging.info(f"Starting data generation and injection into Postgres...")
-            gdi = GeneratedDataLoader(connection_object.get_connection())
-            gdi.inject_data()
-            logging.info(f"Data generation and injection into Postgres Completed!")
-        except Exception as e:
-            logging.exception(f"Data generation and injection into Postgres FAILED: {e}")
-        # load to nf3 layer
-        try:
-            logging.info(f"Starting transformation of injected data...")
-            l3nf = NF3Loader(connection_object.get_connection())
-            l3nf.load_data()
-            logging.info(f"Transformation of injected data completed!")
-        except Exception as e:
-            logging.exception(f"Transformation of injected data FAILED: {e}")
-        # load parquet files
-        try:
-            logging.info(f"Starting transformation of parquet files...")
-            ld = LoadParquet(connection_object)
-            ld.load_parquet()
-            logging.info(f"Transformation of parquet files completed!")
-        except Exception as e:
-            logging.exception(f"Transformation of parquet files FAILED: {e}")
-        try:
-            logging.info(f"Starting report generation...")
-            rp = ReportGenerator()
-            rp.generate_report()
-            logging.info(f"Report generation completed!")
-        except Exception as e:
-            logging.exception(f"Report generation FAILED: {e}")
+        injected = GeneratedDataLoader(connection_object.get_connection()).inject_data()
+        analyze_tables(connection_object.get_connection(), SRC_TABLES, injected)
+        return injected
+
+
+def load_nf3():
+    # load to nf3 layer
+    with PostgresConnectorContextManager() as connection_object:
+        loader = NF3Loader(connection_object.get_connection())
+        if backfill_config.enabled:
+            # merge the visits in date-range chunks, concurrently over pooled connections
+            with PostgresConnectionPool(backfill_config.max_workers) as connection_pool:
+                merged = loader.load_data(connection_pool)
+        else:
+            merged = loader.load_data()
+        analyze_tables(connection_object.get_connection(), NF3_TABLES, merged)
+        return merged
+
+
+def refresh_aggregates():
+    # refresh the aggregate tables from the newly merged visits
+    with PostgresConnectorContextManager() as connection_object:
+        refreshed = AggregateLoader(connection_object.get_connection()).load_data()
+        analyze_tables(connection_object.get_connection(), AGGREGATE_TABLES, refreshed)
+        return refreshed
+
+
+def nf3_fingerprint():
+    with PostgresConnectorContextManager() as connection_object:
+        src_fingerprint = fingerprint_tables(connection_object, SRC_TABLES)
+        nf3_fingerprint_value = fingerprint_tables(connection_object, NF3_TABLES)
+    if src_fingerprint is None or nf3_fingerprint_value is None:
+        return None
+    return fingerprint_values(src_fingerprint, nf3_fingerprint_value, load_config.date_scope)
+
+
+def publish_snapshots():
+    # publish SRC/3NF snapshots for the DQ suite
+    with PostgresConnectorContextManager() as connection_object:
+        return ArrowExchange().publish_tables(connection_object)
+
+
+def transform_stage(transform_name):
+    # load parquet files, every transformation on its own connection so they can run concurrently
+    def run():
+        with PostgresConnectorContextManager() as connection_object:
+            return getattr(LoadParquet(connection_object), transform_name)()
+    return run
+
+
+def transform_fingerprint(storage_path):
+    def fingerprint():
+        with PostgresConnectorContextManager() as connection_object:
+            tables_fingerprint = fingerprint_tables(connection_object, NF3_TABLES + AGGREGATE_TABLES)
+        if tables_fingerprint is None:
+            return None
+        return fingerprint_values(tables_fingerprint, os.path.exists(storage_path), arrow_exchange_config.enabled)
+    return fingerprint
+
+
+def materialize_rollups():
+    return LoadParquet(None).materialize_rollups()
+
+
+def rollups_fingerprint():
+    return fingerprint_values(
+        fingerprint_path(parquet_storage_config.storage_path_facility_type_avg_time_spent_per_visit_date),
+        os.path.exists(parquet_storage_config.storage_path_rollups)
+    )
+
+
+def generate_report():
+    return ReportGenerator().generate_report()
+
+
+def report_fingerprint():
+    return fingerprint_values(
+        fingerprint_path(report_generator_config.parquet_files_path),
+        os.path.exists(os.path.join(report_generator_config.storage_path, "report.html"))
+    )
+
+
+def generate_batch_reports():
+    return len(BatchReportGenerator().generate_reports())
+
+
+def batch_reports_fingerprint():
+    return fingerprint_values(
+        [fingerprint_path(path) for path in batch_report_config.parquet_files_paths.values()],
+        fingerprint_path(parquet_storage_config.storage_path_rollups),
+        os.path.exists(os.path.join(batch_report_config.storage_path, "index.html"))
+    )
+
+
+def build_stages():
+    transforms = [
+        ('transform_facility_type_avg_time_spent_per_visit_date',
+         parquet_storage_config.storage_path_facility_type_avg_time_spent_per_visit_date),
+        ('transform_patient_sum_treatment_cost_per_facility_type',
+         parquet_storage_config.storage_path_patient_sum_treatment_cost_per_facility_type),
+        ('transform_facility_name_min_time_spent_per_visit_date',
+         parquet_storage_config.storage_path_facility_name_min_time_spent_per_visit_date),
+    ]
+    stages = [
+        Stage('generate_data', generate_data),
+        Stage('migrate_schema', migrate_schema, ['generate_data']),
+        Stage('load_nf3', load_nf3, ['generate_data', 'migrate_schema'], nf3_fingerprint),
+        Stage('refresh_aggregates', refresh_aggregates, ['load_nf3']),
+    ]
+    stages += [
+        Stage(name, transform_stage(name), ['refresh_aggregates'], transform_fingerprint(storage_path))
+        for name, storage_path in transforms
+    ]
+    stages += [
+        Stage('materialize_rollups', materialize_rollups,
+              ['transform_facility_type_avg_time_spent_per_visit_date'], rollups_fingerprint),
+        Stage('generate_report', generate_report,
+              ['transform_facility_type_avg_time_spent_per_visit_date'], report_fingerprint),
+    ]
+    if schema_config.verify_plans:
+        stages.append(Stage('verify_query_plans', verify_query_plans, ['refresh_aggregates']))
+    if arrow_exchange_config.enabled:
+        stages.append(Stage('publish_snapshots', publish_snapshots, ['load_nf3']))
+    if batch_report_config.enabled:
+        stages.append(Stage('generate_batch_reports', generate_batch_reports,
+                            [name for name, _ in transforms] + ['materialize_rollups'], batch_reports_fingerprint))
+    return stages
+
+
+def write_metrics():
+    recorder.write_json(metrics_config.output_path)
+    recorder.write_openmetrics(os.path.splitext(metrics_config.output_path)[0] + '.prom')
+    lines = [f"{'Kind':<12} {'Name':<70} {'Calls':>6} {'Seconds':>10} {'Rows out':>12}"]
+    for entry in recorder.summary():
+        rows = '' if entry['rows_out_total'] is None else entry['rows_out_total']
+        lines.append(f"{entry['kind']:<12} {entry['name']:<70} {entry['calls']:>6} "
+                     f"{entry['wall_seconds_total']:>10.2f} {rows:>12}")
+    logging.info("Pipeline metrics:\n" + "\n".join(lines))
+
+
+def main():
+    if metrics_config.trace_memory:
+        recorder.start_memory_tracing()
+    runner = DagRunner(build_stages())
+    results = runner.run()
+    runner.log_summary(results)
+    write_metrics()
+    if any(result.status == FAILED for result in results.values()):
+        sys.exit(1)
 
 
 if __name__ == '__main__':
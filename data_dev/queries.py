@@ -47,6 +47,15 @@ INSERT INTO src_generated_visits (patient_id, facility_id, visit_timestamp, trea
 VALUES (%(patient_id)s, %(facility_id)s, %(visit_timestamp)s, %(treatment_cost)s, %(duration_minutes)s)
 """
 
+COPY_SRC_GENERATED_PATIENTS_QUERY = """
+COPY src_generated_patients (patient_id, first_name, last_name, date_of_birth, address) FROM STDIN WITH (FORMAT csv)
+"""
+
+COPY_SRC_GENERATED_VISITS_QUERY = """
+COPY src_generated_visits (patient_id, facility_id, visit_timestamp, treatment_cost, duration_minutes)
+FROM STDIN WITH (FORMAT csv)
+"""
+
 # 3NF LAYER
 
 
@@ -108,9 +117,11 @@ WHEN NOT MATCHED THEN
     VALUES (source.patient_id, source.first_name, source.last_name, source.date_of_birth, source.address);
 """
 
+# Source visits repeating a natural key are merged once (the one with the lowest cost and duration); the
+# SRC/3NF row count check reports them.
 MERGE_VISITS_QUERY = """
 WITH src_visits AS (
-    SELECT 
+    SELECT DISTINCT ON (f.id, p.id, sgv.visit_timestamp)
         f.id AS facility_id,
         p.id AS patient_id,
         sgv.visit_timestamp,
@@ -122,6 +133,7 @@ WITH src_visits AS (
     JOIN patients p
         ON sgv.patient_id = p.external_id 
     WHERE visit_timestamp::date <= %(date_scope)s
+    ORDER BY f.id, p.id, sgv.visit_timestamp, sgv.treatment_cost, sgv.duration_minutes
 )
 MERGE INTO visits AS target
 USING src_visits AS source
@@ -135,24 +147,249 @@ WHEN NOT MATCHED THEN
     VALUES (source.facility_id, source.patient_id, source.visit_timestamp, source.treatment_cost, source.duration_minutes);
 """
 
+# Backfill mode: the visits merge split into date-range chunks, each merged and committed on its own.
+SELECT_SRC_VISITS_DATE_RANGE_QUERY = """
+SELECT MIN(visit_timestamp)::date, MAX(visit_timestamp)::date
+FROM src_generated_visits
+WHERE visit_timestamp::date <= %(date_scope)s;
+"""
+
+MERGE_VISITS_CHUNK_QUERY = """
+WITH src_visits AS (
+    SELECT DISTINCT ON (f.id, p.id, sgv.visit_timestamp)
+        f.id AS facility_id,
+        p.id AS patient_id,
+        sgv.visit_timestamp,
+        sgv.treatment_cost,
+        sgv.duration_minutes 
+    FROM src_generated_visits sgv 
+    JOIN facilities f 
+        ON sgv.facility_id = f.external_id 
+    JOIN patients p
+        ON sgv.patient_id = p.external_id 
+    WHERE visit_timestamp::date <= %(date_scope)s
+        AND visit_timestamp >= %(chunk_start)s
+        AND visit_timestamp < %(chunk_end)s
+    ORDER BY f.id, p.id, sgv.visit_timestamp, sgv.treatment_cost, sgv.duration_minutes
+)
+MERGE INTO visits AS target
+USING src_visits AS source
+ON target.facility_id = source.facility_id
+   AND target.patient_id = source.patient_id
+   AND target.visit_timestamp = source.visit_timestamp
+WHEN MATCHED THEN
+    DO NOTHING
+WHEN NOT MATCHED THEN
+    INSERT (facility_id, patient_id, visit_timestamp, treatment_cost, duration_minutes)
+    VALUES (source.facility_id, source.patient_id, source.visit_timestamp, source.treatment_cost, source.duration_minutes);
+"""
+
+CREATE_NF3_BACKFILL_PROGRESS_TABLE_QUERY = """
+CREATE TABLE IF NOT EXISTS nf3_backfill_progress (
+    date_scope DATE NOT NULL, -- Date scope of the backfill
+    chunk_start DATE NOT NULL, -- First visit date of the chunk
+    chunk_end DATE NOT NULL, -- Day after the last visit date of the chunk
+    merged_rows INT NOT NULL, -- Visits inserted by the chunk
+    completed_at TIMESTAMP NOT NULL DEFAULT NOW(), -- Time the chunk was committed
+    PRIMARY KEY (date_scope, chunk_start, chunk_end)
+);
+"""
+
+SELECT_NF3_BACKFILL_PROGRESS_QUERY = """
+SELECT chunk_start, chunk_end FROM nf3_backfill_progress WHERE date_scope = %(date_scope)s;
+"""
+
+INSERT_NF3_BACKFILL_PROGRESS_QUERY = """
+INSERT INTO nf3_backfill_progress (date_scope, chunk_start, chunk_end, merged_rows)
+VALUES (%(date_scope)s, %(chunk_start)s, %(chunk_end)s, %(merged_rows)s)
+ON CONFLICT DO NOTHING;
+"""
+
+DELETE_NF3_BACKFILL_PROGRESS_QUERY = """
+DELETE FROM nf3_backfill_progress WHERE date_scope = %(date_scope)s;
+"""
+
+# SCHEMA MIGRATIONS
+
+CREATE_SCHEMA_MIGRATIONS_TABLE_QUERY = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INT PRIMARY KEY, -- Version of the applied migration
+    description TEXT NOT NULL, -- What the migration changes
+    applied_at TIMESTAMP NOT NULL DEFAULT NOW() -- Time the migration was applied
+);
+"""
+
+SELECT_SCHEMA_MIGRATIONS_QUERY = """
+SELECT version FROM schema_migrations ORDER BY version;
+"""
+
+INSERT_SCHEMA_MIGRATION_QUERY = """
+INSERT INTO schema_migrations (version, description) VALUES (%(version)s, %(description)s);
+"""
+
+CREATE_FACILITIES_EXTERNAL_ID_INDEX_QUERY = """
+CREATE INDEX IF NOT EXISTS facilities_external_id_idx ON facilities (external_id);
+"""
+
+CREATE_PATIENTS_EXTERNAL_ID_INDEX_QUERY = """
+CREATE INDEX IF NOT EXISTS patients_external_id_idx ON patients (external_id);
+"""
+
+# Visits repeating a natural key, loaded before the merge deduplicated its source, are removed (the one with
+# the lowest id is kept) so the unique index can be built; the aggregates are then rebuilt from scratch.
+DELETE_DUPLICATE_VISITS_QUERY = """
+DO $$
+DECLARE
+    removed BIGINT;
+BEGIN
+    DELETE FROM visits AS duplicate
+    USING visits AS kept
+    WHERE duplicate.facility_id = kept.facility_id
+        AND duplicate.patient_id = kept.patient_id
+        AND duplicate.visit_timestamp = kept.visit_timestamp
+        AND duplicate.id > kept.id;
+    GET DIAGNOSTICS removed = ROW_COUNT;
+    IF removed > 0 THEN
+        RAISE WARNING 'Removed % duplicate visits', removed;
+        IF to_regclass('agg_refresh_state') IS NOT NULL THEN
+            TRUNCATE agg_facility_daily_visits, agg_patient_facility_visits;
+            UPDATE agg_refresh_state SET last_id = 0 WHERE source_table = 'visits';
+        END IF;
+    END IF;
+END $$;
+"""
+
+# Natural key of a visit, matched by the visits merge; the merge never inserts a key twice.
+CREATE_VISITS_NATURAL_KEY_INDEX_QUERY = """
+CREATE UNIQUE INDEX IF NOT EXISTS visits_facility_patient_timestamp_key
+    ON visits (facility_id, patient_id, visit_timestamp);
+"""
+
+# Visits are inserted roughly in visit_timestamp order, so a BRIN index prunes date ranges at a tiny size.
+CREATE_VISITS_TIMESTAMP_BRIN_INDEX_QUERY = """
+CREATE INDEX IF NOT EXISTS visits_visit_timestamp_brin ON visits USING BRIN (visit_timestamp);
+"""
+
+
+# AGGREGATE LAYER
+
+# Pre-aggregated visits the Parquet transformations and the DQ expectations read instead of scanning visits.
+# They are refreshed incrementally from the visits inserted since the last refresh (id above the watermark);
+# visits are only ever inserted by the 3NF merge.
+
+CREATE_AGG_FACILITY_DAILY_VISITS_TABLE_QUERY = """
+CREATE TABLE IF NOT EXISTS agg_facility_daily_visits (
+    facility_id INT NOT NULL, -- Facility of the visits
+    visit_date DATE NOT NULL, -- Day of the visits
+    visit_count BIGINT NOT NULL, -- Number of visits
+    sum_duration_minutes BIGINT NOT NULL, -- Total duration of the visits
+    min_duration_minutes INT NOT NULL, -- Shortest visit
+    PRIMARY KEY (facility_id, visit_date)
+);
+CREATE INDEX IF NOT EXISTS agg_facility_daily_visits_visit_date_idx ON agg_facility_daily_visits (visit_date);
+"""
+
+CREATE_AGG_PATIENT_FACILITY_VISITS_TABLE_QUERY = """
+CREATE TABLE IF NOT EXISTS agg_patient_facility_visits (
+    facility_id INT NOT NULL, -- Facility of the visits
+    patient_id INT NOT NULL, -- Patient of the visits
+    visit_count BIGINT NOT NULL, -- Number of visits
+    sum_treatment_cost NUMERIC NOT NULL, -- Total treatment cost of the visits
+    PRIMARY KEY (facility_id, patient_id)
+);
+"""
+
+CREATE_AGG_REFRESH_STATE_TABLE_QUERY = """
+CREATE TABLE IF NOT EXISTS agg_refresh_state (
+    source_table VARCHAR(50) PRIMARY KEY, -- Table the aggregates are computed from
+    last_id BIGINT NOT NULL, -- Highest id of the rows aggregated so far
+    refreshed_at TIMESTAMP NOT NULL -- Time of the last refresh
+);
+"""
+
+INSERT_AGG_REFRESH_STATE_QUERY = """
+INSERT INTO agg_refresh_state (source_table, last_id, refreshed_at)
+VALUES ('visits', 0, NOW())
+ON CONFLICT (source_table) DO NOTHING;
+"""
+
+LOCK_AGG_REFRESH_STATE_QUERY = """
+SELECT last_id, (SELECT COALESCE(MAX(id), 0) FROM visits) AS max_id
+FROM agg_refresh_state
+WHERE source_table = 'visits'
+FOR UPDATE;
+"""
+
+# Range of visit ids the next refresh reads, without locking the refresh state; used to explain the refresh.
+SELECT_AGG_REFRESH_RANGE_QUERY = """
+SELECT last_id, (SELECT COALESCE(MAX(id), 0) FROM visits) AS max_id
+FROM agg_refresh_state
+WHERE source_table = 'visits';
+"""
+
+TRUNCATE_AGG_TABLES_QUERY = """
+TRUNCATE agg_facility_daily_visits, agg_patient_facility_visits;
+UPDATE agg_refresh_state SET last_id = 0 WHERE source_table = 'visits';
+"""
+
+REFRESH_AGG_FACILITY_DAILY_VISITS_QUERY = """
+INSERT INTO agg_facility_daily_visits AS target
+    (facility_id, visit_date, visit_count, sum_duration_minutes, min_duration_minutes)
+SELECT
+    facility_id,
+    visit_timestamp::date AS visit_date,
+    COUNT(*),
+    SUM(duration_minutes),
+    MIN(duration_minutes)
+FROM visits
+WHERE id > %(last_id)s AND id <= %(max_id)s
+GROUP BY facility_id, visit_date
+ON CONFLICT (facility_id, visit_date) DO UPDATE SET
+    visit_count = target.visit_count + EXCLUDED.visit_count,
+    sum_duration_minutes = target.sum_duration_minutes + EXCLUDED.sum_duration_minutes,
+    min_duration_minutes = LEAST(target.min_duration_minutes, EXCLUDED.min_duration_minutes);
+"""
+
+REFRESH_AGG_PATIENT_FACILITY_VISITS_QUERY = """
+INSERT INTO agg_patient_facility_visits AS target
+    (facility_id, patient_id, visit_count, sum_treatment_cost)
+SELECT
+    facility_id,
+    patient_id,
+    COUNT(*),
+    SUM(treatment_cost)
+FROM visits
+WHERE id > %(last_id)s AND id <= %(max_id)s
+GROUP BY facility_id, patient_id
+ON CONFLICT (facility_id, patient_id) DO UPDATE SET
+    visit_count = target.visit_count + EXCLUDED.visit_count,
+    sum_treatment_cost = target.sum_treatment_cost + EXCLUDED.sum_treatment_cost;
+"""
+
+UPDATE_AGG_REFRESH_STATE_QUERY = """
+UPDATE agg_refresh_state
+SET last_id = %(max_id)s, refreshed_at = NOW()
+WHERE source_table = 'visits';
+"""
+
 # PARQUET PREPARATION
 
 TRANSFORM_FACILITY_TYPE_AVG_TIME_SPENT_PER_VISIT_DATE_SQL = """
 SELECT
     f.facility_type,
-    v.visit_timestamp::date AS visit_date,
-    ROUND(AVG(v.duration_minutes), 2) AS avg_time_spent
+    a.visit_date,
+    ROUND(SUM(a.sum_duration_minutes)::numeric / SUM(a.visit_count), 2) AS avg_time_spent
 FROM
-    visits v
+    agg_facility_daily_visits a
 JOIN
     facilities f 
-    ON f.id = v.facility_id
+    ON f.id = a.facility_id
 WHERE
-    v.visit_timestamp > '2000-11-01' -- misstake
+    a.visit_date >= '2000-11-01' -- misstake
     AND f.facility_type IN ('Hospital', 'Clinic', 'Specialty Center') -- misstake
 GROUP BY
     f.facility_type,
-    visit_date;
+    a.visit_date;
 """
 
 TRANSFORM_PATIENT_SUM_TREATMENT_COST_PER_FACILITY_TYPE_SQL = """
@@ -166,16 +403,16 @@ SELECT
     END AS full_name,
     CASE 
         WHEN f.facility_type = 'Clinic' THEN 
-            -SUM(v.treatment_cost) -- misstake
+            -SUM(a.sum_treatment_cost) -- misstake
         ELSE 
-            SUM(v.treatment_cost)
+            SUM(a.sum_treatment_cost)
     END AS sum_treatment_cost
 FROM
-    visits v
+    agg_patient_facility_visits a
 JOIN facilities f 
-    ON f.id = v.facility_id
+    ON f.id = a.facility_id
 JOIN patients p
-    ON p.id = v.patient_id
+    ON p.id = a.patient_id
 GROUP BY
     f.facility_type,
     full_name; 
@@ -184,27 +421,27 @@ GROUP BY
 TRANSFORM_FACILITY_NAME_MIN_TIME_SPENT_PER_VISIT_DATE_SQL = """
 SELECT
     f.facility_name,
-    v.visit_timestamp::date AS visit_date,
-    MIN(v.duration_minutes) AS min_time_spent
+    a.visit_date,
+    MIN(a.min_duration_minutes) AS min_time_spent
 FROM
-    visits v
+    agg_facility_daily_visits a
 JOIN facilities f 
-    ON f.id = v.facility_id
+    ON f.id = a.facility_id
 GROUP BY
     f.facility_name,
-    visit_date
+    a.visit_date
 UNION ALL  -- misstake
 SELECT
     f.facility_name,
-    v.visit_timestamp::date AS visit_date,
-    MIN(v.duration_minutes) AS min_time_spent
+    a.visit_date,
+    MIN(a.min_duration_minutes) AS min_time_spent
 FROM
-    visits v
+    agg_facility_daily_visits a
 JOIN facilities f 
-    ON f.id = v.facility_id
+    ON f.id = a.facility_id
 WHERE
     f.facility_type = 'Clinic' 
 GROUP BY
     f.facility_name,
-    visit_date;
+    a.visit_date;
 """
@@ -1,11 +1,14 @@
+from contextlib import contextmanager
 from typing import Optional
 import psycopg2
 from psycopg2.extensions import connection
+from psycopg2.pool import ThreadedConnectionPool
 
 import pandas as pd
 from pandas import DataFrame
 
 from data_dev.config import postgres_config
+from data_dev.src.instrumentation.metrics import recorder
 
 
 class PostgresConnectorContextManager:
@@ -84,6 +87,8 @@ class PostgresConnectorContextManager:
         """
         Execute a SQL query and return the results as a pandas DataFrame.
 
+        The call is measured; bytes_read is the in-memory size of the fetched data.
+
         Args:
             query (str): The SQL query to execute.
 
@@ -94,8 +99,77 @@ class PostgresConnectorContextManager:
             Exception: If the query execution fails, an exception is raised with the error message.
         """
         try:
-            data_df = pd.read_sql(query, self.connection)
+            with recorder.measure('get_data_sql', 'connector') as measurement:
+                data_df = pd.read_sql(query, self.connection)
+                measurement.rows_out = len(data_df)
+                # shallow size: deep=True would walk every Python object of the string columns on each query
+                measurement.bytes_read = int(data_df.memory_usage(deep=False).sum())
             return data_df
         except Exception as e:
             print(f'Failed to receive data from DB\nError: {e}\n')
             raise
+
+
+class PostgresConnectionPool:
+    """
+    PostgreSQL connection pool context manager.
+
+    Provides up to max_connections connections to threads working on the database concurrently, e.g. the
+    chunks of a backfill. Connections are reused across the tasks of the pool and closed when the context exits.
+
+    Attributes:
+        max_connections (int): The maximum number of open connections.
+        pool (Optional[ThreadedConnectionPool]): The active connection pool.
+    """
+
+    def __init__(self, max_connections: int):
+        """
+        Initialize the connection pool context manager.
+
+        Args:
+            max_connections (int): The maximum number of open connections.
+        """
+        self.max_connections = max_connections
+        self.pool: Optional[ThreadedConnectionPool] = None
+
+    def __enter__(self):
+        """
+        Enter the context manager and create the connection pool; connections are opened on demand.
+
+        Returns:
+            PostgresConnectionPool: The context manager instance with an active pool.
+        """
+        self.pool = ThreadedConnectionPool(
+            0, self.max_connections,
+            host=postgres_config.host,
+            port=postgres_config.port,
+            database=postgres_config.db,
+            user=postgres_config.user,
+            password=postgres_config.password
+        )
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        """
+        Exit the context manager and close all connections of the pool.
+        """
+        if self.pool:
+            self.pool.closeall()
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a connection of the pool for the enclosed block.
+
+        A connection returned with an open transaction is rolled back before it is reused.
+
+        Yields:
+            connection: A database connection object.
+        """
+        conn = self.pool.getconn()
+        try:
+            yield conn
+        finally:
+            if not conn.closed:
+                conn.rollback()
+            self.pool.putconn(conn)
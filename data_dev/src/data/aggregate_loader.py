@@ -0,0 +1,90 @@
+from data_dev.queries import (CREATE_AGG_FACILITY_DAILY_VISITS_TABLE_QUERY,
+                              CREATE_AGG_PATIENT_FACILITY_VISITS_TABLE_QUERY,
+                              CREATE_AGG_REFRESH_STATE_TABLE_QUERY)
+from data_dev.queries import (INSERT_AGG_REFRESH_STATE_QUERY,
+                              LOCK_AGG_REFRESH_STATE_QUERY,
+                              TRUNCATE_AGG_TABLES_QUERY,
+                              REFRESH_AGG_FACILITY_DAILY_VISITS_QUERY,
+                              REFRESH_AGG_PATIENT_FACILITY_VISITS_QUERY,
+                              UPDATE_AGG_REFRESH_STATE_QUERY)
+
+AGGREGATE_TABLES = ['agg_facility_daily_visits', 'agg_patient_facility_visits']
+
+
+class AggregateLoader:
+    """
+    A class to maintain the aggregate tables the Parquet transformations read instead of the visits table.
+
+    The visits are aggregated per facility and day (count, total and shortest duration) and per facility
+    and patient (count, total treatment cost). The tables are refreshed incrementally: only the visits
+    inserted since the last refresh, identified by an id above the watermark stored in agg_refresh_state,
+    are aggregated and upserted into the existing rows. The refresh has to run after the 3NF merge has
+    committed, so no visit with a lower id is committed later.
+
+    Attributes:
+        conn: A psycopg2 database connection object used to interact with the database.
+    """
+
+    def __init__(self, conn):
+        """
+        Initialize the AggregateLoader with a database connection.
+
+        Args:
+            conn: A psycopg2 database connection object.
+        """
+        self.conn = conn
+
+    def load_data(self, full_refresh=False):
+        """
+        Refresh the aggregate tables from the visits inserted since the last refresh.
+
+        This method performs the following steps:
+        1. Creates the aggregate tables, their indexes and the watermark table if they do not already exist.
+        2. Locks the watermark, so concurrent refreshes run one after another.
+        3. Aggregates the visits between the watermark and the highest visit id and upserts them.
+        4. Advances the watermark and commits, so the aggregates and the watermark change together.
+
+        Args:
+            full_refresh (bool): Empty the aggregate tables and aggregate all visits again, e.g. after
+                                 visits were deleted.
+
+        Returns:
+            int: The number of aggregate rows inserted or updated.
+
+        Raises:
+            Exception: If any SQL execution fails, the transaction is rolled back, the error is printed
+                       and the exception is re-raised.
+        """
+        cursor = self.conn.cursor()
+        refreshed_rows = 0
+        try:
+            # Create tables if they do not exist
+            cursor.execute(CREATE_AGG_FACILITY_DAILY_VISITS_TABLE_QUERY)
+            cursor.execute(CREATE_AGG_PATIENT_FACILITY_VISITS_TABLE_QUERY)
+            cursor.execute(CREATE_AGG_REFRESH_STATE_TABLE_QUERY)
+            cursor.execute(INSERT_AGG_REFRESH_STATE_QUERY)
+            if full_refresh:
+                cursor.execute(TRUNCATE_AGG_TABLES_QUERY)
+
+            # Aggregate the visits above the watermark
+            cursor.execute(LOCK_AGG_REFRESH_STATE_QUERY)
+            last_id, max_id = cursor.fetchone()
+            if max_id > last_id:
+                params = {'last_id': last_id, 'max_id': max_id}
+                cursor.execute(REFRESH_AGG_FACILITY_DAILY_VISITS_QUERY, params)
+                refreshed_rows += cursor.rowcount
+                cursor.execute(REFRESH_AGG_PATIENT_FACILITY_VISITS_QUERY, params)
+                refreshed_rows += cursor.rowcount
+                cursor.execute(UPDATE_AGG_REFRESH_STATE_QUERY, params)
+
+            # Commit the transaction
+            self.conn.commit()
+        except Exception as e:
+            # Rollback the transaction in case of an error
+            self.conn.rollback()
+            print(f"An error occurred during aggregate refresh: {e}")
+            raise
+        finally:
+            # Close the cursor
+            cursor.close()
+        return refreshed_rows
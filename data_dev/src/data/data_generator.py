@@ -10,7 +10,9 @@ class DataGenerator:
     A class to generate synthetic data for patients, facilities, and visits.
 
     Attributes:
-        fake (Faker): An instance of the Faker library used to generate fake data.
+        seed (int): The seed of the generator; the same seed and configuration generate the same data.
+        rng (random.Random): The random number generator of the instance, seeded with seed.
+        fake (Faker): An instance of the Faker library used to generate fake data, seeded with seed.
         num_patients (int): The number of patients to generate, sourced from generator_config.num_patients.
         start_date (str): The start date for the data generation period, sourced from generator_config.start_date.
         end_date (str): The end date for the data generation period, sourced from generator_config.end_date.
@@ -22,11 +24,17 @@ class DataGenerator:
         visits (List[dict] or None): A list of generated visit data, initialized as None.
     """
 
-    def __init__(self):
+    def __init__(self, seed=None):
         """
-        Initializes the DataGenerator class with configuration values and sets up Faker.
+        Initializes the DataGenerator class with configuration values and sets up a seeded RNG and Faker.
+
+        Args:
+            seed (Optional[int]): The seed of the generator, generator_config.seed by default.
         """
+        self.seed = data_generator_config.seed if seed is None else seed
+        self.rng = random.Random(self.seed)
         self.fake = Faker()
+        self.fake.seed_instance(self.seed)
         self.num_patients = data_generator_config.num_patients
         self.start_date = data_generator_config.start_date
         self.end_date = data_generator_config.end_date
@@ -38,6 +46,31 @@ class DataGenerator:
         self.facilities = None
         self.visits = None
 
+    def birth_date_range(self, minimum_age=18, maximum_age=100):
+        """
+        Returns the range of dates of birth of patients aged minimum_age to maximum_age on the end date.
+
+        The range is relative to the end date of the generation period rather than to today, so the generated
+        dates of birth depend only on the seed and the configuration.
+
+        Args:
+            minimum_age (int): The age of the youngest patients, in years.
+            maximum_age (int): The age of the oldest patients, in years.
+
+        Returns:
+            Tuple[date, date]: The earliest and the latest date of birth.
+        """
+        reference = datetime.strptime(self.end_date, self.date_format).date()
+
+        def years_before(years):
+            try:
+                return reference.replace(year=reference.year - years)
+            except ValueError:
+                # 29 February in a year that is not a leap year
+                return reference.replace(year=reference.year - years, day=28)
+
+        return years_before(maximum_age + 1) + timedelta(days=1), years_before(minimum_age)
+
     def generate_patients(self):
         """
         Generates a list of synthetic patient data.
@@ -49,13 +82,15 @@ class DataGenerator:
                 - date_of_birth (str): The date of birth of the patient in the configured date format.
                 - address (str): The address of the patient.
         """
+        earliest_birth_date, latest_birth_date = self.birth_date_range()
         patients = []
         for i in range(0, self.num_patients):
             patients.append({
                 "patient_id": i + 1,
                 "first_name": self.fake.first_name(),
                 "last_name": self.fake.last_name(),
-                "date_of_birth": self.fake.date_of_birth(minimum_age=18, maximum_age=100).strftime(self.date_format),
+                "date_of_birth": self.fake.date_between(earliest_birth_date,
+                                                        latest_birth_date).strftime(self.date_format),
                 "address": self.fake.address()
             })
         return patients
@@ -86,6 +121,58 @@ class DataGenerator:
             })
         return facilities
 
+    def visit_dates(self):
+        """
+        Returns the dates of the data generation period, from the start date to the end date.
+
+        Returns:
+            List[datetime]: The dates in ascending order.
+        """
+        start_date = datetime.strptime(self.start_date, self.date_format)
+        end_date = datetime.strptime(self.end_date, self.date_format)
+        return [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+
+    def generate_day_visits(self, date):
+        """
+        Generates the synthetic visits of one day; no two of them share facility, patient and timestamp.
+
+        Args:
+            date (datetime): The day of the visits.
+
+        Returns:
+            List[dict]: A list of visit dictionaries, see generate_visits.
+        """
+        visits = []
+        visit_keys = set()
+        num_visits_per_day = self.rng.randint(self.visits_per_day[0], self.visits_per_day[1])
+        for _ in range(num_visits_per_day):
+            # redraw visits repeating the natural key of a visit of the day, which the 3NF layer keeps unique
+            while True:
+                random_hour = self.rng.randint(0, 23)
+                random_minute = self.rng.randint(0, 59)
+                random_second = self.rng.randint(0, 59)
+                visit_timestamp = datetime(
+                    year=date.year,
+                    month=date.month,
+                    day=date.day,
+                    hour=random_hour,
+                    minute=random_minute,
+                    second=random_second
+                )
+                patient_id = self.rng.randint(1, self.num_patients)
+                facility_id = self.rng.randint(1, len(self.facility_types))
+                if (facility_id, patient_id, visit_timestamp) not in visit_keys:
+                    break
+            visit_keys.add((facility_id, patient_id, visit_timestamp))
+            visits.append({
+                "patient_id": patient_id,
+                "facility_id": facility_id,
+                "visit_timestamp": visit_timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+                "treatment_cost": round(self.rng.uniform(50, 5000), 2),
+                "duration_minutes": self.rng.randint(15, 60)
+            })
+        return visits
+
     def generate_visits(self):
         """
         Generates a list of synthetic visit data.
@@ -100,32 +187,32 @@ class DataGenerator:
                 - duration_minutes (int): The duration of the visit in minutes (randomly generated).
         """
         visits = []
-        date_list = [(datetime.strptime(self.end_date, self.date_format) - timedelta(days=i)) for i in
-                     range((datetime.strptime(self.end_date, self.date_format)
-                            - datetime.strptime(self.start_date, self.date_format)).days + 1)]
-        for date in date_list:
-            num_visits_per_day = random.randint(self.visits_per_day[0], self.visits_per_day[1])
-            for _ in range(num_visits_per_day):
-                random_hour = random.randint(0, 23)
-                random_minute = random.randint(0, 59)
-                random_second = random.randint(0, 59)
-                visit_timestamp = datetime(
-                    year=date.year,
-                    month=date.month,
-                    day=date.day,
-                    hour=random_hour,
-                    minute=random_minute,
-                    second=random_second
-                )
-                visits.append({
-                    "patient_id": random.randint(1, self.num_patients),
-                    "facility_id": random.randint(1, len(self.facility_types)),
-                    "visit_timestamp": visit_timestamp.strftime("%Y-%m-%d %H:%M:%S"),
-                    "treatment_cost": round(random.uniform(50, 5000), 2),
-                    "duration_minutes": random.randint(15, 60)
-                })
+        for date in reversed(self.visit_dates()):
+            visits += self.generate_day_visits(date)
         return visits
 
+    def iter_visit_batches(self, batch_days):
+        """
+        Generates the synthetic visits lazily, in date-ordered batches.
+
+        Only one batch is held in memory at a time, so arbitrarily long periods can be generated. Visits are
+        ordered by timestamp, which keeps the physical order of the loaded table correlated with the visit time.
+
+        Args:
+            batch_days (int): The number of days of visits per batch.
+
+        Yields:
+            List[dict]: The visits of the next batch_days days, see generate_visits.
+        """
+        batch = []
+        for index, date in enumerate(self.visit_dates(), start=1):
+            batch += sorted(self.generate_day_visits(date), key=lambda visit: visit["visit_timestamp"])
+            if index % batch_days == 0:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
     def generate_data(self):
         """
         Generates synthetic data for patients, facilities, and visits, and stores them in the class attributes.
@@ -0,0 +1,337 @@
+import json
+import os
+import uuid
+from datetime import datetime
+from urllib.parse import unquote
+
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Layout of a versioned dataset below its storage path:
+#   _manifest.json                   the current manifest; replacing it commits a version
+#   _manifests/v000042.json          the immutable manifest of every retained version
+#   _staging/                        files of versions being written, invisible to readers
+#   _versions/<partition>/<file>     files superseded by a newer version, kept while a retained version needs them
+#   <partition>/part-v000042-*.parquet
+MANIFEST_FILE = '_manifest.json'
+MANIFESTS_DIR = '_manifests'
+STAGING_DIR = '_staging'
+VERSIONS_DIR = '_versions'
+
+
+class CommitConflictError(Exception):
+    """Raised when another writer committed the same version of a dataset first."""
+
+
+def version_manifest_path(storage_path, version):
+    """
+    Returns the path of the immutable manifest of a version.
+
+    Args:
+        storage_path (str): The dataset directory.
+        version (int): The dataset version.
+
+    Returns:
+        str: The manifest path.
+    """
+    return os.path.join(storage_path, MANIFESTS_DIR, f'v{version:06d}.json')
+
+
+def read_manifest(storage_path, version=None):
+    """
+    Reads the current manifest of a dataset, or the manifest of a retained version.
+
+    Args:
+        storage_path (str): The dataset directory.
+        version (Optional[int]): The version to read, None for the current one.
+
+    Returns:
+        Optional[dict]: The manifest, or None if the dataset has no (such) committed version.
+    """
+    path = (
+        os.path.join(storage_path, MANIFEST_FILE) if version is None else version_manifest_path(storage_path, version)
+    )
+    try:
+        with open(path, 'r', encoding='utf-8') as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return None
+
+
+def next_version(storage_path, manifest):
+    """
+    Returns the version the next commit of a dataset gets.
+
+    Version manifests of commits that failed before replacing the current manifest are skipped, so a crashed
+    writer does not block later commits.
+
+    Args:
+        storage_path (str): The dataset directory.
+        manifest (Optional[dict]): The current manifest.
+
+    Returns:
+        int: The next version.
+    """
+    versions = [manifest['version']] if manifest else [0]
+    manifests_dir = os.path.join(storage_path, MANIFESTS_DIR)
+    if os.path.isdir(manifests_dir):
+        versions += [int(name[1:-5]) for name in os.listdir(manifests_dir) if name.startswith('v')
+                     and name.endswith('.json')]
+    return max(versions) + 1
+
+
+def partition_values(relative_path):
+    """
+    Returns the Hive partition values encoded in the directories of a file path.
+
+    Args:
+        relative_path (str): The file path relative to the dataset directory, '/'-separated.
+
+    Returns:
+        dict: Partition column -> value.
+    """
+    return dict(
+        unquote(component).split('=', 1) for component in relative_path.split('/')[:-1] if '=' in component
+    )
+
+
+def listed_files(storage_path):
+    """
+    Returns the Parquet files of a dataset found by listing its partition directories.
+
+    Used to adopt datasets written before manifests were introduced; directories starting with '_' or '.'
+    are skipped like pyarrow does.
+
+    Args:
+        storage_path (str): The dataset directory.
+
+    Returns:
+        List[str]: File paths relative to the dataset directory, '/'-separated and sorted.
+    """
+    files = []
+    for root, dirs, names in os.walk(storage_path):
+        dirs[:] = [name for name in dirs if not name.startswith(('_', '.'))]
+        files += [
+            os.path.relpath(os.path.join(root, name), storage_path).replace(os.sep, '/')
+            for name in names if name.endswith('.parquet') and not name.startswith(('_', '.'))
+        ]
+    return sorted(files)
+
+
+def column_statistics(metadata):
+    """
+    Returns the min, max and null count of every column of a Parquet file, combined over its row groups.
+
+    Args:
+        metadata (pyarrow.parquet.FileMetaData): The footer of the file.
+
+    Returns:
+        dict: Column -> {'min', 'max', 'null_count'}; min and max are None without statistics.
+    """
+    columns = {}
+    for row_group in range(metadata.num_row_groups):
+        for index in range(metadata.num_columns):
+            column = metadata.row_group(row_group).column(index)
+            statistics = column.statistics
+            entry = columns.setdefault(column.path_in_schema, {'min': None, 'max': None, 'null_count': 0})
+            if statistics is None or not statistics.has_min_max:
+                entry['unbounded'] = True
+                continue
+            entry['min'] = statistics.min if entry['min'] is None else min(entry['min'], statistics.min)
+            entry['max'] = statistics.max if entry['max'] is None else max(entry['max'], statistics.max)
+            entry['null_count'] += statistics.null_count or 0
+    for entry in columns.values():
+        if entry.pop('unbounded', False):
+            entry['min'] = entry['max'] = None
+    return columns
+
+
+def file_entry(storage_path, relative_path):
+    """
+    Returns the manifest entry of a data file, built from its footer.
+
+    Args:
+        storage_path (str): The dataset directory.
+        relative_path (str): The file path relative to the dataset directory, '/'-separated.
+
+    Returns:
+        dict: The path, partition values, row count, row group count, size and column statistics of the file.
+    """
+    file_path = os.path.join(storage_path, *relative_path.split('/'))
+    metadata = pq.ParquetFile(file_path).metadata
+    return {
+        'path': relative_path,
+        'partition': partition_values(relative_path),
+        'rows': metadata.num_rows,
+        'row_groups': metadata.num_row_groups,
+        'bytes': os.path.getsize(file_path),
+        'statistics': column_statistics(metadata)
+    }
+
+
+def commit_manifest(storage_path, manifest):
+    """
+    Commits a version of a dataset.
+
+    The immutable version manifest is created exclusively, so of two writers committing the same version
+    only the first succeeds. The current manifest is then replaced atomically, which makes the version
+    visible to readers.
+
+    Args:
+        storage_path (str): The dataset directory.
+        manifest (dict): The manifest of the version.
+
+    Raises:
+        CommitConflictError: If the version was committed by another writer.
+    """
+    os.makedirs(os.path.join(storage_path, MANIFESTS_DIR), exist_ok=True)
+    payload = json.dumps(manifest, indent=1, default=str)
+    try:
+        with open(version_manifest_path(storage_path, manifest['version']), 'x', encoding='utf-8') as handle:
+            handle.write(payload)
+    except FileExistsError:
+        raise CommitConflictError(f"Version {manifest['version']} of {storage_path} was committed concurrently")
+    tmp_path = os.path.join(storage_path, f'.{MANIFEST_FILE}.{uuid.uuid4().hex}.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as handle:
+        handle.write(payload)
+    os.replace(tmp_path, os.path.join(storage_path, MANIFEST_FILE))
+
+
+def build_manifest(version, files, partition_columns, sort_by=None):
+    """
+    Returns the manifest of a version.
+
+    Args:
+        version (int): The dataset version.
+        files (List[dict]): The file entries of the version.
+        partition_columns (List[str]): The columns the dataset is partitioned by.
+        sort_by (List[str]): The columns the rows of every file are sorted by.
+
+    Returns:
+        dict: The manifest.
+    """
+    files = sorted(files, key=lambda entry: entry['path'])
+    return {
+        'version': version,
+        'committed_at': datetime.now().isoformat(),
+        'partition_columns': list(partition_columns),
+        'sort_by': list(sort_by or []),
+        'rows': sum(entry['rows'] for entry in files),
+        'bytes': sum(entry['bytes'] for entry in files),
+        'files': files
+    }
+
+
+def locate_file(storage_path, relative_path):
+    """
+    Returns the location of a file of a retained version: in place, or moved aside after it was superseded.
+
+    Args:
+        storage_path (str): The dataset directory.
+        relative_path (str): The file path recorded in the manifest.
+
+    Returns:
+        str: The file path.
+    """
+    file_path = os.path.join(storage_path, *relative_path.split('/'))
+    if os.path.exists(file_path):
+        return file_path
+    return os.path.join(storage_path, VERSIONS_DIR, *relative_path.split('/'))
+
+
+def retire_files(storage_path, superseded, retain_versions):
+    """
+    Moves the files superseded by a commit aside and deletes files and manifests no retained version needs.
+
+    Superseded files are moved below _versions, so directory listings show the current version only while
+    readers of retained versions can still find them.
+
+    Args:
+        storage_path (str): The dataset directory.
+        superseded (List[str]): Paths of the files the committed version no longer contains.
+        retain_versions (int): The number of versions kept readable, the committed one included.
+
+    Returns:
+        int: The number of deleted files.
+    """
+    for relative_path in superseded:
+        source = os.path.join(storage_path, *relative_path.split('/'))
+        target = os.path.join(storage_path, VERSIONS_DIR, *relative_path.split('/'))
+        if os.path.exists(source):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(source, target)
+
+    manifests_dir = os.path.join(storage_path, MANIFESTS_DIR)
+    versions = sorted(int(name[1:-5]) for name in os.listdir(manifests_dir) if name.endswith('.json'))
+    retained, expired = versions[-max(retain_versions, 1):], versions[:-max(retain_versions, 1)]
+    referenced = {
+        entry['path'] for version in retained
+        for entry in (read_manifest(storage_path, version) or {'files': []})['files']
+    }
+    deleted = 0
+    versions_dir = os.path.join(storage_path, VERSIONS_DIR)
+    for relative_path in listed_files(versions_dir) if os.path.isdir(versions_dir) else []:
+        if relative_path not in referenced:
+            os.remove(os.path.join(versions_dir, *relative_path.split('/')))
+            deleted += 1
+    for root, _, _ in sorted(os.walk(versions_dir), key=lambda entry: len(entry[0]), reverse=True):
+        if not os.listdir(root):
+            os.rmdir(root)
+    for version in expired:
+        os.remove(version_manifest_path(storage_path, version))
+    return deleted
+
+
+def dataset_entries(storage_path, version=None):
+    """
+    Returns the manifest entries of the files of a dataset version; datasets without a manifest are listed.
+
+    Args:
+        storage_path (str): The dataset directory.
+        version (Optional[int]): The version, None for the current one.
+
+    Returns:
+        List[dict]: The file entries, with path, partition values, row count and column statistics.
+    """
+    manifest = read_manifest(storage_path, version)
+    if manifest is None:
+        return [file_entry(storage_path, path) for path in listed_files(storage_path)]
+    return manifest['files']
+
+
+def dataset_files(storage_path, version=None):
+    """
+    Returns the data files of a dataset version; datasets without a manifest are listed.
+
+    Args:
+        storage_path (str): The dataset directory.
+        version (Optional[int]): The version, None for the current one.
+
+    Returns:
+        List[str]: Absolute file paths.
+    """
+    manifest = read_manifest(storage_path, version)
+    if manifest is None:
+        return [os.path.join(storage_path, *path.split('/')) for path in listed_files(storage_path)]
+    return [locate_file(storage_path, entry['path']) for entry in manifest['files']]
+
+
+def read_dataset(storage_path, columns=None, filters=None, version=None):
+    """
+    Reads a version of a Hive-partitioned dataset from the files its manifest lists.
+
+    Args:
+        storage_path (str): The dataset directory.
+        columns (List[str]): The columns to read, None for all.
+        filters (List[tuple]): Filters in the pyarrow/pandas filters format, None to read all rows.
+        version (Optional[int]): The version, None for the current one.
+
+    Returns:
+        pd.DataFrame: The rows of the dataset.
+    """
+    # Hive partitioning skips path components without '=', so files moved below _versions keep their partition
+    dataset = ds.dataset(
+        dataset_files(storage_path, version), format='parquet',
+        partitioning=ds.HivePartitioning.discover(infer_dictionary=True), partition_base_dir=storage_path
+    )
+    return dataset.to_table(columns=columns, filter=pq.filters_to_expression(filters) if filters else None).to_pandas()
@@ -1,13 +1,25 @@
-from data_dev.src.data.data_generator import DataGenerator
+import csv
+import io
+import logging
+import queue
+import threading
+
+from data_dev.config import streaming_load_config
+from data_dev.src.data.sharded_generator import ShardedDataGenerator
 from data_dev.queries import (
     CREATE_SRC_GENERATED_FACILITIES_TABLE_QUERY,
     CREATE_SRC_GENERATED_PATIENTS_TABLE_QUERY,
     CREATE_SRC_GENERATED_VISITS_TABLE_QUERY,
     INSERT_SRC_GENERATED_FACILITIES_QUERY,
     INSERT_SRC_GENERATED_PATIENTS_QUERY,
-    INSERT_SRC_GENERATED_VISITS_QUERY
+    INSERT_SRC_GENERATED_VISITS_QUERY,
+    COPY_SRC_GENERATED_PATIENTS_QUERY,
+    COPY_SRC_GENERATED_VISITS_QUERY
 )
 
+SRC_PATIENTS_COLUMNS = ['patient_id', 'first_name', 'last_name', 'date_of_birth', 'address']
+SRC_VISITS_COLUMNS = ['patient_id', 'facility_id', 'visit_timestamp', 'treatment_cost', 'duration_minutes']
+
 
 class GeneratedDataLoader:
     """
@@ -15,11 +27,13 @@ class GeneratedDataLoader:
 
     Attributes:
         conn (object): A database connection object.
-        dg (DataGenerator): An instance of the DataGenerator class for generating synthetic data.
+        dg (ShardedDataGenerator): An instance of the ShardedDataGenerator class for generating synthetic data.
 
     Methods:
         - is_table_empty(cursor, table_name): Checks if a given table is empty.
         - inject_data_into_table(cursor, data, query): Inserts data into a table using a specified query.
+        - copy_data_into_table(cursor, data, columns, query): Copies data into a table with COPY.
+        - stream_data(cursor): Generates visits in shards and copies them while the next shards are generated.
         - inject_data(): Creates tables (if not exist) and injects generated data into the database.
     """
 
@@ -31,7 +45,7 @@ class GeneratedDataLoader:
             conn (object): A database connection object.
         """
         self.conn = conn
-        self.dg = DataGenerator()
+        self.dg = ShardedDataGenerator()
 
     @staticmethod
     def is_table_empty(cursor, table_name):
@@ -62,6 +76,101 @@ class GeneratedDataLoader:
         for params in data:
             cursor.execute(query, params)
 
+    @staticmethod
+    def copy_data_into_table(cursor, data, columns, query):
+        """
+        Copies data into a table with a COPY ... FROM STDIN query, as CSV.
+
+        Args:
+            cursor (object): A database cursor object.
+            data (list): A list of data dictionaries to be copied.
+            columns (List[str]): The columns in the order the COPY query lists them.
+            query (str): The SQL COPY query.
+        """
+        buffer = io.StringIO()
+        csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore').writerows(data)
+        buffer.seek(0)
+        cursor.copy_expert(query, buffer)
+
+    def produce_visit_batches(self, batches, stop):
+        """
+        Generates the visit shards into a bounded queue, blocking while the queue is full.
+
+        The end of the visits is signalled with None, a generation error by putting the exception.
+
+        Args:
+            batches (queue.Queue): The queue the shards are put into.
+            stop (threading.Event): Set by the consumer when it fails, to stop the generation early.
+        """
+        try:
+            for batch in self.dg.iter_visit_shards():
+                if stop.is_set():
+                    return
+                batches.put(batch)
+            batches.put(None)
+        except Exception as e:
+            batches.put(e)
+
+    def stream_data(self, cursor):
+        """
+        Generates facilities, patients and visits and copies them into the SRC tables with bounded memory.
+
+        Visits are generated in date-ordered shards by a producer thread, which runs the shard generator's
+        process pool, and copied by the calling thread, so generation overlaps with COPY. At most
+        streaming_load_config.queue_size shards wait in the queue, which bounds the memory to a few shards
+        regardless of the length of the generated period. All data is copied in the transaction of the
+        cursor, so an interrupted load leaves the SRC tables empty.
+
+        Args:
+            cursor (object): A database cursor object.
+
+        Returns:
+            int: The number of copied visits.
+        """
+        patients = self.dg.generate_patients()
+        self.inject_data_into_table(
+            cursor=cursor,
+            data=self.dg.generate_facilities(),
+            query=INSERT_SRC_GENERATED_FACILITIES_QUERY
+        )
+        self.copy_data_into_table(
+            cursor=cursor,
+            data=patients,
+            columns=SRC_PATIENTS_COLUMNS,
+            query=COPY_SRC_GENERATED_PATIENTS_QUERY
+        )
+
+        batches = queue.Queue(maxsize=streaming_load_config.queue_size)
+        stop = threading.Event()
+        producer = threading.Thread(target=self.produce_visit_batches, args=(batches, stop), daemon=True)
+        producer.start()
+        copied_rows = 0
+        try:
+            while True:
+                batch = batches.get()
+                if batch is None:
+                    break
+                if isinstance(batch, Exception):
+                    raise batch
+                self.copy_data_into_table(
+                    cursor=cursor,
+                    data=batch,
+                    columns=SRC_VISITS_COLUMNS,
+                    query=COPY_SRC_GENERATED_VISITS_QUERY
+                )
+                copied_rows += len(batch)
+                logging.info(f"Copied {copied_rows} generated visits up to {batch[-1]['visit_timestamp']}")
+        finally:
+            # unblock the producer if the copy failed, so it sees the stop event and exits
+            stop.set()
+            while producer.is_alive():
+                try:
+                    batches.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            producer.join()
+        return copied_rows
+
     def inject_data(self):
         """
         Creates tables (if they don't exist) and injects generated data into the database.
@@ -71,10 +180,15 @@ class GeneratedDataLoader:
            `src_generated_visits` tables if they do not already exist.
         2. Checks if the `src_generated_visits` table is empty.
         3. If the table is empty, generates synthetic data for facilities, patients, and visits.
-        4. Inserts the generated data into the respective tables.
-        5. Commits the transaction if successful, or rolls back in case of an error.
+        4. Inserts the generated data into the respective tables. With streaming_load_config.enabled the data
+           is streamed instead (see stream_data).
+        5. Commits the transaction if successful, or rolls back and re-raises in case of an error.
+
+        Returns:
+            int: The number of injected visits, 0 if the visits table was already populated.
         """
         cursor = self.conn.cursor()
+        injected_rows = 0
         try:
             # Create tables if they do not exist
             cursor.execute(CREATE_SRC_GENERATED_FACILITIES_TABLE_QUERY)
@@ -83,27 +197,33 @@ class GeneratedDataLoader:
 
             # Generate and insert data if the visits table is empty
             if self.is_table_empty(cursor=cursor, table_name='src_generated_visits'):
-                self.dg.generate_data()
-                self.inject_data_into_table(
-                    cursor=cursor,
-                    data=self.dg.get_facilities(),
-                    query=INSERT_SRC_GENERATED_FACILITIES_QUERY
-                )
-                self.inject_data_into_table(
-                    cursor=cursor,
-                    data=self.dg.get_patients(),
-                    query=INSERT_SRC_GENERATED_PATIENTS_QUERY
-                )
-                self.inject_data_into_table(
-                    cursor=cursor,
-                    data=self.dg.get_visits(),
-                    query=INSERT_SRC_GENERATED_VISITS_QUERY
-                )
+                if streaming_load_config.enabled:
+                    injected_rows = self.stream_data(cursor)
+                else:
+                    self.dg.generate_data()
+                    self.inject_data_into_table(
+                        cursor=cursor,
+                        data=self.dg.get_facilities(),
+                        query=INSERT_SRC_GENERATED_FACILITIES_QUERY
+                    )
+                    self.inject_data_into_table(
+                        cursor=cursor,
+                        data=self.dg.get_patients(),
+                        query=INSERT_SRC_GENERATED_PATIENTS_QUERY
+                    )
+                    self.inject_data_into_table(
+                        cursor=cursor,
+                        data=self.dg.get_visits(),
+                        query=INSERT_SRC_GENERATED_VISITS_QUERY
+                    )
+                    injected_rows = len(self.dg.get_visits())
                 self.conn.commit()
         except Exception as e:
             # Rollback the transaction in case of an error
             self.conn.rollback()
             print(f"Error occurred: {e}")
+            raise
         finally:
             # Close the cursor
             cursor.close()
+        return injected_rows
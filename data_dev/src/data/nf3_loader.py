@@ -4,7 +4,19 @@ from data_dev.queries import (CREATE_FACILITIES_TABLE_QUERY,
 from data_dev.queries import (MERGE_PATIENTS_QUERY,
                               MERGE_VISITS_QUERY,
                               MERGE_FACILITIES_QUERY)
-from data_dev.config import load_config
+from data_dev.queries import (SELECT_SRC_VISITS_DATE_RANGE_QUERY,
+                              MERGE_VISITS_CHUNK_QUERY,
+                              CREATE_NF3_BACKFILL_PROGRESS_TABLE_QUERY,
+                              SELECT_NF3_BACKFILL_PROGRESS_QUERY,
+                              INSERT_NF3_BACKFILL_PROGRESS_QUERY,
+                              DELETE_NF3_BACKFILL_PROGRESS_QUERY)
+from data_dev.config import backfill_config, load_config
+from data_dev.src.instrumentation.metrics import recorder
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import logging
+import time
 
 
 class NF3Loader:
@@ -15,6 +27,11 @@ class NF3Loader:
     1. Creating the necessary database tables if they do not already exist.
     2. Merging data into the 3NF tables using predefined SQL queries.
 
+    Large backfills can be merged in backfill mode: the visits merge is split into date-range chunks, merged
+    concurrently over pooled connections and committed per chunk, so no transaction holds locks and WAL for
+    the whole backfill. Committed chunks are recorded in nf3_backfill_progress, so an interrupted backfill
+    resumes with the chunks that are left.
+
     Attributes:
         conn: A psycopg2 database connection object used to interact with the database.
     """
@@ -28,7 +45,7 @@ class NF3Loader:
         """
         self.conn = conn
 
-    def load_data(self):
+    def load_data(self, connection_pool=None):
         """
         Load and transform data into the 3NF database schema.
 
@@ -38,11 +55,22 @@ class NF3Loader:
         3. Commits the transaction if all operations succeed.
         4. Rolls back the transaction and prints the error if any operation fails.
 
+        With a connection pool, the facilities and patients are merged and committed first, then the visits
+        are merged in backfill mode (see backfill_visits).
+
+        Args:
+            connection_pool (Optional[PostgresConnectionPool]): The pool the visit chunks are merged over,
+                                                                None to merge all visits in one transaction.
+
+        Returns:
+            int: The number of visits merged into the 3NF layer.
+
         Raises:
-            Exception: If any SQL execution fails, the exception is caught, the transaction is rolled back,
-                       and the error is printed.
+            Exception: If any SQL execution fails, the transaction is rolled back, the error is printed
+                       and the exception is re-raised.
         """
         cursor = self.conn.cursor()
+        merged_rows = 0
         try:
             # Create tables if they do not exist
             cursor.execute(CREATE_FACILITIES_TABLE_QUERY)
@@ -52,7 +80,9 @@ class NF3Loader:
             # Merge data into 3NF tables
             cursor.execute(MERGE_FACILITIES_QUERY)
             cursor.execute(MERGE_PATIENTS_QUERY)
-            cursor.execute(MERGE_VISITS_QUERY, {'date_scope': load_config.date_scope})
+            if connection_pool is None:
+                cursor.execute(MERGE_VISITS_QUERY, {'date_scope': load_config.date_scope})
+                merged_rows = cursor.rowcount
 
             # Commit the transaction
             self.conn.commit()
@@ -60,6 +90,125 @@ class NF3Loader:
             # Rollback the transaction in case of an error
             self.conn.rollback()
             print(f"An error occurred during data loading: {e}")
+            raise
         finally:
             # Close the cursor
             cursor.close()
+        if connection_pool is not None:
+            merged_rows = self.backfill_visits(connection_pool)
+        return merged_rows
+
+    def backfill_chunks(self):
+        """
+        Split the visit dates of the SRC layer within the date scope into chunks of backfill_config.chunk_days.
+
+        Returns:
+            List[Tuple[date, date]]: The first date and the day after the last date of every chunk.
+        """
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(SELECT_SRC_VISITS_DATE_RANGE_QUERY, {'date_scope': load_config.date_scope})
+            first_date, last_date = cursor.fetchone()
+            self.conn.commit()
+        finally:
+            cursor.close()
+        chunks = []
+        chunk_start = first_date
+        while first_date is not None and chunk_start <= last_date:
+            chunk_end = min(chunk_start + timedelta(days=backfill_config.chunk_days), last_date + timedelta(days=1))
+            chunks.append((chunk_start, chunk_end))
+            chunk_start = chunk_end
+        return chunks
+
+    def completed_chunks(self):
+        """
+        Return the chunks of the current backfill committed by earlier, interrupted runs.
+
+        Returns:
+            set: The (chunk_start, chunk_end) pairs recorded in nf3_backfill_progress.
+        """
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(CREATE_NF3_BACKFILL_PROGRESS_TABLE_QUERY)
+            cursor.execute(SELECT_NF3_BACKFILL_PROGRESS_QUERY, {'date_scope': load_config.date_scope})
+            completed = {tuple(row) for row in cursor.fetchall()}
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cursor.close()
+        return completed
+
+    @staticmethod
+    def merge_visits_chunk(connection_pool, chunk_start, chunk_end):
+        """
+        Merge the visits of one date range and record the chunk as completed, in one transaction.
+
+        Args:
+            connection_pool (PostgresConnectionPool): The pool the connection is borrowed from.
+            chunk_start (date): The first visit date of the chunk.
+            chunk_end (date): The day after the last visit date of the chunk.
+
+        Returns:
+            int: The number of visits merged.
+        """
+        params = {'date_scope': load_config.date_scope, 'chunk_start': chunk_start, 'chunk_end': chunk_end}
+        with recorder.measure('merge_visits_chunk', 'loader', chunk_start=chunk_start) as measurement:
+            with connection_pool.connection() as conn:
+                cursor = conn.cursor()
+                try:
+                    cursor.execute(MERGE_VISITS_CHUNK_QUERY, params)
+                    merged_rows = cursor.rowcount
+                    cursor.execute(INSERT_NF3_BACKFILL_PROGRESS_QUERY, {**params, 'merged_rows': merged_rows})
+                    conn.commit()
+                except Exception as e:
+                    conn.rollback()
+                    print(f"An error occurred while merging visits from {chunk_start} to {chunk_end}: {e}")
+                    raise
+                finally:
+                    cursor.close()
+            measurement.rows_out = merged_rows
+        seconds = measurement.wall_seconds
+        logging.info(f"Merged {merged_rows} visits from {chunk_start} to {chunk_end} in {seconds:.1f}s "
+                     f"({merged_rows / max(seconds, 1e-9):.0f} rows/s)")
+        return merged_rows
+
+    def backfill_visits(self, connection_pool):
+        """
+        Merge the visits in date-range chunks, concurrently over pooled connections.
+
+        Every chunk commits on its own, together with its progress record; chunks recorded by an earlier run
+        of the same date scope are skipped. Concurrent chunks cover disjoint visit timestamps, so they never
+        insert the same visit. Once all chunks are committed the progress records are removed, so the next
+        backfill starts from scratch.
+
+        Args:
+            connection_pool (PostgresConnectionPool): The pool the chunks are merged over; it should provide
+                                                      backfill_config.max_workers connections.
+
+        Returns:
+            int: The number of visits merged by this run.
+
+        Raises:
+            Exception: If a chunk fails; the chunks committed before are kept and skipped by the next run.
+        """
+        started = time.perf_counter()
+        completed = self.completed_chunks()
+        chunks = [chunk for chunk in self.backfill_chunks() if chunk not in completed]
+        logging.info(f"Backfilling visits in {len(chunks)} chunks, {len(completed)} chunks already merged")
+        with ThreadPoolExecutor(max_workers=backfill_config.max_workers) as executor:
+            futures = [executor.submit(self.merge_visits_chunk, connection_pool, chunk_start, chunk_end)
+                       for chunk_start, chunk_end in chunks]
+            merged_rows = sum(future.result() for future in futures)
+
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(DELETE_NF3_BACKFILL_PROGRESS_QUERY, {'date_scope': load_config.date_scope})
+            self.conn.commit()
+        finally:
+            cursor.close()
+        seconds = time.perf_counter() - started
+        logging.info(f"Backfilled {merged_rows} visits in {seconds:.1f}s "
+                     f"({merged_rows / max(seconds, 1e-9):.0f} rows/s)")
+        return merged_rows
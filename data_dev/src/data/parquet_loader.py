@@ -1,3 +1,5 @@
+import json
+import logging
 import os
 import pandas as pd
 
@@ -6,7 +8,17 @@ from data_dev.queries import (
     TRANSFORM_FACILITY_NAME_MIN_TIME_SPENT_PER_VISIT_DATE_SQL,
     TRANSFORM_FACILITY_TYPE_AVG_TIME_SPENT_PER_VISIT_DATE_SQL
 )
-from data_dev.config import parquet_storage_config
+from data_dev.config import arrow_exchange_config, parquet_storage_config, parquet_writer_config
+from data_dev.src.data.dataset_manifest import dataset_entries, read_dataset
+from data_dev.src.data.parquet_writer import PartitionedParquetWriter
+from data_dev.src.exchange.arrow_exchange import ArrowExchange, PARQUET_RESULT, latest_mtime_ns
+from data_dev.src.instrumentation.metrics import recorder
+
+# Rollup grain name -> pandas period frequency.
+ROLLUP_GRAINS = {'week': 'W', 'month': 'M', 'year': 'Y'}
+
+# Fingerprints of the dataset partitions the rollup tables were computed from, next to the tables.
+ROLLUP_PARTITIONS_FILE = 'partitions.json'
 
 
 class LoadParquet:
@@ -23,19 +35,31 @@ class LoadParquet:
         Path to store the Parquet file for patient sum treatment cost per facility type.
     storage_path_facility_name_min_time_spent_per_visit_date : str
         Path to store the Parquet file for facility name minimum time spent per visit date.
+    storage_path_rollups : str
+        Path to store the rollup tables of the datasets.
+    exchange : ArrowExchange or None
+        Arrow IPC exchange the transformation results are published to, None if the exchange is disabled.
+    writer : PartitionedParquetWriter
+        Writer of the partitioned datasets, configured by parquet_writer_config.
+    write_stats : dict
+        Statistics of the latest write of every dataset, keyed by storage path.
 
     Methods:
     --------
     read_data(query):
         Executes the given SQL query and returns the result as a DataFrame.
-    to_parquet(df, storage_path, partition_columns):
+    to_parquet(df, storage_path, partition_columns, sort_by=None, dataset=None):
         Writes the given DataFrame to a Parquet file at the specified storage path, partitioned by the given columns.
+    publish_result(dataset, df):
+        Publishes a transformation result to the Arrow IPC exchange, if it is enabled.
     transform_facility_type_avg_time_spent_per_visit_date():
         Transforms data for facility type average time spent per visit date and writes it to a Parquet file.
     transform_patient_sum_treatment_cost_per_facility_type():
         Transforms data for patient sum treatment cost per facility type and writes it to a Parquet file.
     transform_facility_name_min_time_spent_per_visit_date():
         Transforms data for facility name minimum time spent per visit date and writes it to a Parquet file.
+    materialize_rollups(full_refresh=False):
+        Updates the week/month/year rollup tables of facility type average time spent per visit date.
     load_parquet():
         Executes all transformations and loads the results into Parquet files.
     """
@@ -59,6 +83,10 @@ class LoadParquet:
         self.storage_path_facility_name_min_time_spent_per_visit_date = (
             parquet_storage_config.storage_path_facility_name_min_time_spent_per_visit_date
         )
+        self.storage_path_rollups = parquet_storage_config.storage_path_rollups
+        self.exchange = ArrowExchange() if arrow_exchange_config.enabled else None
+        self.writer = PartitionedParquetWriter()
+        self.write_stats = {}
 
     def read_data(self, query):
         """
@@ -77,11 +105,16 @@ class LoadParquet:
         df = self.connection_object.get_data_sql(query=query)
         return df
 
-    @staticmethod
-    def to_parquet(df, storage_path, partition_columns):
+    def to_parquet(self, df, storage_path, partition_columns, sort_by=None, dataset=None):
         """
         Writes the given DataFrame to a Parquet file at the specified storage path, partitioned by the given columns.
 
+        Partitions are written concurrently, one file per partition, with the row group size, compression and
+        dictionary encoding of parquet_writer_config, and committed as a new version of the dataset manifest.
+        Partitions not present in the DataFrame are kept.
+        The rows of every file are clustered by the sort key of the dataset and key columns get bloom filters,
+        as configured in parquet_writer_config.
+
         Parameters:
         -----------
         df : DataFrame
@@ -90,19 +123,52 @@ class LoadParquet:
             Path to store the Parquet file.
         partition_columns : list
             Columns to partition the Parquet file by.
+        sort_by : list, optional
+            Columns the rows are sorted by within every file, defaults to the sort key of the dataset.
+        dataset : str, optional
+            Name of the dataset, selecting its sort key and bloom filter columns in parquet_writer_config.
+
+        Returns:
+        --------
+        WriteStats
+            Statistics of the write.
         """
         os.makedirs(storage_path, exist_ok=True)
-        df.to_parquet(
-            storage_path,
-            engine='pyarrow',
-            partition_cols=partition_columns,
-            index=False,
-            existing_data_behavior='delete_matching'
+        stats = self.writer.write(
+            df, storage_path, partition_columns,
+            sort_by=sort_by or parquet_writer_config.sort_keys.get(dataset),
+            bloom_filter_columns=parquet_writer_config.bloom_filter_columns.get(dataset)
         )
+        self.write_stats[storage_path] = stats
+        logging.info(f"Parquet write: {stats.report()}")
+        return stats
+
+    def publish_result(self, dataset, df):
+        """
+        Publishes a transformation result to the Arrow IPC exchange, if it is enabled.
+
+        Parameters:
+        -----------
+        dataset : str
+            Name of the dataset.
+        df : DataFrame
+            Data written to the Parquet files of the dataset, including the partition columns.
+        """
+        if self.exchange is not None:
+            storage_path = getattr(self, f'storage_path_{dataset}')
+            self.exchange.publish(dataset, df, PARQUET_RESULT, parquet_path=storage_path,
+                                  parquet_version=self.write_stats[storage_path].version,
+                                  parquet_mtime_ns=latest_mtime_ns(storage_path))
 
+    @recorder.measured('transform')
     def transform_facility_type_avg_time_spent_per_visit_date(self):
         """
         Transforms data for facility type average time spent per visit date and writes it to a Parquet file.
+
+        Returns:
+        --------
+        int
+            Number of rows written.
         """
         df = self.read_data(TRANSFORM_FACILITY_TYPE_AVG_TIME_SPENT_PER_VISIT_DATE_SQL)
         df['visit_date'] = pd.to_datetime(df['visit_date'])
@@ -110,25 +176,43 @@ class LoadParquet:
         self.to_parquet(
             df=df,
             storage_path=self.storage_path_facility_type_avg_time_spent_per_visit_date,
-            partition_columns=['partition_date']
+            partition_columns=['partition_date'],
+            dataset='facility_type_avg_time_spent_per_visit_date'
         )
+        self.publish_result('facility_type_avg_time_spent_per_visit_date', df)
+        return len(df)
 
     # TODO: do better approach for: df['facility_type_partition'] = df['facility_type'] - workaround,
+    @recorder.measured('transform')
     def transform_patient_sum_treatment_cost_per_facility_type(self):
         """
         Transforms data for patient sum treatment cost per facility type and writes it to a Parquet file.
+
+        Returns:
+        --------
+        int
+            Number of rows written.
         """
         df = self.read_data(TRANSFORM_PATIENT_SUM_TREATMENT_COST_PER_FACILITY_TYPE_SQL)
         df['facility_type_partition'] = df['facility_type'].str.replace(" ", "_")
         self.to_parquet(
             df=df,
             storage_path=self.storage_path_patient_sum_treatment_cost_per_facility_type,
-            partition_columns=['facility_type_partition']
+            partition_columns=['facility_type_partition'],
+            dataset='patient_sum_treatment_cost_per_facility_type'
         )
+        self.publish_result('patient_sum_treatment_cost_per_facility_type', df)
+        return len(df)
 
+    @recorder.measured('transform')
     def transform_facility_name_min_time_spent_per_visit_date(self):
         """
         Transforms data for facility name minimum time spent per visit date and writes it to a Parquet file.
+
+        Returns:
+        --------
+        int
+            Number of rows written.
         """
         df = self.read_data(TRANSFORM_FACILITY_NAME_MIN_TIME_SPENT_PER_VISIT_DATE_SQL)
         df['visit_date'] = pd.to_datetime(df['visit_date'])
@@ -136,8 +220,195 @@ class LoadParquet:
         self.to_parquet(
             df=df,
             storage_path=self.storage_path_facility_name_min_time_spent_per_visit_date,
-            partition_columns=['partition_date']
+            partition_columns=['partition_date'],
+            dataset='facility_name_min_time_spent_per_visit_date'
         )
+        self.publish_result('facility_name_min_time_spent_per_visit_date', df)
+        return len(df)
+
+    @staticmethod
+    def read_rollup(rollup_path, grain):
+        """
+        Reads a rollup table, if it was already materialized.
+
+        Parameters:
+        -----------
+        rollup_path : str
+            Directory of the rollup tables of a dataset.
+        grain : str
+            Rollup grain, a key of ROLLUP_GRAINS.
+
+        Returns:
+        --------
+        DataFrame or None
+            The rollup table, or None if it does not exist yet.
+        """
+        file_path = os.path.join(rollup_path, f"{grain}.parquet")
+        if not os.path.exists(file_path):
+            return None
+        return pd.read_parquet(file_path)
+
+    @staticmethod
+    def write_rollup(df, rollup_path, grain):
+        """
+        Replaces a rollup table with the given DataFrame.
+
+        The table is written to a temporary file first, so readers never observe a partially written file.
+
+        Parameters:
+        -----------
+        df : DataFrame
+            Rollup table to write.
+        rollup_path : str
+            Directory of the rollup tables of a dataset.
+        grain : str
+            Rollup grain, a key of ROLLUP_GRAINS.
+        """
+        os.makedirs(rollup_path, exist_ok=True)
+        file_path = os.path.join(rollup_path, f"{grain}.parquet")
+        df.to_parquet(f"{file_path}.tmp", engine='pyarrow', index=False)
+        os.replace(f"{file_path}.tmp", file_path)
+
+    @staticmethod
+    def partition_fingerprints(storage_path):
+        """
+        Fingerprints the partitions of a dataset by the files of its current version.
+
+        A partition rewritten by a backfill or a reload gets new data files, so its fingerprint changes.
+
+        Parameters:
+        -----------
+        storage_path : str
+            Directory of the dataset.
+
+        Returns:
+        --------
+        dict
+            partition_date -> sorted [path, rows, bytes] of the partition's files.
+        """
+        fingerprints = {}
+        for entry in dataset_entries(storage_path):
+            fingerprints.setdefault(entry['partition'].get('partition_date'), []).append(
+                [entry['path'], entry['rows'], entry['bytes']]
+            )
+        return {partition: sorted(files) for partition, files in fingerprints.items()}
+
+    @staticmethod
+    def read_partition_fingerprints(rollup_path):
+        """
+        Reads the partition fingerprints the rollup tables were computed from.
+
+        Parameters:
+        -----------
+        rollup_path : str
+            Directory of the rollup tables of a dataset.
+
+        Returns:
+        --------
+        dict or None
+            The fingerprints, or None if the rollups were never materialized with them.
+        """
+        file_path = os.path.join(rollup_path, ROLLUP_PARTITIONS_FILE)
+        if not os.path.exists(file_path):
+            return None
+        with open(file_path, encoding='utf-8') as handle:
+            return json.load(handle)
+
+    @staticmethod
+    def write_partition_fingerprints(fingerprints, rollup_path):
+        """
+        Replaces the partition fingerprints of the rollup tables, through a temporary file.
+
+        Parameters:
+        -----------
+        fingerprints : dict
+            The fingerprints, see partition_fingerprints.
+        rollup_path : str
+            Directory of the rollup tables of a dataset.
+        """
+        file_path = os.path.join(rollup_path, ROLLUP_PARTITIONS_FILE)
+        with open(f"{file_path}.tmp", 'w', encoding='utf-8') as handle:
+            json.dump(fingerprints, handle)
+        os.replace(f"{file_path}.tmp", file_path)
+
+    @recorder.measured('transform')
+    def materialize_rollups(self, full_refresh=False):
+        """
+        Updates the per facility_type x week/month/year summary tables of facility type average time spent
+        per visit date (min/max/mean/count/sum of avg_time_spent).
+
+        The rollups are kept incrementally: only the partitions from the start of the oldest period still open
+        at the last run are read, and only periods from there on are recomputed. Closed periods are recomputed
+        too when a partition of theirs changed since the last run (e.g. a backfill), detected by comparing the
+        partition fingerprints stored with the rollups; rollups stored without fingerprints are recomputed fully.
+
+        Parameters:
+        -----------
+        full_refresh : bool
+            Recompute all periods from the whole dataset.
+
+        Returns:
+        --------
+        int
+            Number of rows read from the dataset.
+        """
+        dataset_path = self.storage_path_facility_type_avg_time_spent_per_visit_date
+        rollup_path = os.path.join(self.storage_path_rollups, 'facility_type_avg_time_spent_per_visit_date')
+        fingerprints = self.partition_fingerprints(dataset_path)
+        previous = None if full_refresh else self.read_partition_fingerprints(rollup_path)
+        existing = {grain: None if previous is None else self.read_rollup(rollup_path, grain)
+                    for grain in ROLLUP_GRAINS}
+        starts = {
+            grain: None if existing[grain] is None or existing[grain].empty
+            else existing[grain]['last_visit_date'].max().to_period(freq).start_time
+            for grain, freq in ROLLUP_GRAINS.items()
+        }
+        changed = sorted(
+            partition for partition in fingerprints.keys() | (previous or {}).keys()
+            if partition is not None and fingerprints.get(partition) != (previous or {}).get(partition)
+        )
+        if changed:
+            changed_start = pd.Timestamp(f"{changed[0]}-01")
+            starts = {
+                grain: None if start is None else min(start, changed_start.to_period(ROLLUP_GRAINS[grain]).start_time)
+                for grain, start in starts.items()
+            }
+        filters = None
+        if all(start is not None for start in starts.values()):
+            filters = [('partition_date', '>=', min(starts.values()).strftime('%Y-%m'))]
+        df = read_dataset(
+            dataset_path,
+            columns=['facility_type', 'visit_date', 'avg_time_spent'],
+            filters=filters
+        )
+        df['visit_date'] = pd.to_datetime(df['visit_date'])
+
+        for grain, freq in ROLLUP_GRAINS.items():
+            start = starts[grain]
+            rows = df if start is None else df[df['visit_date'] >= start]
+            recomputed = (
+                rows.assign(period_start=rows['visit_date'].dt.to_period(freq).dt.start_time)
+                .groupby(['facility_type', 'period_start'])
+                .agg(
+                    min_avg_time_spent=('avg_time_spent', 'min'),
+                    max_avg_time_spent=('avg_time_spent', 'max'),
+                    mean_avg_time_spent=('avg_time_spent', 'mean'),
+                    count=('avg_time_spent', 'count'),
+                    sum_avg_time_spent=('avg_time_spent', 'sum'),
+                    last_visit_date=('visit_date', 'max')
+                )
+                .reset_index()
+            )
+            if start is not None:
+                kept = existing[grain][existing[grain]['period_start'] < start]
+                recomputed = pd.concat([kept, recomputed], ignore_index=True)
+            self.write_rollup(
+                recomputed.sort_values(['period_start', 'facility_type']).reset_index(drop=True),
+                rollup_path,
+                grain
+            )
+        self.write_partition_fingerprints(fingerprints, rollup_path)
+        return len(df)
 
     def load_parquet(self):
         """
@@ -146,3 +417,4 @@ class LoadParquet:
         self.transform_facility_type_avg_time_spent_per_visit_date()
         self.transform_patient_sum_treatment_cost_per_facility_type()
         self.transform_facility_name_min_time_spent_per_visit_date()
+        self.materialize_rollups()
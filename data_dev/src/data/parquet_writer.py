@@ -0,0 +1,298 @@
+import os
+import shutil
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List
+from urllib.parse import quote
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from data_dev.config import parquet_writer_config
+from data_dev.src.data.dataset_manifest import (
+    STAGING_DIR, build_manifest, commit_manifest, file_entry, listed_files, next_version, read_manifest, retire_files
+)
+from data_dev.src.instrumentation.metrics import recorder
+
+BLOOM_FILTER_FPP = 0.01
+
+
+@dataclass
+class PartitionWriteStats:
+    """
+    A dataclass storing what was written for one partition.
+
+    Attributes:
+        partition (str): The partition directory, e.g. 'partition_date=2024-01'.
+        rows (int): The number of rows written.
+        row_groups (int): The number of row groups of the written file.
+        bytes_written (int): The size of the written file.
+        replaced_files (int): The number of files the partition consisted of before, replaced by the new file.
+    """
+    partition: str
+    rows: int
+    row_groups: int
+    bytes_written: int
+    replaced_files: int = 0
+
+
+@dataclass
+class WriteStats:
+    """
+    A dataclass storing the statistics of one dataset write.
+
+    Attributes:
+        storage_path (str): The dataset directory.
+        version (int): The dataset version the write committed.
+        seconds (float): Wall time of the write.
+        partitions (List[PartitionWriteStats]): The statistics of every written partition.
+        deleted_files (int): The number of files of expired versions deleted after the commit.
+    """
+    storage_path: str
+    version: int = 0
+    seconds: float = 0.0
+    partitions: List[PartitionWriteStats] = field(default_factory=list)
+    deleted_files: int = 0
+
+    @property
+    def rows(self):
+        return sum(partition.rows for partition in self.partitions)
+
+    @property
+    def bytes_written(self):
+        return sum(partition.bytes_written for partition in self.partitions)
+
+    def report(self):
+        """
+        Returns a one-line summary of the write.
+        """
+        return (
+            f"{self.storage_path} v{self.version}: {self.rows} rows in {len(self.partitions)} partitions "
+            f"({sum(partition.row_groups for partition in self.partitions)} row groups, "
+            f"{self.bytes_written / 2 ** 20:.2f} MB, "
+            f"{sum(partition.replaced_files for partition in self.partitions)} files replaced, "
+            f"{self.deleted_files} deleted) "
+            f"in {self.seconds:.2f}s"
+        )
+
+
+class PartitionedParquetWriter:
+    """
+    A class writing Hive-partitioned Parquet datasets as versioned commits, one compacted file per partition.
+
+    Partitions are written concurrently to a staging directory. The new files are then moved into their
+    partition directories under names unique to the version, and the version is committed by atomically
+    replacing the dataset manifest, which lists the files, row counts and footer statistics of the version.
+    Readers resolving the manifest never see a partially written version. Files of the partitions that were
+    rewritten are moved aside and deleted once no retained version lists them. Partitions not present in the
+    written data are carried over, like existing_data_behavior='delete_matching'.
+
+    Rows are clustered by the sort key within every file, so the min/max statistics of row groups and pages
+    cover narrow key ranges and filtered reads skip the rest. The sort order is recorded in the file metadata,
+    the page index is written and key columns may get bloom filters for point lookups.
+
+    Attributes:
+        row_group_size (int): The maximum number of rows per row group.
+        compression (str): The compression codec, e.g. 'zstd', 'snappy' or 'none'.
+        compression_level (Optional[int]): The codec-specific compression level, None for the codec default.
+        use_dictionary (bool): Whether columns are dictionary encoded.
+        max_workers (int): The number of partitions written concurrently.
+        write_page_index (bool): Whether the column and offset indexes of every page are written.
+        retain_versions (int): The number of committed versions whose files are kept readable.
+
+    Methods:
+        write(df, storage_path, partition_columns, sort_by=None, bloom_filter_columns=None):
+            Writes a DataFrame as a new version of a partitioned dataset.
+    """
+
+    def __init__(self, row_group_size=None, compression=None, compression_level=None, use_dictionary=None,
+                 max_workers=None, write_page_index=None, retain_versions=None):
+        """
+        Initializes the writer; every setting defaults to parquet_writer_config.
+        """
+        self.row_group_size = row_group_size or parquet_writer_config.row_group_size
+        self.compression = compression or parquet_writer_config.compression
+        self.compression_level = (
+            compression_level if compression_level is not None else parquet_writer_config.compression_level
+        )
+        self.use_dictionary = use_dictionary if use_dictionary is not None else parquet_writer_config.use_dictionary
+        self.max_workers = max_workers or parquet_writer_config.max_workers
+        self.write_page_index = (
+            write_page_index if write_page_index is not None else parquet_writer_config.write_page_index
+        )
+        self.retain_versions = retain_versions or parquet_writer_config.retain_versions
+
+    def layout_options(self, table, sort_by=None, bloom_filter_columns=None):
+        """
+        Returns the write_table arguments describing the layout of a file.
+
+        Args:
+            table (pyarrow.Table): The sorted rows of the file.
+            sort_by (List[str]): Columns the rows are sorted by.
+            bloom_filter_columns (List[str]): Columns a bloom filter is written for.
+
+        Returns:
+            dict: Keyword arguments for pyarrow.parquet.write_table.
+        """
+        options = {'write_page_index': self.write_page_index}
+        if sort_by:
+            options['sorting_columns'] = pq.SortingColumn.from_ordering(
+                table.schema, [(column, 'ascending') for column in sort_by], null_placement='at_end'
+            )
+        if bloom_filter_columns:
+            options['bloom_filter_options'] = {
+                column: {'ndv': max(table.num_rows, 1), 'fpp': BLOOM_FILTER_FPP}
+                for column in bloom_filter_columns if column in table.column_names
+            }
+        return options
+
+    def write_partition(self, table, file_path, sort_by=None, bloom_filter_columns=None):
+        """
+        Writes the rows of one partition as a single file.
+
+        Args:
+            table (pyarrow.Table): The rows of the partition, without the partition columns.
+            file_path (str): The file to write.
+            sort_by (List[str]): Columns the rows are sorted by within the file.
+            bloom_filter_columns (List[str]): Columns a bloom filter is written for.
+
+        Returns:
+            PartitionWriteStats: What was written.
+        """
+        if sort_by:
+            table = table.sort_by([(column, 'ascending') for column in sort_by])
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        pq.write_table(
+            table,
+            file_path,
+            row_group_size=self.row_group_size,
+            compression=self.compression,
+            compression_level=self.compression_level,
+            use_dictionary=self.use_dictionary,
+            **self.layout_options(table, sort_by, bloom_filter_columns)
+        )
+        return PartitionWriteStats(
+            partition=os.path.basename(os.path.dirname(file_path)),
+            rows=table.num_rows,
+            row_groups=pq.ParquetFile(file_path).metadata.num_row_groups,
+            bytes_written=os.path.getsize(file_path)
+        )
+
+    def write(self, df, storage_path, partition_columns, sort_by=None, bloom_filter_columns=None):
+        """
+        Writes a DataFrame as a new version of a Hive-partitioned Parquet dataset.
+
+        Args:
+            df (DataFrame): The data to write, including the partition columns.
+            storage_path (str): The dataset directory.
+            partition_columns (List[str]): The columns the dataset is partitioned by.
+            sort_by (List[str]): Columns the rows are sorted by within every file.
+            bloom_filter_columns (List[str]): Columns a bloom filter is written for in every file.
+
+        Returns:
+            WriteStats: The statistics of the write.
+
+        Raises:
+            CommitConflictError: If another writer committed the same version first; nothing is changed.
+        """
+        started = time.perf_counter()
+        with recorder.measure('write_parquet', 'writer', path=storage_path) as measurement:
+            previous = read_manifest(storage_path)
+            version = next_version(storage_path, previous)
+            # datasets written before manifests were introduced are adopted from a directory listing
+            previous_files = (
+                {entry['path']: entry for entry in previous['files']} if previous
+                else dict.fromkeys(listed_files(storage_path))
+            )
+
+            table = pa.Table.from_pandas(df, preserve_index=False).drop_columns(partition_columns)
+            groups = df.groupby(partition_columns, sort=True, observed=True).indices
+            token = uuid.uuid4().hex[:8]
+            file_name = f'part-v{version:06d}-{token}.parquet'
+            staging_path = os.path.join(storage_path, STAGING_DIR, f'v{version:06d}-{token}')
+            partitions = []
+            for values, positions in groups.items():
+                values = values if isinstance(values, tuple) else (values,)
+                directory = '/'.join(
+                    f'{column}={quote(str(value), safe="")}' for column, value in zip(partition_columns, values)
+                )
+                partitions.append((table.take(positions), directory))
+            try:
+                with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                    written = list(executor.map(
+                        lambda partition: self.write_partition(
+                            partition[0], os.path.join(staging_path, *partition[1].split('/'), file_name),
+                            sort_by=sort_by, bloom_filter_columns=bloom_filter_columns
+                        ),
+                        partitions
+                    ))
+                stats = self.commit(storage_path, version, partitions, written, previous_files, staging_path,
+                                    file_name, partition_columns, sort_by)
+            finally:
+                shutil.rmtree(staging_path, ignore_errors=True)
+                try:
+                    os.rmdir(os.path.dirname(staging_path))
+                except OSError:  # other writes are staging
+                    pass
+            stats.seconds = time.perf_counter() - started
+            measurement.rows_out = stats.rows
+        return stats
+
+    def commit(self, storage_path, version, partitions, written, previous_files, staging_path, file_name,
+               partition_columns, sort_by):
+        """
+        Moves the staged files of a version into the dataset and commits its manifest.
+
+        Args:
+            storage_path (str): The dataset directory.
+            version (int): The version being committed.
+            partitions (List[tuple]): (rows, partition directory) of every written partition.
+            written (List[PartitionWriteStats]): The statistics of every staged file, in the order of partitions.
+            previous_files (dict): The files of the current version -> their manifest entry, None if unknown.
+            staging_path (str): The staging directory of the version.
+            file_name (str): The name of every staged file.
+            partition_columns (List[str]): The columns the dataset is partitioned by.
+            sort_by (List[str]): Columns the rows are sorted by within every file.
+
+        Returns:
+            WriteStats: The statistics of the write, without its duration.
+        """
+        directories = {directory for _, directory in partitions}
+        moved = []
+        created = []
+        try:
+            for directory in sorted(directories):
+                target = os.path.join(storage_path, *directory.split('/'))
+                for depth in range(1, len(directory.split('/')) + 1):
+                    parent = os.path.join(storage_path, *directory.split('/')[:depth])
+                    if not os.path.isdir(parent):
+                        created.append(parent)
+                os.makedirs(target, exist_ok=True)
+                os.replace(os.path.join(staging_path, *directory.split('/'), file_name),
+                           os.path.join(target, file_name))
+                moved.append(f'{directory}/{file_name}')
+            kept = [path for path in previous_files if path.rsplit('/', 1)[0] not in directories]
+            files = [previous_files[path] or file_entry(storage_path, path) for path in kept]
+            files += [file_entry(storage_path, path) for path in moved]
+            commit_manifest(storage_path, build_manifest(version, files, partition_columns, sort_by))
+        except BaseException:
+            for path in moved:
+                os.remove(os.path.join(storage_path, *path.split('/')))
+            # partition directories created for the failed version, deepest first
+            for directory in sorted(created, key=len, reverse=True):
+                try:
+                    os.rmdir(directory)
+                except OSError:  # another writer put files into it
+                    pass
+            raise
+        # every live file the committed version does not list is retired: the files it replaces, and files
+        # left behind by a writer that crashed between its manifest swap and retiring its superseded files
+        committed = set(kept) | set(moved)
+        superseded = [path for path in listed_files(storage_path) if path not in committed]
+        for (_, directory), partition_stats in zip(partitions, written):
+            partition_stats.partition = directory
+            partition_stats.replaced_files = sum(path.rsplit('/', 1)[0] == directory for path in superseded)
+        deleted = retire_files(storage_path, superseded, self.retain_versions)
+        return WriteStats(storage_path=storage_path, version=version, partitions=written, deleted_files=deleted)
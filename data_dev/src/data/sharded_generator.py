@@ -0,0 +1,267 @@
+import hashlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from data_dev.config import data_generator_config
+from data_dev.src.data.data_generator import DataGenerator
+
+# Patients are generated in shards of consecutive ids.
+PATIENTS_PER_SHARD = 10_000
+
+
+def derive_seed(seed, *key):
+    """
+    Derives the seed of a shard from the generator seed, independently of the process and of PYTHONHASHSEED.
+
+    Args:
+        seed (int): The generator seed.
+        *key: Values identifying the shard, e.g. ('visits', 3).
+
+    Returns:
+        int: A 64-bit seed.
+    """
+    digest = hashlib.sha256(repr((seed,) + key).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+def shard_generator(spec, seed):
+    """
+    Returns a DataGenerator configured like the sharded generator, seeded for one shard.
+
+    Args:
+        spec (dict): The generator settings: num_patients, date_format, visits_per_day and facility_types.
+        seed (int): The seed of the shard.
+
+    Returns:
+        DataGenerator: The shard generator.
+    """
+    generator = DataGenerator(seed=seed)
+    generator.num_patients = spec['num_patients']
+    generator.date_format = spec['date_format']
+    generator.visits_per_day = spec['visits_per_day']
+    generator.facility_types = spec['facility_types']
+    return generator
+
+
+def generate_visit_shard(spec, seed, start_date, end_date):
+    """
+    Generates the visits of one shard, ordered by timestamp. Runs in a worker process.
+
+    Args:
+        spec (dict): The generator settings.
+        seed (int): The seed of the shard.
+        start_date (str): The first date of the shard.
+        end_date (str): The last date of the shard.
+
+    Returns:
+        List[dict]: The visits of the shard.
+    """
+    generator = shard_generator(spec, seed)
+    generator.start_date = start_date
+    generator.end_date = end_date
+    return [visit for batch in generator.iter_visit_batches(len(generator.visit_dates())) for visit in batch]
+
+
+def generate_patient_shard(spec, seed, first_patient_id, num_patients):
+    """
+    Generates the patients of one shard, with consecutive ids from first_patient_id. Runs in a worker process.
+
+    Args:
+        spec (dict): The generator settings.
+        seed (int): The seed of the shard.
+        first_patient_id (int): The id of the first patient of the shard.
+        num_patients (int): The number of patients of the shard.
+
+    Returns:
+        List[dict]: The patients of the shard.
+    """
+    generator = shard_generator({**spec, 'num_patients': num_patients}, seed)
+    patients = generator.generate_patients()
+    for offset, patient in enumerate(patients):
+        patient['patient_id'] = first_patient_id + offset
+    return patients
+
+
+class ShardedDataGenerator:
+    """
+    A class to generate synthetic patients, facilities and visits deterministically, in parallel shards.
+
+    The generation period is split into shards of shard_days days and the patients into shards of
+    PATIENTS_PER_SHARD ids. Every shard has its own generator, seeded with a seed derived from the generator
+    seed and the shard, and shards are generated in a process pool. Shards are merged in order: visits by date,
+    patients by id. The output therefore depends only on the seed and the configuration, not on the number of
+    workers or the order in which the shards finish, and patient ids stay globally unique.
+
+    Attributes:
+        seed (int): The seed the shard seeds are derived from, sourced from generator_config.seed.
+        num_patients (int): The number of patients to generate, sourced from generator_config.num_patients.
+        start_date (str): The start date for the data generation period, sourced from generator_config.start_date.
+        end_date (str): The end date for the data generation period, sourced from generator_config.end_date.
+        date_format (str): The format of the date strings, sourced from generator_config.date_format.
+        visits_per_day (Tuple[int, int]): The range (min, max) of visits per day, sourced from
+                                          generator_config.visits_per_day.
+        facility_types (List[str]): A list of facility types, sourced from generator_config.facility_types.
+        shard_days (int): The number of days of visits per shard, sourced from generator_config.shard_days.
+        max_workers (int): The number of worker processes, sourced from generator_config.max_workers.
+        patients (List[dict] or None): A list of generated patient data, initialized as None.
+        facilities (List[dict] or None): A list of generated facility data, initialized as None.
+        visits (List[dict] or None): A list of generated visit data, initialized as None.
+    """
+
+    def __init__(self, seed=None):
+        """
+        Initializes the ShardedDataGenerator class with configuration values.
+
+        Args:
+            seed (Optional[int]): The generator seed, generator_config.seed by default.
+        """
+        self.seed = data_generator_config.seed if seed is None else seed
+        self.num_patients = data_generator_config.num_patients
+        self.start_date = data_generator_config.start_date
+        self.end_date = data_generator_config.end_date
+        self.date_format = data_generator_config.date_format
+        self.visits_per_day = data_generator_config.visits_per_day
+        self.facility_types = data_generator_config.facility_types
+        self.shard_days = data_generator_config.shard_days
+        self.max_workers = data_generator_config.max_workers
+
+        self.patients = None
+        self.facilities = None
+        self.visits = None
+
+    def spec(self):
+        """
+        Returns the generator settings passed to the worker processes.
+
+        Returns:
+            dict: num_patients, date_format, visits_per_day and facility_types.
+        """
+        return {
+            'num_patients': self.num_patients,
+            'date_format': self.date_format,
+            'visits_per_day': tuple(self.visits_per_day),
+            'facility_types': list(self.facility_types),
+        }
+
+    def visit_shards(self):
+        """
+        Splits the generation period into shards of shard_days days.
+
+        Returns:
+            List[Tuple[int, str, str]]: The index, first date and last date of every shard, in date order.
+        """
+        start_date = datetime.strptime(self.start_date, self.date_format)
+        end_date = datetime.strptime(self.end_date, self.date_format)
+        shards = []
+        shard_start = start_date
+        while shard_start <= end_date:
+            shard_end = min(shard_start + timedelta(days=self.shard_days - 1), end_date)
+            shards.append((len(shards), shard_start.strftime(self.date_format), shard_end.strftime(self.date_format)))
+            shard_start = shard_end + timedelta(days=1)
+        return shards
+
+    def run_shards(self, func, tasks):
+        """
+        Runs shard tasks in a process pool and yields their results in task order.
+
+        At most twice max_workers shards are generated ahead of the consumer, so memory stays bounded when the
+        results are consumed one by one.
+
+        Args:
+            func (Callable): A module-level function generating one shard.
+            tasks (List[tuple]): The arguments of every shard.
+
+        Yields:
+            The result of every task, in task order.
+        """
+        if self.max_workers <= 1:
+            for task in tasks:
+                yield func(*task)
+            return
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = deque()
+            for task in tasks:
+                pending.append(executor.submit(func, *task))
+                if len(pending) >= 2 * self.max_workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def iter_visit_shards(self):
+        """
+        Generates the visits shard by shard.
+
+        Yields:
+            List[dict]: The visits of the next shard, ordered by timestamp.
+        """
+        spec = self.spec()
+        tasks = [(spec, derive_seed(self.seed, 'visits', index), start_date, end_date)
+                 for index, start_date, end_date in self.visit_shards()]
+        yield from self.run_shards(generate_visit_shard, tasks)
+
+    def generate_patients(self):
+        """
+        Generates the patients in shards of PATIENTS_PER_SHARD consecutive ids.
+
+        Returns:
+            List[dict]: The patients, ordered by id.
+        """
+        spec = self.spec()
+        tasks = [(spec, derive_seed(self.seed, 'patients', first_id), first_id,
+                  min(PATIENTS_PER_SHARD, self.num_patients - first_id + 1))
+                 for first_id in range(1, self.num_patients + 1, PATIENTS_PER_SHARD)]
+        return [patient for shard in self.run_shards(generate_patient_shard, tasks) for patient in shard]
+
+    def generate_facilities(self):
+        """
+        Generates the facilities, one per facility type.
+
+        Returns:
+            List[dict]: The facilities, ordered by id.
+        """
+        return shard_generator(self.spec(), derive_seed(self.seed, 'facilities')).generate_facilities()
+
+    def generate_visits(self):
+        """
+        Generates the visits of the whole period.
+
+        Returns:
+            List[dict]: The visits, ordered by timestamp.
+        """
+        return [visit for shard in self.iter_visit_shards() for visit in shard]
+
+    def generate_data(self):
+        """
+        Generates synthetic data for patients, facilities, and visits, and stores them in the class attributes.
+        """
+        self.patients = self.generate_patients()
+        self.facilities = self.generate_facilities()
+        self.visits = self.generate_visits()
+
+    def get_visits(self):
+        """
+        Retrieves the generated visit data.
+
+        Returns:
+            List[dict]: A list of visit data dictionaries.
+        """
+        return self.visits
+
+    def get_facilities(self):
+        """
+        Retrieves the generated facility data.
+
+        Returns:
+            List[dict]: A list of facility data dictionaries.
+        """
+        return self.facilities
+
+    def get_patients(self):
+        """
+        Retrieves the generated patient data.
+
+        Returns:
+            List[dict]: A list of patient data dictionaries.
+        """
+        return self.patients
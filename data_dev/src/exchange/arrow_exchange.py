@@ -0,0 +1,165 @@
+import json
+import os
+import threading
+from datetime import datetime
+
+import pyarrow as pa
+
+from data_dev.config import arrow_exchange_config
+
+MANIFEST_FILE = 'manifest.json'
+TABLE = 'table'
+PARQUET_RESULT = 'parquet_result'
+
+# Row count and write counters of a table; the DQ suite runs the same query to check a snapshot is current.
+TABLE_STATS_SQL = """
+SELECT
+    (SELECT COUNT(*) FROM {table}) AS row_count,
+    COALESCE((SELECT n_tup_ins + n_tup_upd + n_tup_del FROM pg_stat_user_tables WHERE relname = '{table}'), 0)
+        AS write_count
+"""
+
+SNAPSHOT_TRANSACTION_SQL = "SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY"
+
+
+def latest_mtime_ns(path):
+    """
+    Returns the latest modification time of the files below a directory.
+
+    Args:
+        path (str): The directory.
+
+    Returns:
+        int: The latest modification time in nanoseconds, 0 if there are no files.
+    """
+    return max(
+        (os.stat(os.path.join(root, file_name)).st_mtime_ns for root, _, files in os.walk(path) for file_name in files),
+        default=0
+    )
+
+
+class ArrowExchange:
+    """
+    A class publishing pipeline frames as Arrow IPC files for the DQ suite.
+
+    Every frame is written uncompressed in the Arrow IPC file format, so the DQ suite can memory-map it,
+    and registered in a manifest. Table snapshots record the row count and write counters of the table,
+    Parquet results the committed dataset version and the latest modification time of the Parquet files,
+    so readers can check cheaply whether an entry is current.
+
+    Attributes:
+        storage_path (str): The directory of the Arrow IPC files and the manifest.
+
+    Methods:
+        publish(name, df, kind, **details): Writes a frame and registers it in the manifest.
+        publish_tables(connection_object, tables): Publishes snapshots of database tables.
+        read_manifest(): Reads the manifest.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, storage_path=None):
+        """
+        Initializes the ArrowExchange with the exchange directory.
+
+        Args:
+            storage_path (str): The exchange directory. Defaults to arrow_exchange_config.storage_path.
+        """
+        self.storage_path = storage_path or arrow_exchange_config.storage_path
+
+    def read_manifest(self):
+        """
+        Reads the manifest.
+
+        Returns:
+            dict: The manifest, with the published entries keyed by name.
+        """
+        manifest_path = os.path.join(self.storage_path, MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            return {'entries': {}}
+        with open(manifest_path, 'r', encoding='utf-8') as handle:
+            return json.load(handle)
+
+    def write_manifest(self, manifest):
+        """
+        Replaces the manifest atomically.
+
+        Args:
+            manifest (dict): The manifest to write.
+        """
+        manifest_path = os.path.join(self.storage_path, MANIFEST_FILE)
+        with open(f"{manifest_path}.tmp", 'w', encoding='utf-8') as handle:
+            json.dump(manifest, handle, indent=2, sort_keys=True)
+        os.replace(f"{manifest_path}.tmp", manifest_path)
+
+    def publish(self, name, df, kind, **details):
+        """
+        Writes a frame as an Arrow IPC file and registers it in the manifest.
+
+        The file is written next to its final location and renamed, so readers never map a partial file.
+
+        Args:
+            name (str): The name of the entry (a table or dataset name).
+            df (pd.DataFrame): The frame to publish.
+            kind (str): TABLE or PARQUET_RESULT.
+            **details: Additional JSON-serializable details stored with the entry.
+
+        Returns:
+            int: The number of published rows.
+        """
+        os.makedirs(self.storage_path, exist_ok=True)
+        file_name = f"{name}.arrow"
+        file_path = os.path.join(self.storage_path, file_name)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        with pa.OSFile(f"{file_path}.tmp", 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(f"{file_path}.tmp", file_path)
+
+        with self._lock:
+            manifest = self.read_manifest()
+            manifest['entries'][name] = {
+                'file': file_name,
+                'kind': kind,
+                'rows': table.num_rows,
+                'published_at': datetime.now().isoformat(timespec='seconds'),
+                **details
+            }
+            self.write_manifest(manifest)
+        return table.num_rows
+
+    def publish_tables(self, connection_object, tables=None):
+        """
+        Publishes snapshots of database tables together with their row count and write counters.
+
+        Every table is read in a read-only REPEATABLE READ transaction whose snapshot is taken by the stats
+        query, so the published rows and row count come from the same snapshot. The write counters are not
+        transactional; they are read before the rows, so a concurrent write can only make the snapshot look
+        stale to readers, never current.
+
+        Args:
+            connection_object: A connector providing get_connection() and get_data_sql(query).
+            tables (List[str]): The tables to publish. Defaults to arrow_exchange_config.tables.
+
+        Returns:
+            int: The total number of published rows.
+        """
+        connection = connection_object.get_connection()
+        published_rows = 0
+        for table in tables or arrow_exchange_config.tables:
+            # end any open transaction, so the isolation level applies to a new one
+            connection.rollback()
+            cursor = connection.cursor()
+            try:
+                cursor.execute(SNAPSHOT_TRANSACTION_SQL)
+                stats = connection_object.get_data_sql(TABLE_STATS_SQL.format(table=table)).iloc[0]
+                df = connection_object.get_data_sql(f"SELECT * FROM {table}")
+            finally:
+                connection.rollback()
+                cursor.close()
+            published_rows += self.publish(
+                table, df, TABLE,
+                row_count=int(stats['row_count']),
+                write_count=int(stats['write_count'])
+            )
+        return published_rows
@@ -0,0 +1,295 @@
+"""
+Measurement of the wall time, CPU time, memory, row counts and bytes read of pipeline and DQ operations.
+
+This module is the source of truth of the instrumentation. PyTest_DQ_Framework/src/instrumentation/metrics.py
+is a copy of it, because the two projects are deployed as separate folders and cannot import each other;
+change this module and copy it over.
+"""
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+
+@dataclass
+class Measurement:
+    """
+    A dataclass storing the cost of one measured operation.
+
+    Attributes:
+        name (str): The name of the measured operation (e.g. a transform, fixture or check name).
+        kind (str): The kind of operation, e.g. 'connector', 'transform', 'stage', 'fixture', 'check' or 'test'.
+        labels (Dict[str, str]): Additional labels identifying the operation (e.g. a test node id).
+        wall_seconds (float): Elapsed wall-clock time.
+        cpu_seconds (float): CPU time consumed by the process while the operation ran.
+        peak_rss_mb (Optional[float]): Peak resident set size of the process at the end of the operation.
+        peak_traced_mb (Optional[float]): Peak Python memory allocated during the operation, above the memory
+                                          allocated at its start. Only recorded while tracemalloc is tracing,
+                                          and only if no operation of another thread overlapped it.
+        rows_in (Optional[int]): The number of rows the operation received.
+        rows_out (Optional[int]): The number of rows the operation produced.
+        bytes_read (Optional[int]): The number of bytes the operation read.
+        status (str): 'ok', or 'error' if the operation raised.
+    """
+    name: str
+    kind: str
+    labels: Dict[str, str] = field(default_factory=dict)
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    peak_rss_mb: Optional[float] = None
+    peak_traced_mb: Optional[float] = None
+    rows_in: Optional[int] = None
+    rows_out: Optional[int] = None
+    bytes_read: Optional[int] = None
+    status: str = 'ok'
+
+
+def peak_rss_mb():
+    """
+    Returns the peak resident set size of the current process in MB, or None if it is not available.
+    """
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes on Linux
+    return max_rss / 2 ** 20 if sys.platform == 'darwin' else max_rss / 2 ** 10
+
+
+def count_rows(value):
+    """
+    Returns the number of rows of a DataFrame-like value or an int row count, otherwise None.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if hasattr(value, 'shape'):
+        return len(value)
+    return None
+
+
+class MetricsRecorder:
+    """
+    Records wall time, CPU time, memory, row counts and bytes read of measured operations.
+
+    Operations are measured with the measure() context manager or the measured() decorator. Nested
+    measurements are supported: the peak traced memory of an inner operation also counts for the outer one.
+    The tracemalloc peak is process-wide, so it cannot be attributed to one of several operations running
+    concurrently in different threads (e.g. DAG stages run in parallel): peak_traced_mb is left None for
+    operations that overlapped an operation of another thread.
+
+    Attributes:
+        measurements (List[Measurement]): The recorded measurements, in completion order.
+
+    Methods:
+        measure(name, kind, **labels): Context manager measuring the enclosed block.
+        measured(kind, name=None): Decorator measuring every call of a function.
+        start_memory_tracing(): Starts tracemalloc so that peak_traced_mb is recorded.
+        summary(): Aggregates the measurements per kind and name.
+        write_json(path): Writes all measurements and the summary to a JSON file.
+        write_openmetrics(path): Writes the summary in the OpenMetrics text format.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty recorder.
+        """
+        self.measurements: List[Measurement] = []
+        self._lock = threading.Lock()
+        self._active = []
+
+    @staticmethod
+    def start_memory_tracing():
+        """
+        Starts tracemalloc, so that the peak Python memory of every measured operation is recorded.
+        Tracing slows allocation-heavy code down noticeably, so it is opt-in.
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def measure(self, name, kind, **labels):
+        """
+        Measures the enclosed block.
+
+        The yielded Measurement can be used to set rows_in, rows_out and bytes_read inside the block.
+
+        Args:
+            name (str): The name of the measured operation.
+            kind (str): The kind of the measured operation.
+            **labels: Additional labels identifying the operation.
+
+        Yields:
+            Measurement: The measurement being recorded.
+        """
+        measurement = Measurement(name=name, kind=kind, labels={key: str(value) for key, value in labels.items()})
+        tracing = tracemalloc.is_tracing()
+        with self._lock:
+            if tracing:
+                current, peak = tracemalloc.get_traced_memory()
+                for active in self._active:
+                    active['peak'] = max(active['peak'], peak)
+                tracemalloc.reset_peak()
+            state = {'peak': 0, 'start': tracemalloc.get_traced_memory()[0] if tracing else 0,
+                     'thread': threading.get_ident(), 'overlapped': False}
+            for active in self._active:
+                if active['thread'] != state['thread']:
+                    active['overlapped'] = state['overlapped'] = True
+            self._active.append(state)
+        started_wall = time.perf_counter()
+        started_cpu = time.process_time()
+        try:
+            yield measurement
+        except BaseException:
+            measurement.status = 'error'
+            raise
+        finally:
+            measurement.wall_seconds = time.perf_counter() - started_wall
+            measurement.cpu_seconds = time.process_time() - started_cpu
+            measurement.peak_rss_mb = peak_rss_mb()
+            with self._lock:
+                self._active.remove(state)
+                if tracing and tracemalloc.is_tracing():
+                    state['peak'] = max(state['peak'], tracemalloc.get_traced_memory()[1])
+                    for active in self._active:
+                        active['peak'] = max(active['peak'], state['peak'])
+                    if not state['overlapped']:
+                        measurement.peak_traced_mb = max(state['peak'] - state['start'], 0) / 2 ** 20
+                self.measurements.append(measurement)
+
+    def measured(self, kind, name=None):
+        """
+        Decorator measuring every call of a function.
+
+        rows_in is the total number of rows of the DataFrame arguments and rows_out the number
+        of rows of the returned DataFrame (or the returned row count).
+
+        Args:
+            kind (str): The kind of the measured operation.
+            name (str): The name of the measured operation. Defaults to the qualified function name.
+        """
+        def decorator(func):
+            operation_name = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.measure(operation_name, kind) as measurement:
+                    arguments = list(args) + list(kwargs.values())
+                    row_counts = [len(value) for value in arguments if hasattr(value, 'shape')]
+                    measurement.rows_in = sum(row_counts) if row_counts else None
+                    result = func(*args, **kwargs)
+                    measurement.rows_out = count_rows(result)
+                    return result
+            return wrapper
+        return decorator
+
+    def clear(self):
+        """
+        Removes all recorded measurements.
+        """
+        with self._lock:
+            self.measurements = []
+
+    def summary(self):
+        """
+        Aggregates the measurements per kind and name.
+
+        Returns:
+            List[dict]: One entry per kind and name with call count, total and max wall time, total CPU time,
+            max peak memory, total rows and bytes read, sorted by total wall time descending.
+        """
+        grouped = {}
+        for measurement in self.measurements:
+            entry = grouped.setdefault((measurement.kind, measurement.name), {
+                'kind': measurement.kind,
+                'name': measurement.name,
+                'calls': 0,
+                'errors': 0,
+                'wall_seconds_total': 0.0,
+                'wall_seconds_max': 0.0,
+                'cpu_seconds_total': 0.0,
+                'peak_rss_mb_max': None,
+                'peak_traced_mb_max': None,
+                'rows_in_total': None,
+                'rows_out_total': None,
+                'bytes_read_total': None,
+            })
+            entry['calls'] += 1
+            entry['errors'] += measurement.status != 'ok'
+            entry['wall_seconds_total'] += measurement.wall_seconds
+            entry['wall_seconds_max'] = max(entry['wall_seconds_max'], measurement.wall_seconds)
+            entry['cpu_seconds_total'] += measurement.cpu_seconds
+            for key, value, combine in (
+                ('peak_rss_mb_max', measurement.peak_rss_mb, max),
+                ('peak_traced_mb_max', measurement.peak_traced_mb, max),
+                ('rows_in_total', measurement.rows_in, lambda a, b: a + b),
+                ('rows_out_total', measurement.rows_out, lambda a, b: a + b),
+                ('bytes_read_total', measurement.bytes_read, lambda a, b: a + b),
+            ):
+                if value is not None:
+                    entry[key] = value if entry[key] is None else combine(entry[key], value)
+        return sorted(grouped.values(), key=lambda item: item['wall_seconds_total'], reverse=True)
+
+    def write_json(self, path):
+        """
+        Writes all measurements and their summary to a JSON file.
+
+        Args:
+            path (str): The output file.
+        """
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as handle:
+            json.dump({
+                'measurements': [asdict(measurement) for measurement in self.measurements],
+                'summary': self.summary(),
+            }, handle, indent=2)
+
+    def write_openmetrics(self, path):
+        """
+        Writes the summary in the OpenMetrics text exposition format.
+
+        Args:
+            path (str): The output file.
+        """
+        metrics = {
+            'calls': ('counter', 'Number of measured calls'),
+            'wall_seconds_total': ('counter', 'Total wall time in seconds'),
+            'cpu_seconds_total': ('counter', 'Total CPU time in seconds'),
+            'peak_rss_mb_max': ('gauge', 'Peak resident set size in MB'),
+            'peak_traced_mb_max': ('gauge', 'Peak traced Python memory in MB'),
+            'rows_in_total': ('counter', 'Total rows received'),
+            'rows_out_total': ('counter', 'Total rows produced'),
+            'bytes_read_total': ('counter', 'Total bytes read'),
+        }
+        summary = self.summary()
+        lines = []
+        for key, (metric_type, help_text) in metrics.items():
+            metric_name = f"dqe_{key[:-len('_total')] if metric_type == 'counter' and key.endswith('_total') else key}"
+            lines.append(f"# TYPE {metric_name} {metric_type}")
+            lines.append(f"# HELP {metric_name} {help_text}")
+            for entry in summary:
+                if entry[key] is None:
+                    continue
+                sample_name = f"{metric_name}_total" if metric_type == 'counter' else metric_name
+                name = entry['name'].replace('\\', '\\\\').replace('"', '\\"')
+                lines.append(f'{sample_name}{{kind="{entry["kind"]}",name="{name}"}} {entry[key]}')
+        lines.append('# EOF')
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write('\n'.join(lines) + '\n')
+
+
+# Process-wide recorder shared by all instrumented modules
+recorder = MetricsRecorder()
@@ -0,0 +1,294 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from data_dev.config import pipeline_config
+from data_dev.src.data.dataset_manifest import read_manifest
+from data_dev.src.instrumentation.metrics import recorder
+
+COMPLETED = 'completed'
+SKIPPED = 'skipped'
+FAILED = 'failed'
+BLOCKED = 'blocked'
+
+
+@dataclass
+class Stage:
+    """
+    A dataclass describing one pipeline stage.
+
+    Attributes:
+        name (str): The unique name of the stage.
+        func (Callable[[], Optional[int]]): Runs the stage and returns the number of processed rows, if known.
+        depends_on (List[str]): Names of the stages which must complete before this stage starts.
+        fingerprint (Optional[Callable[[], Optional[str]]]): Returns a fingerprint of the stage inputs, and may
+            cover its outputs. It is stored as computed after the last successful run, so a stage whose
+            fingerprint still equals it is skipped. Stages without a fingerprint, or whose fingerprint is None,
+            always run.
+    """
+    name: str
+    func: Callable[[], Optional[int]]
+    depends_on: List[str] = field(default_factory=list)
+    fingerprint: Optional[Callable[[], Optional[str]]] = None
+
+
+@dataclass
+class StageResult:
+    """
+    A dataclass storing the outcome of one pipeline stage.
+
+    Attributes:
+        name (str): The name of the stage.
+        status (str): One of 'completed', 'skipped', 'failed' or 'blocked' (a dependency did not succeed).
+        seconds (float): Wall time spent in the stage, including the fingerprint computation.
+        rows (Optional[int]): The number of rows processed by the stage, if known.
+        error (Optional[str]): The error message of a failed stage.
+    """
+    name: str
+    status: str
+    seconds: float = 0.0
+    rows: Optional[int] = None
+    error: Optional[str] = None
+
+
+def fingerprint_values(*values):
+    """
+    Builds a fingerprint from arbitrary JSON-serializable values.
+
+    Args:
+        *values: The values describing the stage inputs.
+
+    Returns:
+        str: A SHA-256 hex digest of the values.
+    """
+    payload = json.dumps(values, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def fingerprint_path(path):
+    """
+    Builds a fingerprint of the files below a directory from their names, sizes and modification times.
+
+    Versioned Parquet datasets are fingerprinted by their committed version, without listing them.
+
+    Args:
+        path (str): The directory to fingerprint.
+
+    Returns:
+        Optional[str]: The fingerprint, or None if the directory does not exist.
+    """
+    if not os.path.exists(path):
+        return None
+    manifest = read_manifest(path)
+    if manifest is not None:
+        return fingerprint_values(path, manifest['version'])
+    entries = []
+    for root, _, files in os.walk(path):
+        for file_name in files:
+            stat = os.stat(os.path.join(root, file_name))
+            entries.append((os.path.relpath(os.path.join(root, file_name), path), stat.st_size, stat.st_mtime_ns))
+    return fingerprint_values(sorted(entries))
+
+
+def fingerprint_tables(connection_object, tables):
+    """
+    Builds a fingerprint of database tables from their cumulative write counters and storage files.
+
+    The inserted, updated and deleted tuple counters of pg_stat_user_tables change with every write, and the
+    relation file node changes when a table is truncated or rewritten. Both are read from the catalog without
+    scanning the tables, and neither changes with VACUUM, autovacuum or ANALYZE. A statistics reset or a
+    crash resets the counters, which only causes an unnecessary rerun. A backend reports its counters when its
+    connection closes, and the stages close their connections before their fingerprints are recomputed.
+
+    Args:
+        connection_object: A connector providing get_data_sql(query).
+        tables (List[str]): The tables to fingerprint.
+
+    Returns:
+        Optional[str]: The fingerprint, or None if any of the tables does not exist yet.
+    """
+    query = (
+        "SELECT relname AS table_name, pg_relation_filenode(relid) AS file_node, "
+        "n_tup_ins, n_tup_upd, n_tup_del FROM pg_stat_user_tables "
+        f"WHERE relid IN ({', '.join(f'to_regclass({table!r})' for table in tables)}) ORDER BY relname"
+    )
+    try:
+        stats = connection_object.get_data_sql(query)
+    except Exception:
+        connection_object.get_connection().rollback()
+        return None
+    if len(stats) < len(set(tables)):
+        return None
+    return fingerprint_values(stats.to_dict(orient='records'))
+
+
+class DagRunner:
+    """
+    A lightweight runner executing pipeline stages in dependency order.
+
+    Stages whose dependencies have succeeded run concurrently in a thread pool. A failed stage blocks
+    all stages depending on it, while independent branches continue. Fingerprints of successfully
+    completed stages are persisted, so stages with unchanged inputs are skipped on rerun.
+
+    Attributes:
+        stages (Dict[str, Stage]): The stages of the pipeline, keyed by name.
+        max_workers (int): The maximum number of stages executed concurrently.
+        state_path (str): The file storing the fingerprints of completed stages.
+
+    Methods:
+        validate(): Checks that all dependencies exist and that the stages form a DAG.
+        run(): Runs all stages and returns their results.
+        log_summary(results): Logs the per-stage timing and row-count summary.
+    """
+
+    def __init__(self, stages, max_workers=None, state_path=None):
+        """
+        Initializes the DagRunner with the stages to run.
+
+        Args:
+            stages (List[Stage]): The stages of the pipeline.
+            max_workers (int): The maximum number of concurrent stages. Defaults to pipeline_config.max_workers.
+            state_path (str): The fingerprint state file. Defaults to pipeline_config.state_path.
+        """
+        self.stages = {stage.name: stage for stage in stages}
+        self.max_workers = max_workers or pipeline_config.max_workers
+        self.state_path = state_path or pipeline_config.state_path
+        self.validate()
+
+    def validate(self):
+        """
+        Checks that all dependencies exist and that the stages contain no cycle.
+
+        Raises:
+            ValueError: If a dependency is unknown or the dependencies form a cycle.
+        """
+        for stage in self.stages.values():
+            unknown = set(stage.depends_on) - set(self.stages)
+            if unknown:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stages: {sorted(unknown)}")
+
+        visited, in_progress = set(), set()
+
+        def visit(name):
+            if name in in_progress:
+                raise ValueError(f"Stage dependencies contain a cycle through '{name}'")
+            if name not in visited:
+                in_progress.add(name)
+                for dependency in self.stages[name].depends_on:
+                    visit(dependency)
+                in_progress.remove(name)
+                visited.add(name)
+
+        for stage_name in self.stages:
+            visit(stage_name)
+
+    def read_state(self):
+        """
+        Reads the fingerprints of previously completed stages.
+
+        Returns:
+            Dict[str, str]: The stored fingerprints, keyed by stage name.
+        """
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path, 'r', encoding='utf-8') as handle:
+            return json.load(handle)
+
+    def write_state(self, state):
+        """
+        Writes the fingerprints of completed stages, replacing the state file atomically.
+
+        Args:
+            state (Dict[str, str]): The fingerprints, keyed by stage name.
+        """
+        os.makedirs(os.path.dirname(self.state_path) or '.', exist_ok=True)
+        with open(f"{self.state_path}.tmp", 'w', encoding='utf-8') as handle:
+            json.dump(state, handle, indent=2, sort_keys=True)
+        os.replace(f"{self.state_path}.tmp", self.state_path)
+
+    def run_stage(self, stage, stored_fingerprint):
+        """
+        Runs one stage unless its inputs are unchanged since its last successful run.
+
+        Args:
+            stage (Stage): The stage to run.
+            stored_fingerprint (Optional[str]): The fingerprint stored after the last successful run.
+
+        The fingerprint is computed again after a successful run and that value is stored, because stages
+        change what their fingerprints cover, e.g. the tables they load or the output they write. A rerun
+        with nothing changed in between is then skipped.
+
+        Returns:
+            Tuple[StageResult, Optional[str]]: The stage result and the fingerprint after the run.
+        """
+        started = time.perf_counter()
+        fingerprint = None
+        try:
+            fingerprint = stage.fingerprint() if stage.fingerprint else None
+            if fingerprint is not None and fingerprint == stored_fingerprint:
+                logging.info(f"Stage '{stage.name}' skipped, inputs unchanged since the last successful run.")
+                return StageResult(stage.name, SKIPPED, time.perf_counter() - started), fingerprint
+            logging.info(f"Starting stage '{stage.name}'...")
+            with recorder.measure(stage.name, 'stage') as measurement:
+                rows = stage.func()
+                measurement.rows_out = rows
+            fingerprint = stage.fingerprint() if stage.fingerprint else None
+            logging.info(f"Stage '{stage.name}' completed!")
+            return StageResult(stage.name, COMPLETED, time.perf_counter() - started, rows), fingerprint
+        except Exception as e:
+            logging.exception(f"Stage '{stage.name}' FAILED: {e}")
+            return StageResult(stage.name, FAILED, time.perf_counter() - started, error=str(e)), None
+
+    def run(self):
+        """
+        Runs all stages, starting each one as soon as all its dependencies have succeeded.
+
+        Returns:
+            Dict[str, StageResult]: The results of all stages, keyed by stage name.
+        """
+        state = self.read_state()
+        results = {}
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while len(results) < len(self.stages):
+                for stage in self.stages.values():
+                    if stage.name in results or stage.name in running.values():
+                        continue
+                    dependency_results = [results.get(name) for name in stage.depends_on]
+                    if any(result is not None and result.status in (FAILED, BLOCKED) for result in dependency_results):
+                        results[stage.name] = StageResult(stage.name, BLOCKED)
+                        logging.warning(f"Stage '{stage.name}' blocked by a failed dependency.")
+                    elif all(result is not None for result in dependency_results):
+                        running[executor.submit(self.run_stage, stage, state.get(stage.name))] = stage.name
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result, fingerprint = future.result()
+                    results[running.pop(future)] = result
+                    if result.status == COMPLETED:
+                        if fingerprint is None:
+                            state.pop(result.name, None)
+                        else:
+                            state[result.name] = fingerprint
+                        self.write_state(state)
+        return results
+
+    @staticmethod
+    def log_summary(results):
+        """
+        Logs the per-stage timing and row-count summary of a pipeline run.
+
+        Args:
+            results (Dict[str, StageResult]): The stage results returned by run().
+        """
+        lines = [f"{'Stage':<45} {'Status':<10} {'Seconds':>10} {'Rows':>12}"]
+        for result in sorted(results.values(), key=lambda item: item.seconds, reverse=True):
+            rows = '' if result.rows is None else result.rows
+            lines.append(f"{result.name:<45} {result.status:<10} {result.seconds:>10.2f} {rows:>12}")
+        logging.info("Pipeline summary:\n" + "\n".join(lines))
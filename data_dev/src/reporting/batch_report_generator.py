@@ -0,0 +1,376 @@
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.offline import get_plotlyjs
+from plotly.subplots import make_subplots
+
+from data_dev.config import batch_report_config, parquet_storage_config
+from data_dev.src.data import dataset_manifest
+from data_dev.src.reporting.report_generator import ReportGenerator, PARTITION_COLUMN
+
+ASSETS_DIRECTORY = 'assets'
+PLOTLY_JS_FILE = 'plotly.min.js'
+
+# Table columns, chart dimension and aggregation used for every dataset rendered in batch mode.
+DATASET_SPECS = {
+    'facility_type_avg_time_spent_per_visit_date': {
+        'columns': ['facility_type', 'visit_date', 'avg_time_spent'],
+        'headers': ['Facility Type', 'Visit Date', 'Average Time Spent'],
+        'date': 'visit_date',
+        'dimension': 'facility_type',
+        'value': 'avg_time_spent',
+        'aggregation': 'min',
+        'rollup': 'min_avg_time_spent',
+    },
+    'facility_name_min_time_spent_per_visit_date': {
+        'columns': ['facility_name', 'visit_date', 'min_time_spent'],
+        'headers': ['Facility Name', 'Visit Date', 'Min Time Spent'],
+        'date': 'visit_date',
+        'dimension': 'facility_name',
+        'value': 'min_time_spent',
+        'aggregation': 'min',
+    },
+    'patient_sum_treatment_cost_per_facility_type': {
+        'columns': ['facility_type', 'full_name', 'sum_treatment_cost'],
+        'headers': ['Facility Type', 'Full Name', 'Sum Treatment Cost'],
+        'date': None,
+        'dimension': 'facility_type',
+        'value': 'sum_treatment_cost',
+        'aggregation': 'sum',
+    },
+}
+
+
+def render_report(job, storage_path):
+    """
+    Builds the figure described by a report job and writes it to an HTML file.
+
+    This function runs in the worker processes, so the job only carries plain lists and
+    the rendered file references the shared plotly.js asset instead of embedding it.
+
+    Args:
+        job (dict): The report job created by BatchReportGenerator.
+        storage_path (str): The directory where the reports are stored.
+
+    Returns:
+        str: The path of the written report, relative to the storage path.
+    """
+    fig = make_subplots(
+        rows=2, cols=1,
+        specs=[[{"type": "table"}], [{"type": "domain"}]],
+        subplot_titles=(job['table_title'], job['doughnut_title'])
+    )
+    fig.add_trace(
+        go.Table(
+            header=dict(
+                values=job['headers'],
+                fill_color="lightgrey",
+                align="center",
+                font=dict(size=12, color="black"),
+            ),
+            cells=dict(
+                values=job['cells'],
+                fill_color="white",
+                align="center",
+                font=dict(size=12, color="black"),
+            ),
+        ),
+        row=1, col=1
+    )
+    fig.add_trace(
+        go.Pie(
+            labels=job['labels'],
+            values=job['values'],
+            hole=0.5,
+            textinfo='label+value',
+            textfont=dict(size=14)
+        ),
+        row=2, col=1
+    )
+    fig.update_layout(height=800, title_text=job['title'], title_x=0.5)
+
+    file_path = os.path.join(storage_path, job['path'])
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    plotly_js = os.path.relpath(
+        os.path.join(storage_path, ASSETS_DIRECTORY, PLOTLY_JS_FILE), os.path.dirname(file_path)
+    )
+    pio.write_html(fig, file=file_path, auto_open=False, include_plotlyjs=plotly_js.replace(os.sep, '/'))
+    return job['path']
+
+
+class BatchReportGenerator:
+    """
+    A class to render per-week, per-facility and per-dataset HTML reports for all Parquet outputs.
+
+    Every dataset is read once, windows are sliced from frames aggregated once per dataset
+    (or read from the materialized week rollup when one exists), and the reports are rendered
+    in parallel worker processes. plotly.js is written once to a shared assets directory which
+    every report references.
+
+    Attributes:
+        storage_path (str): The directory where the reports are stored.
+        weeks (int): The number of most recent weeks rendered for every dataset.
+        max_workers (int): The number of worker processes used to render the reports.
+        datasets (dict): The loaded source data, keyed by dataset name.
+
+    Methods:
+        read_dataset(name, parquet_files_path): Reads the columns and partitions a dataset's reports need.
+        read_weekly_rollup(name, data): Reads the weekly aggregate of a dataset from its week rollup.
+        build_jobs(): Creates the report jobs for all loaded datasets.
+        write_assets(): Writes the shared static assets.
+        write_index(report_paths): Writes an index page linking all reports.
+        generate_reports(): Main method to render all reports.
+    """
+
+    def __init__(self):
+        """
+        Initializes the BatchReportGenerator instance by loading every configured dataset once.
+        """
+        self.storage_path = batch_report_config.storage_path
+        self.weeks = batch_report_config.weeks
+        self.max_workers = batch_report_config.max_workers
+        self.datasets = {
+            name: self.read_dataset(name, path)
+            for name, path in batch_report_config.parquet_files_paths.items()
+            if os.path.exists(path)
+        }
+
+    def read_dataset(self, name, parquet_files_path):
+        """
+        Reads the report columns of a dataset.
+
+        Only the files of the current dataset version are read. For datasets partitioned by month only the
+        partitions covering the configured number of weeks are read, and the rows are labelled with the start
+        date of their week.
+
+        Args:
+            name (str): The dataset name, a key of DATASET_SPECS.
+            parquet_files_path (str): Location of the dataset.
+
+        Returns:
+            pd.DataFrame: The loaded data.
+        """
+        spec = DATASET_SPECS[name]
+        if spec['date'] is None:
+            return dataset_manifest.read_dataset(parquet_files_path, columns=spec['columns'])
+
+        last_partition = ReportGenerator.find_last_partition(parquet_files_path)
+        last_loaded_date = ReportGenerator.read_last_loaded_date(parquet_files_path, last_partition)
+        first_date = last_loaded_date.to_period('W').start_time - pd.Timedelta(weeks=self.weeks - 1)
+        partitions = pd.period_range(first_date, last_loaded_date, freq='M').strftime('%Y-%m').tolist()
+        data = dataset_manifest.read_dataset(
+            parquet_files_path,
+            columns=spec['columns'],
+            filters=[(PARTITION_COLUMN, 'in', partitions)]
+        )
+        data[spec['date']] = pd.to_datetime(data[spec['date']])
+        data = data[data[spec['date']] >= first_date]
+        return data.assign(week=data[spec['date']].dt.to_period('W').dt.start_time)
+
+    def read_weekly_rollup(self, name, data):
+        """
+        Reads the weekly aggregate of a dataset from its materialized week rollup, if one covers the loaded weeks.
+
+        Args:
+            name (str): The dataset name.
+            data (pd.DataFrame): The loaded data of the dataset.
+
+        Returns:
+            pd.DataFrame or None: The weekly aggregate with week, dimension and value columns,
+            or None if the dataset has no up-to-date week rollup.
+        """
+        spec = DATASET_SPECS[name]
+        rollup_file = os.path.join(parquet_storage_config.storage_path_rollups, name, 'week.parquet')
+        if 'rollup' not in spec or data.empty or not os.path.exists(rollup_file):
+            return None
+        weekly = pd.read_parquet(
+            rollup_file,
+            columns=[spec['dimension'], 'period_start', spec['rollup']],
+            filters=[('period_start', '>=', data['week'].min())]
+        ).rename(columns={'period_start': 'week', spec['rollup']: spec['value']})
+        if weekly.empty or weekly['week'].max() < data['week'].max():
+            return None
+        return weekly[['week', spec['dimension'], spec['value']]]
+
+    @staticmethod
+    def to_cells(data, columns):
+        """
+        Converts table columns to plain lists, formatting dates as strings.
+
+        Args:
+            data (pd.DataFrame): The rows to be shown in the table.
+            columns (list): The table columns.
+
+        Returns:
+            list: One list of cell values per column.
+        """
+        cells = []
+        for column in columns:
+            values = data[column]
+            if pd.api.types.is_datetime64_any_dtype(values):
+                values = values.dt.strftime('%Y-%m-%d')
+            cells.append(values.fillna('').tolist())
+        return cells
+
+    @staticmethod
+    def slugify(value):
+        """
+        Converts a dimension value to a string usable in a file name.
+        """
+        return re.sub(r'[^0-9A-Za-z]+', '_', str(value)).strip('_')
+
+    def build_dated_jobs(self, name, data):
+        """
+        Creates the overview, per-week and per-facility report jobs of a dataset partitioned by date.
+
+        Args:
+            name (str): The dataset name.
+            data (pd.DataFrame): The loaded data of the dataset.
+
+        Returns:
+            list: The report jobs.
+        """
+        spec = DATASET_SPECS[name]
+        dimension, value, date = spec['dimension'], spec['value'], spec['date']
+        weekly = self.read_weekly_rollup(name, data)
+        if weekly is None:
+            weekly = data.groupby(['week', dimension])[value].agg(spec['aggregation']).reset_index()
+        totals = data.groupby(dimension)[value].agg(spec['aggregation'])
+        jobs = [{
+            'path': f"{name}/overview.html",
+            'title': f"{name} - last {self.weeks} weeks",
+            'table_title': f"Weekly {spec['aggregation']} {value} by {dimension}",
+            'headers': ['Week', spec['headers'][0], spec['headers'][2]],
+            'cells': self.to_cells(weekly.sort_values(['week', dimension], ascending=False),
+                                   ['week', dimension, value]),
+            'doughnut_title': f"{spec['aggregation'].capitalize()} {value} by {dimension}",
+            'labels': totals.index.tolist(),
+            'values': totals.tolist(),
+        }]
+
+        weekly_by_week = dict(tuple(weekly.groupby('week')))
+        for week, rows in data.groupby('week'):
+            doughnut_data = weekly_by_week[week]
+            jobs.append({
+                'path': f"{name}/week_{week:%Y-%m-%d}.html",
+                'title': f"{name} - week starting {week:%Y-%m-%d}",
+                'table_title': "Loaded data",
+                'headers': spec['headers'],
+                'cells': self.to_cells(rows.sort_values([date, dimension], ascending=False), spec['columns']),
+                'doughnut_title': f"{spec['aggregation'].capitalize()} {value} by {dimension}",
+                'labels': doughnut_data[dimension].tolist(),
+                'values': doughnut_data[value].tolist(),
+            })
+
+        weekly_by_dimension = dict(tuple(weekly.groupby(dimension)))
+        for dimension_value, rows in data.groupby(dimension):
+            doughnut_data = weekly_by_dimension[dimension_value]
+            jobs.append({
+                'path': f"{name}/{dimension}_{self.slugify(dimension_value)}.html",
+                'title': f"{name} - {dimension_value}",
+                'table_title': "Loaded data",
+                'headers': spec['headers'],
+                'cells': self.to_cells(rows.sort_values(date, ascending=False), spec['columns']),
+                'doughnut_title': f"{spec['aggregation'].capitalize()} {value} by week",
+                'labels': doughnut_data['week'].dt.strftime('%Y-%m-%d').tolist(),
+                'values': doughnut_data[value].tolist(),
+            })
+        return jobs
+
+    def build_undated_jobs(self, name, data):
+        """
+        Creates the overview and per-facility report jobs of a dataset without a date column.
+
+        Args:
+            name (str): The dataset name.
+            data (pd.DataFrame): The loaded data of the dataset.
+
+        Returns:
+            list: The report jobs.
+        """
+        spec = DATASET_SPECS[name]
+        dimension, value = spec['dimension'], spec['value']
+        detail = spec['columns'][1]
+        totals = data.groupby(dimension)[value].agg(spec['aggregation'])
+        jobs = [{
+            'path': f"{name}/overview.html",
+            'title': name,
+            'table_title': "Loaded data",
+            'headers': spec['headers'],
+            'cells': self.to_cells(data.sort_values([dimension, value], ascending=False), spec['columns']),
+            'doughnut_title': f"{spec['aggregation'].capitalize()} {value} by {dimension}",
+            'labels': totals.index.tolist(),
+            'values': totals.tolist(),
+        }]
+        for dimension_value, rows in data.groupby(dimension):
+            rows = rows.sort_values(value, ascending=False)
+            jobs.append({
+                'path': f"{name}/{dimension}_{self.slugify(dimension_value)}.html",
+                'title': f"{name} - {dimension_value}",
+                'table_title': "Loaded data",
+                'headers': spec['headers'],
+                'cells': self.to_cells(rows, spec['columns']),
+                'doughnut_title': f"{value} by {detail}",
+                'labels': rows[detail].fillna('').tolist(),
+                'values': rows[value].tolist(),
+            })
+        return jobs
+
+    def build_jobs(self):
+        """
+        Creates the report jobs for all loaded datasets.
+
+        Returns:
+            list: The report jobs.
+        """
+        jobs = []
+        for name, data in self.datasets.items():
+            if DATASET_SPECS[name]['date'] is None:
+                jobs.extend(self.build_undated_jobs(name, data))
+            else:
+                jobs.extend(self.build_dated_jobs(name, data))
+        return jobs
+
+    def write_assets(self):
+        """
+        Writes plotly.js once to the shared assets directory referenced by every report.
+        """
+        assets_path = os.path.join(self.storage_path, ASSETS_DIRECTORY)
+        os.makedirs(assets_path, exist_ok=True)
+        with open(os.path.join(assets_path, PLOTLY_JS_FILE), 'w', encoding='utf-8') as handle:
+            handle.write(get_plotlyjs())
+
+    def write_index(self, report_paths):
+        """
+        Writes an index page linking all rendered reports.
+
+        Args:
+            report_paths (list): The report paths, relative to the storage path.
+        """
+        links = '\n'.join(f'<li><a href="{path}">{path}</a></li>' for path in sorted(report_paths))
+        with open(os.path.join(self.storage_path, 'index.html'), 'w', encoding='utf-8') as handle:
+            handle.write(f"<html><body><h1>DQE Automation - batch reports</h1><ul>\n{links}\n</ul></body></html>\n")
+
+    def generate_reports(self):
+        """
+        Main method to render all reports.
+
+        This method:
+        - Writes the shared static assets.
+        - Creates the report jobs from the loaded datasets.
+        - Renders the reports in parallel worker processes.
+        - Writes an index page linking all reports.
+
+        Returns:
+            list: The paths of the rendered reports, relative to the storage path.
+        """
+        self.write_assets()
+        jobs = self.build_jobs()
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            report_paths = list(executor.map(render_report, jobs, [self.storage_path] * len(jobs)))
+        self.write_index(report_paths)
+        return report_paths
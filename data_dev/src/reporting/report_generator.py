@@ -1,10 +1,16 @@
 import pandas as pd
+import pyarrow.parquet as pq
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import plotly.io as pio
 import os
 
 from data_dev.config import report_generator_config
+from data_dev.src.data.dataset_manifest import dataset_entries, locate_file, read_dataset
+
+PARTITION_COLUMN = 'partition_date'
+REPORT_COLUMNS = ['facility_type', 'visit_date', 'avg_time_spent']
+REPORT_DAYS = 7
 
 
 class ReportGenerator:
@@ -12,13 +18,19 @@ class ReportGenerator:
     A class to generate an HTML report with a table and a doughnut chart visualizing
     last week's data and the minimum average time spent by facility type.
 
+    Only the monthly partitions covering the last week are read, so report generation cost
+    does not grow with the length of the loaded history.
+
     Attributes:
         data (pd.DataFrame): The source data loaded from a Parquet files.
         fig (plotly.graph_objects.Figure): A combined figure containing a table and a doughnut chart.
 
     Methods:
         combine_figures(): Initializes the combined figure layout with a table and doughnut chart.
-        read_source_data(): Reads the source data from a Parquet file.
+        find_last_partition(parquet_files_path): Finds the latest partition of a dataset.
+        read_last_loaded_date(parquet_files_path, partition): Reads the latest visit date of a partition
+            from the manifest statistics.
+        read_source_data(): Reads the last week's partitions of the source data.
         transform_data(): Filters and sorts the data for the last week.
         create_table_element(last_week_data): Adds a table visualization to the figure.
         create_doughnut_element(last_week_data): Adds a doughnut chart visualization to the figure.
@@ -48,15 +60,86 @@ class ReportGenerator:
             subplot_titles=("Last week loaded data", "Min average time spent by Facility Type for the last week")
         )
 
+    @staticmethod
+    def find_last_partition(parquet_files_path):
+        """
+        Finds the latest partition of a Parquet dataset from the files its manifest lists.
+
+        Only committed files are considered, so files of a write in progress, files left behind by a failed
+        or interrupted write and partitions without rows are ignored.
+
+        Args:
+            parquet_files_path (str): Location of the partitioned dataset.
+
+        Returns:
+            str: The value of the latest partition (e.g. '2025-11').
+
+        Raises:
+            FileNotFoundError: If the dataset contains no partitions with rows.
+        """
+        partitions = [
+            entry['partition'][PARTITION_COLUMN]
+            for entry in dataset_entries(parquet_files_path)
+            if entry['rows'] and PARTITION_COLUMN in entry['partition']
+        ]
+        if not partitions:
+            raise FileNotFoundError(f"No partitions found in {parquet_files_path}")
+        return max(partitions)
+
+    @staticmethod
+    def read_last_loaded_date(parquet_files_path, partition):
+        """
+        Reads the latest visit date of a partition from the column statistics of its committed files.
+
+        Falls back to reading the visit_date column of a file when it has no statistics.
+
+        Args:
+            parquet_files_path (str): Location of the partitioned dataset.
+            partition (str): The value of the partition (e.g. '2025-11').
+
+        Returns:
+            pd.Timestamp: The latest visit date found in the partition.
+
+        Raises:
+            FileNotFoundError: If the partition contains no rows.
+        """
+        last_loaded_date = None
+        for entry in dataset_entries(parquet_files_path):
+            if not entry['rows'] or entry['partition'].get(PARTITION_COLUMN) != partition:
+                continue
+            statistics = entry['statistics'].get('visit_date') or {}
+            if statistics.get('max') is not None:
+                file_max = pd.Timestamp(statistics['max'])
+            else:
+                file_max = pd.Timestamp(pq.read_table(locate_file(parquet_files_path, entry['path']),
+                                                      columns=['visit_date']).column(0).to_pandas().max())
+            if last_loaded_date is None or file_max > last_loaded_date:
+                last_loaded_date = file_max
+        if last_loaded_date is None:
+            raise FileNotFoundError(f"No loaded visit dates found in {parquet_files_path} partition {partition}")
+        return last_loaded_date
+
     @staticmethod
     def read_source_data():
         """
-        Reads the source data from a Parquet file specified in the configuration.
+        Reads the partitions of the source Parquet dataset that cover the last week.
+
+        The latest partition and the last loaded date are taken from the dataset manifest, so only one or
+        two monthly partitions are read, with the report columns only, from the files of the current version.
 
         Returns:
             pd.DataFrame: The loaded data.
         """
-        return pd.read_parquet(report_generator_config.parquet_files_path)
+        parquet_files_path = report_generator_config.parquet_files_path
+        last_partition = ReportGenerator.find_last_partition(parquet_files_path)
+        last_loaded_date = ReportGenerator.read_last_loaded_date(parquet_files_path, last_partition)
+        first_date = last_loaded_date - pd.Timedelta(days=REPORT_DAYS - 1)
+        partitions = sorted({first_date.strftime('%Y-%m'), last_partition})
+        return read_dataset(
+            parquet_files_path,
+            columns=REPORT_COLUMNS,
+            filters=[(PARTITION_COLUMN, 'in', partitions)]
+        )
 
     def transform_data(self):
         """
@@ -67,7 +150,7 @@ class ReportGenerator:
         """
         self.data['visit_date'] = pd.to_datetime(self.data['visit_date'])
         last_loaded_date = self.data['visit_date'].max()
-        last_week_data = self.data[self.data['visit_date'] >= (last_loaded_date - pd.Timedelta(days=6))]
+        last_week_data = self.data[self.data['visit_date'] >= (last_loaded_date - pd.Timedelta(days=REPORT_DAYS - 1))]
         last_week_data = last_week_data.sort_values(by=['visit_date', 'facility_type'], ascending=False)
         return last_week_data
 
@@ -104,6 +187,10 @@ class ReportGenerator:
         """
         Adds a doughnut chart visualization to the figure.
 
+        The chart covers the REPORT_DAYS days up to the last loaded date rather than a calendar week, so it
+        cannot be served by the week rollup, whose periods start on Mondays; it is aggregated from the rows
+        of those days instead.
+
         Args:
             last_week_data (pd.DataFrame): The data for the last week to be visualized.
         """
@@ -148,9 +235,13 @@ class ReportGenerator:
         - Creates a table and doughnut chart elements.
         - Updates the layout of the figure.
         - Writes the figure to an HTML file.
+
+        Returns:
+            int: The number of rows shown in the report.
         """
         last_week_data = self.transform_data()
         self.create_table_element(last_week_data)
         self.create_doughnut_element(last_week_data)
         self.update_layout()
         self.write_html()
+        return len(last_week_data)
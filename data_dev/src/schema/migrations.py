@@ -0,0 +1,289 @@
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from data_dev.queries import (CREATE_FACILITIES_TABLE_QUERY,
+                              CREATE_PATIENTS_TABLE_QUERY,
+                              CREATE_VISITS_TABLE_QUERY)
+from data_dev.queries import (CREATE_AGG_FACILITY_DAILY_VISITS_TABLE_QUERY,
+                              CREATE_AGG_PATIENT_FACILITY_VISITS_TABLE_QUERY,
+                              CREATE_AGG_REFRESH_STATE_TABLE_QUERY,
+                              SELECT_AGG_REFRESH_RANGE_QUERY,
+                              REFRESH_AGG_FACILITY_DAILY_VISITS_QUERY,
+                              REFRESH_AGG_PATIENT_FACILITY_VISITS_QUERY)
+from data_dev.queries import (CREATE_SCHEMA_MIGRATIONS_TABLE_QUERY,
+                              SELECT_SCHEMA_MIGRATIONS_QUERY,
+                              INSERT_SCHEMA_MIGRATION_QUERY,
+                              CREATE_FACILITIES_EXTERNAL_ID_INDEX_QUERY,
+                              CREATE_PATIENTS_EXTERNAL_ID_INDEX_QUERY,
+                              DELETE_DUPLICATE_VISITS_QUERY,
+                              CREATE_VISITS_NATURAL_KEY_INDEX_QUERY,
+                              CREATE_VISITS_TIMESTAMP_BRIN_INDEX_QUERY)
+
+
+@dataclass
+class Migration:
+    """
+    A versioned change of the database schema.
+
+    Attributes:
+        version (int): The position of the migration; migrations are applied in ascending order, once.
+        description (str): What the migration changes, recorded in schema_migrations.
+        statements (List[str]): The idempotent SQL statements of the migration, run in one transaction.
+    """
+    version: int
+    description: str
+    statements: List[str]
+
+
+@dataclass
+class PlanCheck:
+    """
+    A pipeline query whose plan has to use indexes.
+
+    Attributes:
+        name (str): The name the check is reported under.
+        query (str): The SQL query to explain.
+        indexes (List[str]): The indexes the plan is expected to use.
+        params (dict): The query parameters.
+        params_query (Optional[str]): A query whose row, read by column name, holds the parameters the pipeline
+            runs the query with; it takes precedence over params.
+    """
+    name: str
+    query: str
+    indexes: List[str]
+    params: dict = field(default_factory=dict)
+    params_query: Optional[str] = None
+
+
+@dataclass
+class PlanCheckResult:
+    """
+    The outcome of a plan check.
+
+    Attributes:
+        name (str): The name of the check.
+        used_indexes (List[str]): The indexes the plan uses.
+        missing_indexes (List[str]): The expected indexes the plan does not use.
+    """
+    name: str
+    used_indexes: List[str]
+    missing_indexes: List[str] = field(default_factory=list)
+
+    @property
+    def passed(self):
+        return not self.missing_indexes
+
+
+MIGRATIONS = [
+    Migration(1, '3NF tables', [CREATE_FACILITIES_TABLE_QUERY, CREATE_PATIENTS_TABLE_QUERY,
+                                CREATE_VISITS_TABLE_QUERY]),
+    Migration(2, 'external_id indexes on facilities and patients',
+              [CREATE_FACILITIES_EXTERNAL_ID_INDEX_QUERY, CREATE_PATIENTS_EXTERNAL_ID_INDEX_QUERY]),
+    Migration(3, 'unique natural key on visits',
+              [DELETE_DUPLICATE_VISITS_QUERY, CREATE_VISITS_NATURAL_KEY_INDEX_QUERY]),
+    Migration(4, 'BRIN index on visits.visit_timestamp', [CREATE_VISITS_TIMESTAMP_BRIN_INDEX_QUERY]),
+    Migration(5, 'aggregate tables', [CREATE_AGG_FACILITY_DAILY_VISITS_TABLE_QUERY,
+                                      CREATE_AGG_PATIENT_FACILITY_VISITS_TABLE_QUERY,
+                                      CREATE_AGG_REFRESH_STATE_TABLE_QUERY]),
+]
+
+# The incremental aggregate refreshes read the visits above the watermark through the primary key. The merges
+# read the whole SRC tables and are served by hash joins, so their plans are not expected to use indexes.
+PLAN_CHECKS = [
+    PlanCheck('refresh_agg_facility_daily_visits', REFRESH_AGG_FACILITY_DAILY_VISITS_QUERY, ['visits_pkey'],
+              params_query=SELECT_AGG_REFRESH_RANGE_QUERY),
+    PlanCheck('refresh_agg_patient_facility_visits', REFRESH_AGG_PATIENT_FACILITY_VISITS_QUERY, ['visits_pkey'],
+              params_query=SELECT_AGG_REFRESH_RANGE_QUERY),
+]
+
+ANALYZED_TABLES = ['facilities', 'patients', 'visits']
+
+
+def plan_indexes(plan):
+    """
+    Collects the indexes a plan node and its children scan.
+
+    Args:
+        plan (dict): A node of an EXPLAIN (FORMAT JSON) plan.
+
+    Returns:
+        List[str]: The index names, in plan order.
+    """
+    indexes = [plan['Index Name']] if 'Index Name' in plan else []
+    for child in plan.get('Plans', []):
+        indexes += plan_indexes(child)
+    return indexes
+
+
+class SchemaMigrator:
+    """
+    A class to manage the schema of the 3NF layer: versioned migrations, statistics and index usage.
+
+    Migrations create the tables and the indexes the merge, the aggregate refresh and the DQ key-alignment
+    queries rely on; schema_migrations records the applied versions, so every migration runs once. After loads,
+    ANALYZE keeps the planner statistics current, and verify_plans() explains the pipeline queries to check
+    that their plans use the indexes.
+
+    Attributes:
+        conn: A psycopg2 database connection object used to interact with the database.
+    """
+
+    def __init__(self, conn):
+        """
+        Initialize the SchemaMigrator with a database connection.
+
+        Args:
+            conn: A psycopg2 database connection object.
+        """
+        self.conn = conn
+
+    def applied_versions(self, cursor):
+        """
+        Returns the versions of the applied migrations.
+
+        Args:
+            cursor (object): A database cursor object.
+
+        Returns:
+            set: The applied versions.
+        """
+        cursor.execute(CREATE_SCHEMA_MIGRATIONS_TABLE_QUERY)
+        cursor.execute(SELECT_SCHEMA_MIGRATIONS_QUERY)
+        return {row[0] for row in cursor.fetchall()}
+
+    def migrate(self, migrations=None):
+        """
+        Apply the pending migrations in version order, each in its own transaction.
+
+        Args:
+            migrations (List[Migration]): The migrations to apply, MIGRATIONS by default.
+
+        Returns:
+            int: The number of applied migrations.
+
+        Raises:
+            Exception: If a migration fails, its transaction is rolled back, the error is printed and the
+                       exception is re-raised; the migrations applied before it stay committed.
+        """
+        cursor = self.conn.cursor()
+        applied = 0
+        try:
+            applied_versions = self.applied_versions(cursor)
+            self.conn.commit()
+            for migration in sorted(migrations or MIGRATIONS, key=lambda item: item.version):
+                if migration.version in applied_versions:
+                    continue
+                for statement in migration.statements:
+                    cursor.execute(statement)
+                cursor.execute(INSERT_SCHEMA_MIGRATION_QUERY,
+                               {'version': migration.version, 'description': migration.description})
+                self.conn.commit()
+                applied += 1
+                logging.info(f"Applied schema migration {migration.version}: {migration.description}")
+                # report what the migration changed in existing data, e.g. removed duplicate visits
+                for notice in getattr(self.conn, 'notices', []):
+                    logging.warning(f"Schema migration {migration.version}: {notice.strip()}")
+                del getattr(self.conn, 'notices', [])[:]
+        except Exception as e:
+            # Rollback the failed migration
+            self.conn.rollback()
+            print(f"An error occurred during schema migration: {e}")
+            raise
+        finally:
+            # Close the cursor
+            cursor.close()
+        return applied
+
+    def analyze(self, tables=None):
+        """
+        Refresh the planner statistics of tables, e.g. after a load changed their size.
+
+        Args:
+            tables (List[str]): The tables to analyze, the 3NF tables by default.
+        """
+        cursor = self.conn.cursor()
+        try:
+            for table in tables or ANALYZED_TABLES:
+                cursor.execute(f"ANALYZE {table}")
+            self.conn.commit()
+        except Exception as e:
+            self.conn.rollback()
+            print(f"An error occurred during ANALYZE: {e}")
+            raise
+        finally:
+            cursor.close()
+
+    def plan_params(self, cursor, check):
+        """
+        Returns the parameters a check's query is explained with.
+
+        Args:
+            cursor (object): A database cursor object.
+            check (PlanCheck): The check to explain.
+
+        Returns:
+            dict: The parameters, or None if the params_query of the check returns no row.
+        """
+        if check.params_query is None:
+            return check.params
+        cursor.execute(check.params_query)
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip([column[0] for column in cursor.description], row))
+
+    def explain(self, cursor, check, params):
+        """
+        Returns the indexes the plan of a check's query uses.
+
+        Args:
+            cursor (object): A database cursor object.
+            check (PlanCheck): The check to explain.
+            params (dict): The query parameters.
+
+        Returns:
+            List[str]: The index names.
+        """
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {check.query.strip().rstrip(';')}", params)
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan_indexes(plan[0]['Plan'])
+
+    def verify_plans(self, checks=None):
+        """
+        Explain the pipeline queries and report the expected indexes their plans do not use.
+
+        The queries are explained with the default planner settings and the parameters the pipeline runs them
+        with, so the checks report the plans the pipeline gets on the loaded tables. A check whose parameters
+        cannot be read yet, e.g. before the first aggregate refresh, is skipped. The explains run in a
+        transaction that is rolled back.
+
+        Args:
+            checks (List[PlanCheck]): The checks to run, PLAN_CHECKS by default.
+
+        Returns:
+            List[PlanCheckResult]: The result of every check.
+        """
+        cursor = self.conn.cursor()
+        results = []
+        try:
+            for check in checks or PLAN_CHECKS:
+                params = self.plan_params(cursor, check)
+                if params is None:
+                    logging.info(f"Plan check {check.name} skipped: no parameters to explain it with")
+                    continue
+                used = self.explain(cursor, check, params)
+                results.append(PlanCheckResult(check.name, used, [index for index in check.indexes
+                                                                  if index not in used]))
+        finally:
+            self.conn.rollback()
+            cursor.close()
+        for result in results:
+            if result.passed:
+                logging.info(f"Plan check {result.name} uses {', '.join(result.used_indexes)}")
+            else:
+                logging.warning(f"Plan check {result.name} does not use {', '.join(result.missing_indexes)}")
+        return results